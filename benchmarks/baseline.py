@@ -0,0 +1,153 @@
+import argparse
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+
+from benchmarks.generate import generate_sheet
+from benchmarks.run import CALCULATORS, time_workload
+
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# name → (engine, ordered, intervals per sheet, sheets). Both engines are linear in the sheet size, so
+# a quadratic regression shows up in the 1000-interval scenarios first.
+SCENARIOS = {
+    'v1 ordered 100': ('v1', True, 100, 10),
+    'v1 ordered 1000': ('v1', True, 1000, 1),
+    'v1 unordered 1000': ('v1', False, 1000, 1),
+    'v2 ordered 100': ('v2', True, 100, 10),
+    'v2 ordered 1000': ('v2', True, 1000, 1),
+    'v2 unordered 1000': ('v2', False, 1000, 1),
+}
+
+# A slowdown fails the gate only when it is both larger than tolerance (1.0 = twice the baseline) and
+# significant at alpha. Normalizing by the calibration loop removes most, not all, of the difference
+# between machines, hence the generous default.
+TOLERANCE = float(os.environ.get('STC_PERF_TOLERANCE', 1.0))
+ALPHA = float(os.environ.get('STC_PERF_ALPHA', 0.01))
+SAMPLES = int(os.environ.get('STC_PERF_SAMPLES', 7))
+
+# One scenario checked against its baseline:
+#   ratio   : median normalized time now / median in the baseline
+#   p_value : one-sided Mann-Whitney U p-value for "now is slower"
+#   failed  : ratio is above 1 + tolerance and p_value below alpha
+Comparison = namedtuple('Comparison', ['scenario', 'ratio', 'p_value', 'failed'])
+
+
+def _calibration_loop():
+    # the engine's kind of work: small tuples, sorting, dict updates and string formatting
+    charges = {}
+    spans = sorted(((i * 7919) % 1440, i % 37) for i in range(4000))
+    for start, code in spans:
+        charges[code] = charges.get(code, 0) + start
+    return [f'{code}:{total:05d}' for code, total in charges.items()]
+
+
+def calibrate(repeat=3):
+    """Best time of the calibration loop, the unit every scenario time is expressed in."""
+    best = math.inf
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _calibration_loop()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def measure(scenario, samples=SAMPLES):
+    """samples normalized times for one scenario, each taken right after its own calibration so a
+    machine that speeds up or slows down mid-run affects both alike."""
+    engine, ordered, intervals, count = SCENARIOS[scenario]
+    sheets = [generate_sheet(intervals, seed=seed) for seed in range(count)]
+    calculate = CALCULATORS[engine]
+    time_workload(calculate, sheets, ordered, repeat=1)  # warm up
+    normalized = []
+    for _ in range(samples):
+        unit = calibrate()
+        runs, errors = time_workload(calculate, sheets, ordered, repeat=3)
+        if errors:
+            raise RuntimeError(f'{scenario}: {errors} of {count} sheets failed to calculate.')
+        normalized.append(min(runs) / unit)
+    return normalized
+
+
+def mann_whitney_p(before, after):
+    """One-sided p-value that after tends to be larger than before (normal approximation with tie
+    correction, which is adequate from about five samples a side)."""
+    n1, n2 = len(before), len(after)
+    ranked = sorted([(value, 0) for value in before] + [(value, 1) for value in after])
+    ranks = [0.0] * len(ranked)
+    ties = 0
+    i = 0
+    while i < len(ranked):
+        j = i
+        while j + 1 < len(ranked) and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        for k in range(i, j + 1):
+            ranks[k] = (i + j) / 2 + 1
+        ties += (j - i + 1)**3 - (j - i + 1)
+        i = j + 1
+    u = sum(rank for rank, (_, group) in zip(ranks, ranked) if group == 1) - n2 * (n2 + 1) / 2
+    n = n1 + n2
+    variance = n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1)))
+    if variance <= 0:
+        return 1.0
+    z = (u - n1 * n2 / 2 - 0.5) / math.sqrt(variance)
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def compare(scenario, baseline, samples, tolerance=TOLERANCE, alpha=ALPHA):
+    ratio = statistics.median(samples) / statistics.median(baseline)
+    p_value = mann_whitney_p(baseline, samples)
+    return Comparison(scenario, ratio, p_value, ratio > 1 + tolerance and p_value < alpha)
+
+
+def load_baselines(path=BASELINES):
+    """{scenario: [normalized times]} from the stored baselines, or {} if there are none."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)['scenarios']
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(baselines, path=BASELINES):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'unit': 'calibration loop', 'scenarios': baselines}, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def check(scenarios=None, baselines=None, samples=SAMPLES, tolerance=TOLERANCE, alpha=ALPHA):
+    """Measure scenarios (default: every scenario with a baseline) and compare each with its baseline."""
+    baselines = load_baselines() if baselines is None else baselines
+    return [
+        compare(name, baselines[name], measure(name, samples), tolerance, alpha)
+        for name in (scenarios or SCENARIOS) if name in baselines
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.baseline',
+                                     description='Compare benchmark scenarios with the stored baselines.')
+    parser.add_argument('--update', action='store_true', help='measure every scenario and store it as the baseline')
+    parser.add_argument('--samples', type=int, default=SAMPLES)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--alpha', type=float, default=ALPHA)
+    args = parser.parse_args(argv)
+
+    if args.update:
+        save_baselines({name: [round(t, 4) for t in measure(name, args.samples)] for name in SCENARIOS})
+        print(f'wrote {BASELINES}')
+        return 0
+    failed = False
+    for comparison in check(samples=args.samples, tolerance=args.tolerance, alpha=args.alpha):
+        failed |= comparison.failed
+        print(f'{comparison.scenario:<18} {comparison.ratio:6.2f}x baseline  p={comparison.p_value:.4f}'
+              + ('  SLOWER' if comparison.failed else ''))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
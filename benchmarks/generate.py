@@ -0,0 +1,87 @@
+import math
+import random
+
+# The engines reject intervals that leave the day, so one sheet holds at most a day of one-minute
+# intervals; bigger workloads are spread over several sheets.
+MAX_SHEET_INTERVALS = 1000
+RANGES_PER_LINE = 8
+FORMATS = ('hmm', 'decimal', 'ampm')
+
+_WORDS = ('oh', 'capsa', 'train', 'proj', 'mtg', 'ops', 'rnd', 'admin')
+
+
+def _format_time(minute, style):
+    hours, minutes = divmod(minute, 60)
+    if style == 'decimal' and minutes % 6 == 0:
+        return f'{hours + minutes / 60:g}'
+    if style == 'ampm':
+        suffix = 'a' if hours < 12 else 'p'
+        hours = hours % 12 or 12
+        return f'{hours}{suffix}' if minutes == 0 else f'{hours}:{minutes:02d}{suffix}'
+    return f'{hours}:{minutes:02d}'
+
+
+def _charge_ids(count, rng, multiword):
+    ids = []
+    for n in range(count):
+        word = _WORDS[n % len(_WORDS)]
+        ids.append(f'{word} task {n}' if multiword and rng.random() < 0.2 else f'{word}{n}')
+    return ids
+
+
+def generate_sheet(intervals, ids=None, seed=0, formats=FORMATS, comments=True, target=True, multiword=False):
+    """A valid timesheet with the given number of intervals, accepted by v1 and v2 in both modes.
+
+    Intervals tile the day in order with occasional breaks and are dealt to ids charge IDs (default
+    about sqrt(intervals)). Each ID's ranges are written in time order, RANGES_PER_LINE to a line,
+    and IDs appear in order of their first start so ordered mode infers no PM shift. Every time is
+    written in one of formats: 'hmm' (13:30), 'decimal' (13.5, when the minute allows it) or
+    'ampm' (1:30p). Comments and a \\= target line are mixed in unless disabled. multiword=True
+    gives some IDs spaces, which only v2 accepts."""
+    if not 1 <= intervals <= MAX_SHEET_INTERVALS:
+        raise ValueError(f'A sheet holds 1 to {MAX_SHEET_INTERVALS} intervals, not {intervals}.')
+    rng = random.Random(seed)
+    ids = ids or max(1, round(math.sqrt(intervals)))
+    codes = _charge_ids(min(ids, intervals), rng, multiword)
+
+    # each interval is step minutes; a day of 7:00 to 23:00 fits any sheet up to 16 hours long
+    step = max(1, min(60, 960 // intervals))
+    breaks = [rng.random() < 0.1 for _ in range(intervals)]
+    length = (intervals + sum(breaks)) * step
+    minute = min(7 * 60, 1439 - length) if length < 1439 else 0
+    if length >= 1439:
+        breaks = [False] * intervals
+
+    ranges = {}
+    for n in range(intervals):
+        # every ID gets at least one interval, in order of first appearance
+        code = codes[n] if n < len(codes) else rng.choice(codes)
+        start, minute = minute, minute + step
+        ranges.setdefault(code, []).append(
+            f'{_format_time(start, rng.choice(formats))}-{_format_time(minute, rng.choice(formats))}')
+        if breaks[n]:
+            minute += step
+
+    lines = []
+    if comments:
+        lines.append('# generated timesheet')
+    for code, code_ranges in ranges.items():
+        for i in range(0, len(code_ranges), RANGES_PER_LINE):
+            line = f"{code} {', '.join(code_ranges[i:i + RANGES_PER_LINE])}"
+            if comments and rng.random() < 0.2:
+                line += '  # note'
+            lines.append(line)
+    if target:
+        lines.append(f'\\={max(1, round(length / 60))}')
+    return '\n'.join(lines)
+
+
+def generate_workload(intervals, seed=0, **options):
+    """Sheets holding intervals in total, each at most MAX_SHEET_INTERVALS long."""
+    sheets = []
+    remaining = intervals
+    while remaining > 0:
+        size = min(remaining, MAX_SHEET_INTERVALS)
+        sheets.append(generate_sheet(size, seed=seed + len(sheets), **options))
+        remaining -= size
+    return sheets
@@ -0,0 +1,184 @@
+import argparse
+import contextlib
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import namedtuple
+
+from benchmarks.generate import generate_sheet
+
+# One replayed request:
+#   route   : the corpus route, e.g. '/v2/'
+#   status  : HTTP status, or None if no response came back
+#   seconds : latency, counted from when the request was due so a saturated server shows its queueing
+#   error   : None, 'HTTP <status>' for a 4xx/5xx, or the exception name for a failed connection
+Sample = namedtuple('Sample', ['route', 'status', 'seconds', 'error'])
+
+
+def load_corpus(path):
+    """Records ({'route', 'form'}) from a JSON Lines corpus written by the app's STC_RECORD_CORPUS."""
+    records = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                records.append({'route': record['route'], 'form': record['form']})
+    return records
+
+
+def synthetic_corpus(count, seed=0):
+    """Stand-in corpus for when nothing has been recorded yet: small sheets split between / and /v2/."""
+    rng = random.Random(seed)
+    records = []
+    for n in range(count):
+        text = generate_sheet(rng.randint(1, 40), seed=seed + n)
+        if n % 2:
+            records.append({'route': '/', 'form': {'time_input': text}})
+        else:
+            records.append({'route': '/v2/', 'form': {'input': text, 'target': ''}})
+    return records
+
+
+class InProcessTarget:
+    """Sends requests to main.app through Flask's test client, one client per thread."""
+
+    def __init__(self, app=None):
+        if app is None:
+            from main import app
+        self.app = app
+        self._local = threading.local()
+
+    def send(self, route, form):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.post(route, data=form).status_code
+
+
+class HttpTarget:
+    """Sends requests to a running server, e.g. http://127.0.0.1:5001."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def send(self, route, form):
+        body = urllib.parse.urlencode(form).encode()
+        try:
+            with urllib.request.urlopen(self.base_url + route, data=body, timeout=self.timeout) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+
+def _percentile(values, q):
+    # nearest rank on sorted values
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)] if values else None
+
+
+def summarize(samples, seconds):
+    """Throughput, latency percentiles and error counts, overall and per route."""
+
+    def stats(group):
+        latencies = sorted(sample.seconds for sample in group)
+        errors = {}
+        for sample in group:
+            if sample.error:
+                errors[sample.error] = errors.get(sample.error, 0) + 1
+        return {
+            'requests': len(group),
+            'throughput': len(group) / seconds if seconds else None,
+            'p50': _percentile(latencies, 50),
+            'p95': _percentile(latencies, 95),
+            'p99': _percentile(latencies, 99),
+            'max': latencies[-1] if latencies else None,
+            'errors': errors,
+        }
+
+    routes = {}
+    for sample in samples:
+        routes.setdefault(sample.route, []).append(sample)
+    return dict(stats(samples), seconds=seconds, routes={route: stats(group) for route, group in sorted(routes.items())})
+
+
+def replay(corpus, target, concurrency=4, rate=None, requests=None):
+    """Replay corpus records (cycling through them) against target from concurrency threads.
+
+    rate is the total requests per second to offer; None sends as fast as the threads allow.
+    requests defaults to one pass over the corpus. Returns summarize()'s report."""
+    if not corpus:
+        raise ValueError('The corpus is empty.')
+    total = len(corpus) if requests is None else requests
+    tickets = itertools.count()
+    samples = []
+    started = time.perf_counter()
+
+    def worker():
+        for i in iter(tickets.__next__, None):
+            if i >= total:
+                return
+            due = started + i / rate if rate else time.perf_counter()
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            record = corpus[i % len(corpus)]
+            try:
+                status = target.send(record['route'], record['form'])
+                error = f'HTTP {status}' if status >= 400 else None
+            except Exception as e:
+                status, error = None, type(e).__name__
+            samples.append(Sample(record['route'], status, time.perf_counter() - due, error))
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(samples, time.perf_counter() - started)
+
+
+def _print_report(report):
+    rows = [('all', report)] + list(report['routes'].items())
+    print(f"{'route':<8} {'requests':>8} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  errors")
+    for route, stats in rows:
+        errors = ', '.join(f'{name}: {count}' for name, count in sorted(stats['errors'].items())) or '-'
+        print(f"{route:<8} {stats['requests']:>8} {stats['throughput']:>9.1f} {stats['p50'] * 1e3:>9.2f} "
+              f"{stats['p95'] * 1e3:>9.2f} {stats['p99'] * 1e3:>9.2f}  {errors}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.replay',
+                                     description='Replay a corpus of recorded POSTs and report latency per route.')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('corpus', nargs='?', help='JSON Lines corpus recorded with STC_RECORD_CORPUS')
+    source.add_argument('--synthetic', type=int, metavar='N', help='replay N generated sheets instead')
+    parser.add_argument('--url', help='server to send to (default: main.app in-process)')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--rate', type=float, help='requests per second to offer (default: as fast as possible)')
+    parser.add_argument('--requests', type=int, help='requests to send (default: one pass over the corpus)')
+    parser.add_argument('--output', '-o', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    corpus = synthetic_corpus(args.synthetic) if args.synthetic else load_corpus(args.corpus)
+    target = HttpTarget(args.url) if args.url else InProcessTarget()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):  # v1's progress prints
+        report = replay(corpus, target, args.concurrency, args.rate, args.requests)
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,149 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _path in (_ROOT, os.path.join(_ROOT, 'v2')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+from calculator import process_input
+from hour_calculator import HourCalculator
+
+from benchmarks.generate import generate_workload
+
+SIZES = (1, 10, 100, 1000, 10000, 100000)
+ENGINES = ('v1', 'v2')
+MODES = ('ordered', 'unordered')
+# small workloads are repeated inside one timed run until it covers this many intervals
+MIN_RUN_INTERVALS = 1000
+
+
+def _v1(text, ordered):
+    return HourCalculator(text).calculate(ordered=ordered)
+
+
+def _v2(text, ordered):
+    return process_input(text, ordered=ordered)
+
+
+CALCULATORS = {'v1': _v1, 'v2': _v2}
+
+
+def time_workload(calculate, sheets, ordered, number=1, repeat=3):
+    """Time number passes over sheets, repeat times. Returns (per-pass seconds of each run, errors).
+    v1's progress prints are captured so they cost what they cost without flooding the terminal."""
+    runs = []
+    errors = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeat):
+            started = time.perf_counter()
+            for _ in range(number):
+                for text in sheets:
+                    try:
+                        calculate(text, ordered)
+                    except Exception:
+                        errors += 1
+            runs.append((time.perf_counter() - started) / number)
+    return runs, errors // (number * repeat)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _scaling(results):
+    """Log-log slope between consecutive sizes per engine and mode: ~1 is linear, ~2 quadratic.
+    Slopes below 1 at the small end just mean fixed per-call overhead still dominates."""
+    curves = {}
+    for result in results:
+        curves.setdefault(f"{result['engine']} {result['mode']}", []).append(result)
+    scaling = {}
+    for name, points in curves.items():
+        points.sort(key=lambda r: r['intervals'])
+        scaling[name] = [{
+            'from': a['intervals'],
+            'to': b['intervals'],
+            'exponent': round(math.log(b['seconds'] / a['seconds']) / math.log(b['intervals'] / a['intervals']), 3),
+        } for a, b in zip(points, points[1:]) if a['seconds'] > 0 and b['seconds'] > 0]
+    return scaling
+
+
+def run(sizes=SIZES, engines=ENGINES, modes=MODES, repeat=3, seed=0, progress=None):
+    """Benchmark every engine and mode at every size. Returns the report written by main()."""
+    results = []
+    for intervals in sizes:
+        sheets = generate_workload(intervals, seed=seed)
+        lines = sum(1 for text in sheets for line in text.splitlines() if line.strip())
+        number = max(1, math.ceil(MIN_RUN_INTERVALS / intervals))
+        for engine in engines:
+            for mode in modes:
+                runs, errors = time_workload(CALCULATORS[engine], sheets, mode == 'ordered', number, repeat)
+                best = min(runs)
+                result = {
+                    'engine': engine,
+                    'mode': mode,
+                    'intervals': intervals,
+                    'sheets': len(sheets),
+                    'lines': lines,
+                    'seconds': best,
+                    'runs': runs,
+                    'intervals_per_second': intervals / best if best else None,
+                    'sheets_per_second': len(sheets) / best if best else None,
+                    'errors': errors,
+                }
+                results.append(result)
+                if progress:
+                    progress(result)
+    return {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'repeat': repeat,
+        'seed': seed,
+        'results': results,
+        'scaling': _scaling(results),
+    }
+
+
+def _print_result(result):
+    print(f"{result['engine']:>3} {result['mode']:<9} {result['intervals']:>7} intervals "
+          f"{result['seconds'] * 1e3:>10.3f} ms {result['intervals_per_second']:>12,.0f} intervals/s"
+          + (f"  ({result['errors']} errors)" if result['errors'] else ''), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks.run',
+                                     description='Time v1 and v2 in both modes over synthetic timesheets.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='total intervals per workload')
+    parser.add_argument('--engines', nargs='+', choices=ENGINES, default=list(ENGINES))
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--repeat', type=int, default=3, help='timed runs per case; the best is reported')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', '-o', default='benchmark-results.json', help="JSON report path ('-' for stdout)")
+    args = parser.parse_args(argv)
+
+    report = run(args.sizes, args.engines, args.modes, args.repeat, args.seed, progress=_print_result)
+    payload = json.dumps(report, indent=2) + '\n'
+    if args.output == '-':
+        sys.stdout.write(payload)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        print(f'wrote {args.output}', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
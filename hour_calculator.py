@@ -1,4 +1,9 @@
+import argparse
+import contextlib
+import io
+import json
 import math
+import os
 import sys
 """
 This script can be used to sum up intervals of time worked on different
@@ -28,12 +33,65 @@ displayed with percision as to not short the employee any hours by pre rounding
         oh == 6.3 hrs
         total: 10.0
 
+    Streaming many documents (separated by '---' lines) to JSON Lines:
+         python calc_hours.py --stream timesheets.txt > results.jsonl
+         cat archive.txt | python calc_hours.py --stream --engine v2 --delimiter '==='
+
 """
 
+# Make v2 dir importable so the shared merge and rounding modules can be found.
+_V2_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'v2')
+if _V2_DIR not in sys.path:
+    sys.path.insert(0, _V2_DIR)
+from formatting import HHMM, V1_CLOCK_12H
+from merge import DoubleChargeError, sweep
+from rounding import round_to_tenths
+from tokenizer import TokenTable
+
+
+def _parse_time(time):
+    """
+    Convert one time token (9, 9.5, 9:30, 9:30pm, ...) to its hours as a string, ie '21.5'.
+    """
+    am = False
+    pm = False
+    if time[-1] == 'a':
+        time = time[:-1]
+        am = True
+    elif time[-2:] == 'am':
+        time = time[:-2]
+        am = True
+    elif time[-1] == 'p':
+        time = time[:-1]
+        pm = True
+    elif time[-2:] == 'pm':
+        time = time[:-2]
+        pm = True
+
+    if ':' in time:
+        times = time.split(':')
+        hours = float(times[0])
+        minutes = round(float(times[1]) / 60, 3)
+    else:
+        hours, minutes = float(time), 0
+
+    hours = float(hours) - 12 if am and int(hours) == 12 else float(hours)
+    hours = float(hours) + 12 if pm and int(hours) != 12 else float(hours)
+
+    return str(hours + minutes)
+
+
+# Parsed time tokens, shared by every calculation in the process (separate from v2's, which parses to seconds).
+_time_tokens = TokenTable(_parse_time)
+
 
 class HourCalculator(object):
 
-    def __init__(self, time_input):
+    def __init__(self, time_input, quiet=False):
+        """
+        quiet=True drops the progress prints; the cli=True summary of calculate() is still printed.
+        """
+        self.quiet = quiet
         self.time_input = [line.strip() for line in time_input.strip().splitlines()]
         self.hours = {}
         self.charges = {}
@@ -78,12 +136,12 @@ class HourCalculator(object):
                 try:
                     self._target_hours = float(line[3:])
                 except ValueError:
-                    print('Unable to parse target hours.')
+                    self._print('Unable to parse target hours.')
             elif line[:2] == '\\=':
                 try:
                     self._target_hours = float(line[2:])
                 except ValueError:
-                    print('Unable to parse target hours.')
+                    self._print('Unable to parse target hours.')
             else:
                 non_encoded_lines.append(line)
 
@@ -94,57 +152,13 @@ class HourCalculator(object):
         Convert time ranges within a line of the time entry to required format for calculations.
         """
         formatted_ranges = []
+        parse = _time_tokens.lookup
         for rng in ranges:
-            formatted_range = []
-            for time in rng.split('-'):
-                am = False
-                pm = False
-                if time[-1] == 'a':
-                    time = time[:-1]
-                    am = True
-                elif time[-2:] == 'am':
-                    time = time[:-2]
-                    am = True
-                elif time[-1] == 'p':
-                    time = time[:-1]
-                    pm = True
-                elif time[-2:] == 'pm':
-                    time = time[:-2]
-                    pm = True
-
-                if ':' in time:
-                    times = time.split(':')
-                    hours = float(times[0])
-                    minutes = round(float(times[1]) / 60, 3)
-                else:
-                    hours, minutes = float(time), 0
-
-                hours = float(hours) - 12 if am and int(hours) == 12 else float(hours)
-                hours = float(hours) + 12 if pm and int(hours) != 12 else float(hours)
-
-                formatted_range.append(str(hours + minutes))
-
-            formatted_ranges.append('-'.join(formatted_range))
+            formatted_ranges.append('-'.join(parse(time) for time in rng.split('-')))
 
         # print('formatted_ranges:', formatted_ranges)
         return formatted_ranges
 
-    def _next_charge(self, hours):
-        """
-        Find the next ordered charge id to evaluate.
-        """
-        nxt = None
-        nex_start = None
-        for code, data in hours.items():
-            start = data[0][0]
-            if not nxt:
-                nxt = code
-                nex_start = start
-            elif start <= nex_start:
-                nxt = code
-                nex_start = start
-        return nxt
-
     def _parse_hour_input(self):
         """
         Parse the hour input lines and populate the hours attribute. Charge ids are determined by the string up until
@@ -164,13 +178,13 @@ class HourCalculator(object):
                 # print('times', times)
                 str_id = charge_data[:space]
                 if str_id in self.hours:
-                    print('combining duplicated id:', str_id)
+                    self._print('combining duplicated id:', str_id)
                     self.hours[str_id] += times
                 else:
                     self.hours[str_id] = times
                 self.charges[str_id] = 0
             except ValueError as e:
-                print(e)
+                self._print(e)
                 raise e
 
     def _convert_ordered_starts(self):
@@ -229,35 +243,20 @@ class HourCalculator(object):
 
     def _calculate_charges(self):
         """
-        Populate the charges attribute with summations of the input hour intervals.
-
-        Warning: This method is destructive to the hours attribute (pls fix).
+        Populate the charges and breaks attributes with summations of the input hour intervals.
         """
-        last_time = None
-        while self.hours:
-            nxt_chg = self._next_charge(self.hours)
-            time = self.hours[nxt_chg][0]
-            duration = round(abs(time[1] - time[0]), 3)
-
-            if last_time and time[0] < last_time:
-                raise RuntimeError('Double charging or invalid range: ' + str(time[0]) + '-' + str(last_time)
-                                   + '. Ensure lines starting with a PM time are written in 24 hour format.')
-
-            if last_time and last_time != time[0]:
-                break_start = self._frac_hours_to_minutes(round(last_time, 3))
-                break_end = self._frac_hours_to_minutes(round(time[0], 3))
-                break_dur = str(round(abs(time[0] - last_time), 2))
-                self.breaks.append([break_start, break_end, break_dur])
-                print('break: ' + break_start + '-' + break_end + ' == ' + break_dur)
-
-            if len(self.hours[nxt_chg]) > 1:
-                self.hours[nxt_chg] = self.hours[nxt_chg][1:]
-            else:
-                del self.hours[nxt_chg]
-
-            last_time = time[1]
-
-            self.charges[nxt_chg] += duration
+        try:
+            self.charges, spans = sweep({code: [t for time in data for t in time] for code, data in self.hours.items()})
+        except DoubleChargeError as e:
+            raise RuntimeError('Double charging or invalid range: ' + str(e.start) + '-' + str(e.last_time)
+                               + '. Ensure lines starting with a PM time are written in 24 hour format.') from None
+
+        for last_time, start in spans:
+            break_start = self._frac_hours_to_minutes(round(last_time, 3))
+            break_end = self._frac_hours_to_minutes(round(start, 3))
+            break_dur = str(round(abs(start - last_time), 2))
+            self.breaks.append([break_start, break_end, break_dur])
+            self._print('break: ' + break_start + '-' + break_end + ' == ' + break_dur)
 
     def _frac_hours_to_minutes(self, frac_hours):
         """
@@ -265,7 +264,10 @@ class HourCalculator(object):
         ie
             4:28
         """
-        return str(math.floor(frac_hours)) + ':' + str(format(round((frac_hours % 1) * 60), '02d'))
+        hours, minutes = math.floor(frac_hours), round((frac_hours % 1) * 60)
+        if 0 <= hours < 24 and minutes < 60:
+            return HHMM[hours * 60 + minutes]
+        return str(hours) + ':' + str(format(minutes, '02d'))
 
     def _frac_hours_to_12h_format(self, frac_hours):
         """
@@ -273,17 +275,17 @@ class HourCalculator(object):
         ie
             4:28pm
         """
-        am_pm = 'am'
-        if math.floor(frac_hours) > 12:
-            hours = str(math.floor(frac_hours) % 12)
-            am_pm = 'pm'
-        elif math.floor(frac_hours) == 12:
-            hours = str(math.floor(frac_hours))
-            am_pm = 'pm'
-        else:
-            hours = str(math.floor(frac_hours))
-
-        return hours + ':' + str(format(round((frac_hours % 1) * 60), '02d')) + am_pm
+        hours, minutes = math.floor(frac_hours), round((frac_hours % 1) * 60)
+        if 0 <= hours < 24 and minutes < 60:
+            return V1_CLOCK_12H[hours * 60 + minutes]
+        am_pm = 'am' if hours < 12 else 'pm'
+        if hours > 12:
+            hours %= 12
+        return str(hours) + ':' + str(format(minutes, '02d')) + am_pm
+
+    def _print(self, *args):
+        if not self.quiet:
+            print(*args)
 
     def __str__(self):
         """
@@ -299,7 +301,7 @@ class HourCalculator(object):
         if not self._target_hours:
             return
         if exact_hours > self._target_hours:
-            print('Target hours fulfilled.')
+            self._print('Target hours fulfilled.')
             return
 
         # +0.01 bunk since python3 rounds half to even
@@ -309,7 +311,7 @@ class HourCalculator(object):
         if unfulfilled_hours > 0:
             target_time = last_charge_time + unfulfilled_hours
             target_time_h_m = self._frac_hours_to_12h_format(target_time)
-            print('Target time: ', target_time_h_m)
+            self._print('Target time: ', target_time_h_m)
             return target_time_h_m
         return None
 
@@ -319,7 +321,7 @@ class HourCalculator(object):
         """
         try:
             if ordered:
-                print('Calculating ordered')
+                self._print('Calculating ordered')
                 self._parse_hour_input()
                 self._convert_ordered_starts()
                 self._convert_mil_times()
@@ -327,7 +329,7 @@ class HourCalculator(object):
                 self._determine_last_time()
                 self._calculate_charges()
             else:
-                print('Calculating unordered')
+                self._print('Calculating unordered')
                 self._parse_hour_input()
                 self._convert_mil_times()
                 # print('unordered:', self)
@@ -338,74 +340,129 @@ class HourCalculator(object):
 
         # print('charges:', self.charges)
 
-        total_exact = 0
-        total_round = 0
-        diffs = []
-        for chg, duration in self.charges.items():
-            total_exact += duration
-            total_round += round(duration, 1)
-            diff = round(duration - round(duration, 1), 4)
-            diffs.append([chg, diff])
+        total_exact = sum(self.charges.values())
 
         self._target_time = self._eval_target_time(total_exact, self._last_time)
 
-        # prefer to adjust numbers with more time worked (least proportional rounding adjustment)
-        diffs = sorted(diffs, key=lambda diff: self.charges[diff[0]], reverse=True)
-        total_diff = round(round(total_exact, 1) - total_round, 4)
-
-        # find furthest actual from rounded, ie closest to rounding
-        while abs(total_diff) >= 0.1:
-            # adjust those that are the closest to rounding
-            diffs = sorted(diffs, key=lambda diff: abs(diff[1]), reverse=True)
-            for diff in diffs:
-                if total_diff > 0:  # need to increase subtimes
-                    if diff[1] > 0:  # was rounded down
-                        # print('rounding up', diff[0])
-                        self.charges[diff[0]] = round(self.charges[diff[0]] + 0.05, 2)
-                        diff[1] = 0
-                        total_diff -= 0.1
-                        break
-                    else:
-                        continue
-                else:  # need to decrease subtimes
-                    if diff[1] < 0:  # was rounded up
-                        # print('rounding down', diff[0])
-                        self.charges[diff[0]] = round(self.charges[diff[0]] - 0.05, 2)
-                        diff[1] = 0
-                        total_diff += 0.1
-                        break
-                    else:
-                        continue
-
-        # print('charges:', self.charges)
+        # spread rounding error so subtimes add up to the rounded total, adjusting those closest to rounding
+        # (durations are summed to 3 decimals, so thousandths of an hour order them exactly). Each duration and
+        # the total are rounded from their floats as v1 always has: 1.4500000000000002 rounds to 1.5, and
+        # 25.35 + 2.1 is 27.450000000000003, which rounds to 27.5. Ties go to the larger float duration, so
+        # IDs are handed over longest first.
+        longest_first = sorted(self.charges, key=self.charges.get, reverse=True)
+        thousandths = {chg: round(self.charges[chg] * 1000) for chg in longest_first}
+        rounded = {chg: round(round(self.charges[chg], 1) * 10) for chg in longest_first}
+        tenths, total_tenths = round_to_tenths(thousandths, 100, round(round(total_exact, 1) * 10), rounded)
 
         hours = {}
 
         if cli:
             print('\nCHARGES')
-        total = 0
-        for chg, duration in self.charges.items():
+        for chg in self.charges:
+            tenth = tenths[chg]
             if cli:
-                print(chg + ' == ' + str(round(duration, 1)) + ' hrs')
-            hours[chg] = round(duration, 1)
-            total += round(duration, 1)
+                print(chg + ' == ' + str(tenth / 10) + ' hrs')
+            hours[chg] = tenth / 10
+        total = sum(tenths.values()) / 10
         if cli:
-            print('total: ' + str(round(total, 1)))
+            print('total: ' + str(total))
 
-        hours['$total'] = round(total, 1)
+        hours['$total'] = total
 
         # review subtime adjustments
-        print('exact total, new total, total round:', total_exact, round(total, 1), round(total_exact, 1))
-        if round(total, 1) != round(total_exact, 1):
+        self._print('exact total, new total, total round:', total_exact, total, total_tenths / 10)
+        if total != total_tenths / 10:
             sys.exit('Round error occurred. Please contact maintainer with the input.')
 
         self.metadata['target_time'] = self._target_time
 
-        print()
+        self._print()
         return hours, self.breaks, self.metadata
 
 
+def read_documents(streams, delimiter='---'):
+    """
+    Lazily yield documents from text streams. Documents are separated by lines equal to the delimiter
+    (surrounding whitespace ignored); only the document being read is held in memory.
+    """
+    lines = []
+    for stream in streams:
+        for line in stream:
+            if line.strip() == delimiter:
+                if any(l.strip() for l in lines):
+                    yield ''.join(lines)
+                lines = []
+            else:
+                lines.append(line)
+        # a stream ending without a delimiter still closes its last document
+        if any(l.strip() for l in lines):
+            yield ''.join(lines)
+        lines = []
+
+
+def _calculate_quietly(calculate, text, ordered):
+    """
+    Run one calculation with its progress prints captured so stdout stays valid JSON Lines.
+    Returns {'results', 'breaks', 'metadata'} or {'error'}.
+    """
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            results, breaks, metadata = calculate(text, ordered)
+        except SystemExit as e:
+            return {'error': str(e.code)}
+        except Exception as e:
+            return {'error': str(e)}
+    return {'results': results, 'breaks': breaks, 'metadata': metadata}
+
+
+def stream_results(documents, engine='v1'):
+    """
+    Yield one result record per document with the ordered and unordered calculations.
+    """
+    if engine == 'v2':
+        from calculator import process_input
+        calculate = process_input
+    else:
+        def calculate(text, ordered):
+            return HourCalculator(text).calculate(ordered=ordered)
+
+    for n, text in enumerate(documents):
+        yield {
+            'document': n,
+            'lines': sum(1 for line in text.splitlines() if line.strip()),
+            'ordered': _calculate_quietly(calculate, text, True),
+            'unordered': _calculate_quietly(calculate, text, False),
+        }
+
+
+def stream_main(argv):
+    """
+    Streaming mode: read delimiter separated documents from files or stdin and write one JSON line per document.
+    """
+    parser = argparse.ArgumentParser(prog='hour_calculator.py --stream',
+                                     description='Calculate many timesheets, one JSON line per document.')
+    parser.add_argument('files', nargs='*', help='input files (default: stdin, or "-")')
+    parser.add_argument('--delimiter', default='---', help='line that separates documents (default: ---)')
+    parser.add_argument('--engine', choices=('v1', 'v2'), default='v1', help='calculation engine (default: v1)')
+    args = parser.parse_args(argv)
+
+    def streams():
+        for path in args.files or ['-']:
+            if path == '-':
+                yield sys.stdin
+            else:
+                with open(path, encoding='utf-8') as f:
+                    yield f
+
+    for record in stream_results(read_documents(streams(), args.delimiter), engine=args.engine):
+        sys.stdout.write(json.dumps(record, separators=(',', ':')) + '\n')
+        sys.stdout.flush()
+    return 0
+
+
 if __name__ == '__main__':
+    if sys.argv[1:2] == ['--stream']:
+        sys.exit(stream_main(sys.argv[2:]))
     try:
         raw = sys.argv[1]
         try:
@@ -1,13 +1,63 @@
 #! /usr/bin/env python3
 
-from flask import Flask, render_template, request
+import os
+import time
+
+from flask import Flask, Response, g, render_template, request
 
 from hour_calculator import HourCalculator
-from v2.app import v2_bp
+from v2.app import metrics, record_sheet, v2_bp
+# v2.app puts v2/ on sys.path; its modules are imported flat there, so import them the same way here
+# rather than as v2.<name>, which would load a second copy
+from formatting import v1_short_12h
+from recorder import CorpusRecorder
 
 app = Flask(__name__)
 app.register_blueprint(v2_bp, url_prefix='/v2')
 
+# Set STC_RECORD_CORPUS to a file path to append sanitized POST bodies from / and /v2/ to it, as a
+# corpus for python -m benchmarks.replay.
+RECORDED_ROUTES = ('/', '/v2/')
+_corpus = os.environ.get('STC_RECORD_CORPUS')
+recorder = CorpusRecorder(_corpus) if _corpus else None
+
+
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.before_request
+def _record_post():
+    if recorder is not None and request.method == 'POST' and request.path in RECORDED_ROUTES:
+        recorder.record(request.path, request.form.to_dict())
+
+
+@app.after_request
+def _record_request(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        metrics.record_request(request.endpoint, response.status_code, time.perf_counter() - started)
+    return response
+
+
+@app.route('/metrics')
+def metrics_page():
+    return Response(metrics.registry.exposition(), content_type=metrics.CONTENT_TYPE)
+
+
+def _calculate_v1(time_input, ordered):
+    """HourCalculator(time_input).calculate(ordered), timed and recorded in the metrics."""
+    started = time.perf_counter()
+    error = None
+    try:
+        return HourCalculator(time_input).calculate(ordered=ordered)
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        metrics.record_calculation('v1', ordered, time.perf_counter() - started, error)
+
 
 @app.route('/')
 def index(background=False):
@@ -20,9 +70,10 @@ def index_post(background=False):
     time_input = request.form['time_input'].replace('\\n', '\n')
     time_input_print = time_input.replace('\r\n', '\n')
     print(f'V1 time_input:\n{time_input_print}')
+    record_sheet(time_input)
 
     try:
-        hours, breaks, metadata = HourCalculator(time_input).calculate(ordered=True)
+        hours, breaks, metadata = _calculate_v1(time_input, ordered=True)
         success = True
         total = hours['$total']
         del hours['$total']
@@ -46,7 +97,7 @@ def index_post(background=False):
         calculated_hours = e
 
     try:
-        hours_ord, breaks_ord, metadata = HourCalculator(time_input).calculate(ordered=False)
+        hours_ord, breaks_ord, metadata = _calculate_v1(time_input, ordered=False)
         success_ord = True
         total_ord = hours_ord['$total']
         del hours_ord['$total']
@@ -111,13 +162,7 @@ def format_breaks(breaks):
         return breaks
     for brk in breaks:
         for i in range(2):
-            hour = int(brk[i][:brk[i].find(':')])
-            if hour < 12:
-                brk[i] += 'a'
-            elif hour == 12:
-                brk[i] += 'p'
-            else:
-                brk[i] = str(int(brk[i][:brk[i].find(':')]) - 12) + brk[i][brk[i].find(':'):] + 'p'
+            brk[i] = v1_short_12h(brk[i])
 
     return breaks
 
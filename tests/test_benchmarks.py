@@ -0,0 +1,55 @@
+import pytest
+from benchmarks import replay
+from benchmarks.generate import MAX_SHEET_INTERVALS, generate_sheet, generate_workload
+from benchmarks.run import CALCULATORS, run
+
+
+@pytest.mark.parametrize('intervals', [1, 7, 100, MAX_SHEET_INTERVALS])
+def test_generated_sheets_are_valid_for_every_method(intervals, capsys):
+    text = generate_sheet(intervals, seed=intervals)
+    assert sum(line.count('-') for line in text.splitlines() if not line.startswith('#')) == intervals
+    totals = {calculate(text, ordered)[0]['$total'] for calculate in CALCULATORS.values() for ordered in (True, False)}
+    assert len(totals) == 1
+
+
+def test_workload_is_split_into_sheets():
+    sheets = generate_workload(2500)
+    assert len(sheets) == 3
+    assert generate_workload(10, seed=4) == [generate_sheet(10, seed=4)]
+    with pytest.raises(ValueError):
+        generate_sheet(MAX_SHEET_INTERVALS + 1)
+
+
+def test_run_report():
+    report = run(sizes=[1, 10], repeat=1)
+    assert len(report['results']) == 8
+    assert all(result['errors'] == 0 and result['seconds'] > 0 for result in report['results'])
+    assert [step['to'] for step in report['scaling']['v2 ordered']] == [10]
+
+
+def test_replay_report(tmp_path):
+    path = tmp_path / 'corpus.jsonl'
+    path.write_text('{"route":"/v2/","form":{"input":"a 1-2"},"time":0}\n\n'
+                    '{"route":"/","form":{"time_input":"a 1-2"},"time":0}\n')
+    corpus = replay.load_corpus(str(path))
+    assert corpus == [{'route': '/v2/', 'form': {'input': 'a 1-2'}}, {'route': '/', 'form': {'time_input': 'a 1-2'}}]
+
+    class Target:
+        def send(self, route, form):
+            if route == '/':
+                raise ConnectionError()
+            return 200
+
+    report = replay.replay(corpus, Target(), concurrency=3, requests=10)
+    assert report['requests'] == 10
+    assert report['routes']['/v2/']['errors'] == {}
+    assert report['routes']['/']['errors'] == {'ConnectionError': 5}
+    assert report['p50'] <= report['p95'] <= report['p99'] <= report['max']
+
+
+def test_replay_in_process(capsys):
+    pytest.importorskip('flask')  # InProcessTarget drives main.app; CI installs only pytest
+    report = replay.replay(replay.synthetic_corpus(6), replay.InProcessTarget(), concurrency=2)
+    assert report['requests'] == 6
+    assert set(report['routes']) == {'/', '/v2/'}
+    assert all(not stats['errors'] for stats in report['routes'].values())
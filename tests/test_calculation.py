@@ -387,3 +387,40 @@ c 10-12
 d 6-9
 
 """
+
+
+def test_time_formatting_tables():
+    calc = HourCalculator('a 8-9')
+    for minute in range(0, 24 * 60, 7):
+        h, m = divmod(minute, 60)
+        assert calc._frac_hours_to_minutes(minute / 60) == f'{h}:{m:02d}'
+        assert calc._frac_hours_to_12h_format(minute / 60) == f"{h % 12 if h > 12 else h}:{m:02d}{'am' if h < 12 else 'pm'}"
+    assert calc._frac_hours_to_minutes(25.5) == '25:30'
+    assert calc._frac_hours_to_12h_format(25.5) == '1:30pm'
+
+
+def test_total_rounds_from_float_sum():
+    """b is 25.35 and the float total 27.450000000000003, which v1 has always rounded to 27.5."""
+    hours = ('x1 8:16-8:22, 8:52-10:52a\nb 11:07-11:37, 11:37-11:52pm, 11:52-12:52\nb 1:07-2:07\n'
+             'b 3:07-3:13, 4:13-4:43\n\\=8')
+    results, _, _ = HourCalculator(hours, quiet=True).calculate(ordered=True)
+    assert results == {'x1': 2.1, 'b': 25.4, '$total': 27.5}
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_ids_round_from_their_floats(ordered):
+    """b is 1.4500000000000002 and rounds to 1.5, so capsa is the one rounded down to 12.3."""
+    hours = ('b 7:11-7:17, 7:17-8:17a, 8:17-8:23, 8:53-9:08\ncapsa 9:23-11:23, 11:38-2:38, 3:08-3:14, 3:44-4:14\n'
+             'capsa 4:14-4:29, 4:44-5:14, 5:14-8:14p, 8:14-11:14\na 23:29-02:29, 2:29-2:59')
+    results, _, _ = HourCalculator(hours, quiet=True).calculate(ordered=ordered)
+    assert results == {'b': 1.5, 'capsa': 12.3, 'a': 9.5, '$total': 23.3}
+
+
+def test_rounding_ties_go_to_the_longer_float():
+    """train2 is 3.3339999999999996 and mtg4 3.334; the tenth that makes up the total goes to mtg4."""
+    hours = ('# generated timesheet\noh0 5:19-5:59, 12:39-13:19, 15:59-16:39, 18:39-19:19, 19:19-19:59, 8:39p-21:19, '
+             '21:59-10:39p, 11:19p-23:59\ncapsa1 5:59-6:39a, 11:59-12:39, 1:59p-2:39p, 22:39-11:19p\n'
+             'train2 6:39-7:19, 9:59a-10:39a, 17:19-17:59, 17:59-18:39, 19:59-8:39p  # note\n'
+             'proj3 7:59-8:39, 15:19-15:59\nmtg4 8:39a-9:19, 10:39a-11:19, 2:39p-15:19, 16:39-17:19, 9:19p-9:59p\n\\=19')
+    results, _, _ = HourCalculator(hours, quiet=True).calculate(ordered=True)
+    assert results == {'oh0': 5.3, 'capsa1': 2.7, 'train2': 3.3, 'proj3': 1.3, 'mtg4': 3.4, '$total': 16.0}
@@ -0,0 +1,46 @@
+import os
+
+import pytest
+from benchmarks import baseline
+
+import calculator
+
+# Wall-clock timings fail spuriously on a loaded machine, so the timing tests only run when asked for.
+timing_gate = pytest.mark.skipif(os.environ.get('STC_PERF_GATE') != '1', reason='set STC_PERF_GATE=1 to run')
+
+
+def test_mann_whitney():
+    before = [1.0, 1.1, 0.9, 1.05, 0.95, 1.02, 0.98]
+    assert baseline.mann_whitney_p(before, [x * 3 for x in before]) < 0.002
+    assert baseline.mann_whitney_p(before, list(before)) > 0.4
+    assert baseline.mann_whitney_p(before, [x / 3 for x in before]) > 0.99
+
+
+def test_compare_needs_a_large_and_significant_slowdown():
+    before = [1.0, 1.1, 0.9, 1.05, 0.95, 1.02, 0.98]
+    assert baseline.compare('s', before, [x * 3 for x in before], tolerance=1.0).failed
+    assert not baseline.compare('s', before, [x * 1.5 for x in before], tolerance=1.0).failed  # within tolerance
+    assert not baseline.compare('s', before, [0.5, 0.5, 0.5, 4, 4, 4, 4], tolerance=0.5).failed  # too noisy
+
+
+@timing_gate
+@pytest.mark.parametrize('scenario', sorted(baseline.load_baselines()))
+def test_no_slowdown(scenario):
+    comparison, = baseline.check([scenario])
+    assert not comparison.failed, (f'{scenario} is {comparison.ratio:.2f}x its baseline (p={comparison.p_value:.4f}); '
+                                   f'if the slowdown is intended, run python -m benchmarks.baseline --update')
+
+
+@timing_gate
+def test_gate_catches_quadratic_mil_times(monkeypatch):
+    convert = calculator._convert_mil_times
+
+    def quadratic(hours, range_texts=None):
+        times = [t for data in hours.values() for t in data]
+        for t in times:
+            times.index(t)
+        return convert(hours, range_texts)
+
+    monkeypatch.setattr(calculator, '_convert_mil_times', quadratic)
+    comparison, = baseline.check(['v2 ordered 1000'], samples=5)
+    assert comparison.failed
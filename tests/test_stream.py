@@ -0,0 +1,38 @@
+import io
+import json
+
+import pytest
+from hour_calculator import read_documents, stream_main, stream_results
+
+
+def test_read_documents_splits_on_delimiter():
+    streams = [io.StringIO('oh 1-2\n---\n\n---\na 7-8\n'), io.StringIO('b 9-10\n ---  \nc 1-2')]
+    assert list(read_documents(streams)) == ['oh 1-2\n', 'a 7-8\n', 'b 9-10\n', 'c 1-2']
+
+
+def test_read_documents_is_lazy():
+
+    def lines():
+        yield 'oh 1-2\n'
+        yield '---\n'
+        raise AssertionError('read past the first document')
+
+    assert next(read_documents([lines()])) == 'oh 1-2\n'
+
+
+@pytest.mark.parametrize('engine', ['v1', 'v2'])
+def test_stream_results(engine):
+    records = list(stream_results(['oh 1-2', 'a 7-8\nb 7-8'], engine=engine))
+    assert [r['document'] for r in records] == [0, 1]
+    assert records[0]['ordered']['results'] == {'oh': 1.0, '$total': 1.0}
+    assert records[0]['unordered']['breaks'] == []
+    assert records[1]['ordered']['error'].startswith('Double charging or invalid range')
+
+
+def test_stream_main_writes_json_lines(tmp_path, capsys):
+    path = tmp_path / 'sheets.txt'
+    path.write_text('oh 1-2\n===\nid1 6-8\nid2 8-10\n\\=4.6\n')
+    assert stream_main([str(path), '--delimiter', '===']) == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert [json.loads(line)['ordered']['results']['$total'] for line in lines] == [1.0, 4.0]
+    assert json.loads(lines[1])['ordered']['metadata'] == {'target_time': '10:34am'}
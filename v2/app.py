@@ -1,41 +1,164 @@
 #!/usr/bin/env python3
+import json
 import os as _os
 import sys as _sys
+import time
 
-from flask import Blueprint, Flask, render_template, request
+from flask import Blueprint, Flask, Response, g, render_template, request
 
-# Make the project root importable so HourCalculator can be found whether
+# Make the project root importable so hour_calculator can be found whether
 # v2/app.py is run standalone or imported from the parent app.
 _ROOT = _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__)))
 if _ROOT not in _sys.path:
     _sys.path.insert(0, _ROOT)
-from hour_calculator import HourCalculator
+import hour_calculator
 
 # Make v2 dir importable so calculator can be found in both standalone and blueprint modes.
 _V2_DIR = _os.path.dirname(_os.path.abspath(__file__))
 if _V2_DIR not in _sys.path:
     _sys.path.insert(0, _V2_DIR)
-from calculator import _format_break_display, log, process_input
+from batch import _calculate_v1
+from cache import ResultCache, SQLiteCache, normalize_input
+import calculator
+import metrics
+import tracing
+from calculator import log, process_days, process_many
+from formatting import break_display, break_from_triple
+from methods import ALL_METHODS, MethodExecutor
+from tokenizer import scan_line
 
 app = Flask(__name__)
 v2_bp = Blueprint('v2', __name__, template_folder='templates')
 
+# Resubmitted sheets (re-clicks, one edited line) skip all four calculations on a hit.
+# Set STC_CACHE_DB to a file path to share results between worker processes through SQLite.
+_cache_db = _os.environ.get('STC_CACHE_DB')
+results_cache = ResultCache(backing=SQLiteCache(_cache_db) if _cache_db else None)
+
+
+def _cache_lookups():
+    counts = {}
+    for tier, cache in (('memory', results_cache), ('sqlite', results_cache.backing)):
+        if cache is not None:
+            counts[tier, 'hit'] = cache.hits
+            counts[tier, 'miss'] = cache.misses
+    return counts
+
+
+metrics.registry.callback('stc_cache_lookups_total', 'Result cache lookups by tier and outcome.', _cache_lookups,
+                          ['tier', 'result'], kind='counter')
+
+
+def _token_lookups():
+    counts = {}
+    for engine, table in (('v2', calculator._time_tokens), ('v1', hour_calculator._time_tokens)):
+        counts[engine, 'hit'] = table.hits
+        counts[engine, 'miss'] = table.misses
+    return counts
+
+
+metrics.registry.callback('stc_time_token_lookups_total', 'Time token table lookups by engine and outcome.',
+                          _token_lookups, ['engine', 'result'], kind='counter')
+
+# Trace output is off unless STC_TRACE=1 (every request) or a request opts in with ?trace=1 or an
+# X-STC-Trace: 1 header.
+if _os.environ.get('STC_TRACE') == '1':
+    tracing.start(always=True)
+
+
+@v2_bp.before_request
+def _begin_trace():
+    wanted = request.args.get('trace') == '1' or request.headers.get('X-STC-Trace') == '1'
+    g.trace_token = tracing.begin(wanted)
+
+
+@v2_bp.teardown_request
+def _end_trace(exc):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        tracing.end(token)
+
+
+# Calculation methods run concurrently on a pool with a deadline so a slow method can't block the page.
+# STC_METHOD_POOL picks 'thread' (default) or 'process'; STC_METHOD_TIMEOUT is in seconds.
+method_executor = MethodExecutor(kind=_os.environ.get('STC_METHOD_POOL', 'thread'),
+                                 timeout=float(_os.environ.get('STC_METHOD_TIMEOUT', 5)))
+
+
+def _run_methods(calc_text, methods):
+    outcomes = method_executor.run(calc_text, methods, cache=results_cache)
+    for outcome in outcomes.values():
+        metrics.record_calculation(outcome.engine, outcome.ordered, outcome.seconds or None, outcome.error)
+    return outcomes
+
+
+def record_sheet(text):
+    """Record the size of a submitted sheet: time entry lines and the time ranges on them."""
+    lines = intervals = 0
+    for line in normalize_input(text).splitlines():
+        if line[:2] == '\\=':
+            continue
+        lines += 1
+        ranges = scan_line(line.rstrip(','))[1]
+        intervals += len(ranges) if ranges else 0
+    metrics.record_input(lines, intervals)
+
+
+def _with_target(input_text, target_input, days=False):
+    """Append a numeric target as a \\= line; anything non-numeric is ignored.
+    With days it goes before the first date header instead, so every day gets it."""
+    try:
+        float(target_input)
+    except (TypeError, ValueError):
+        return input_text
+    if days:
+        return f"\\={target_input}\n" + input_text
+    return input_text.rstrip() + f"\n\\={target_input}"
+
 
 @v2_bp.route("/help")
 def help():
     return render_template('v2/help.html')
 
 
-@v2_bp.route("/", methods=["GET", "POST"])
-def index():
-    input_text = ""
-    results = None
-    total = 0
-    breaks = []
-    target_time = None
-    target_achieved_at = None
-    detected_ids = []
-    error = None
+# Compute only the primary result on POST and load the other three methods with a follow-up
+# request to /compare once the page is shown. Set STC_EAGER_COMPARE=1 to compute all four up front.
+EAGER_COMPARE = _os.environ.get('STC_EAGER_COMPARE') == '1'
+
+
+def _primary(outcome):
+    """v2 ordered, the result at the top of the page. Returns its template context."""
+    context = {
+        'results': None,
+        'total': 0,
+        'breaks': [],
+        'target_time': None,
+        'target_achieved_at': None,
+        'detected_ids': [],
+        'error': None,
+    }
+    if outcome.error is None:
+        raw, raw_breaks, metadata = outcome.result
+
+        context['total'] = raw.pop('$total', 0)
+        context['results'] = raw
+        context['target_time'] = metadata.get('target_time')
+        context['target_achieved_at'] = metadata.get('target_achieved_at')
+        context['detected_ids'] = metadata.get('detected_ids', [])
+        context['breaks'] = [break_display(*b) for b in raw_breaks]
+    else:
+        context['error'] = str(outcome.error)
+        log.debug('ERROR: %s', outcome.error)
+    return context
+
+
+def _comparisons(primary, outcomes):
+    """v2 unordered and both v1 modes from outcomes, compared against the primary result.
+    Returns their template context."""
+    results = primary['results']
+    total = primary['total']
+    error = primary['error']
+    detected_ids = primary['detected_ids']
     order_warning = None
     order_error = None
     v1_ordered = None
@@ -51,176 +174,325 @@ def index():
     v2_unordered_breaks = []
     v2_unordered_error = None
     methods_differ = False
-    target_input = ""
+
+    # v2 unordered — runs independently so a primary failure doesn't block it
+    outcome = outcomes['v2', False]
+    if outcome.error is None:
+        raw_ord, raw_ord_breaks, unordered_meta = outcome.result
+        v2_unordered = {k: v for k, v in raw_ord.items() if k != '$total'}
+        v2_unordered_total = raw_ord.get('$total', 0)
+        v2_unordered_breaks = [break_display(*b) for b in raw_ord_breaks]
+        if not detected_ids:
+            detected_ids = unordered_meta.get('detected_ids', [])
+        if results is not None and (v2_unordered != results or v2_unordered_total != total):
+            order_warning = dict(v2_unordered)
+            order_warning['Total'] = v2_unordered_total
+    elif isinstance(outcome.error, ValueError):
+        order_error = str(outcome.error)
+        v2_unordered_error = str(outcome.error)
+    else:
+        v2_unordered_error = str(outcome.error)
+
+    # v1 (HourCalculator) calculations on the same input
+    outcome = outcomes['v1', True]
+    if outcome.error is None:
+        h, b, _ = outcome.result
+        v1_ordered_total = h.pop('$total', 0)
+        v1_ordered = h
+        v1_ordered_breaks = [break_display(*brk) for brk in b]
+    else:
+        v1_ordered_error = str(outcome.error)
+    outcome = outcomes['v1', False]
+    if outcome.error is None:
+        h, b, _ = outcome.result
+        v1_unordered_total = h.pop('$total', 0)
+        v1_unordered = h
+        v1_unordered_breaks = [break_display(*brk) for brk in b]
+    else:
+        v1_unordered_error = str(outcome.error)
+
+    # Compute methods_differ for auto-expand
+    columns = [('V2 Ord', results, total, error), ('V2 Unord', v2_unordered, v2_unordered_total, v2_unordered_error),
+               ('V1 Unord', v1_unordered, v1_unordered_total, v1_unordered_error),
+               ('V1 Ord', v1_ordered, v1_ordered_total, v1_ordered_error)]
+    all_ids = list({id_ for _, hours, _, _ in columns if hours is not None for id_ in hours})
+    disagree_ids = [
+        id_ for id_ in all_ids
+        if len(set(hours[id_] for _, hours, _, _ in columns if hours is not None and id_ in hours)) > 1
+    ]
+    total_differs = len(set(t for _, hours, t, _ in columns if hours is not None)) > 1
+    any_error = bool(error or v2_unordered_error or v1_ordered_error or v1_unordered_error)
+    methods_differ = bool(disagree_ids) or total_differs or any_error
+
+    if tracing.active():
+        _log_summary(columns, all_ids, disagree_ids, total_differs, any_error)
+        log.debug('=' * 72)
+
+    return {
+        'detected_ids': detected_ids,
+        'order_warning': order_warning,
+        'order_error': order_error,
+        'v1_ordered': v1_ordered,
+        'v1_ordered_total': v1_ordered_total,
+        'v1_ordered_breaks': v1_ordered_breaks,
+        'v1_ordered_error': v1_ordered_error,
+        'v1_unordered': v1_unordered,
+        'v1_unordered_total': v1_unordered_total,
+        'v1_unordered_breaks': v1_unordered_breaks,
+        'v1_unordered_error': v1_unordered_error,
+        'v2_unordered': v2_unordered,
+        'v2_unordered_total': v2_unordered_total,
+        'v2_unordered_breaks': v2_unordered_breaks,
+        'v2_unordered_error': v2_unordered_error,
+        'methods_differ': methods_differ,
+    }
+
+
+def _log_summary(columns, all_ids, disagree_ids, total_differs, any_error):
+    """Trace the 4-method comparison table. columns: [(name, hours, total, error), ...]"""
+    if not all_ids and not any_error:
+        return
+    log.debug('-' * 72)
+    log.debug('SUMMARY')
+    col_w = max([len(k) for k in all_ids] + [len('Total')], default=4) + 2
+    col_v = 12
+    sep = '-' * (col_w + col_v * 3 + 18)
+    log.debug('  %-*s  %-*s  %-*s  %-*s  %s', col_w, 'ID', col_v, columns[0][0], col_v, columns[1][0], col_v,
+              columns[2][0], columns[3][0])
+    log.debug('  %s', sep)
+    for id_ in all_ids:
+        cells = [
+            f'{hours[id_]:.1f}' if hours and id_ in hours else ('ERR' if err else 'n/a')
+            for _, hours, _, err in columns
+        ]
+        log.debug('  %-*s  %-*s  %-*s  %-*s  %s%s', col_w, id_, col_v, cells[0], col_v, cells[1], col_v, cells[2],
+                  cells[3], '  ← differs' if id_ in disagree_ids else '')
+    log.debug('  %s', sep)
+    totals = [f'{t:.1f}' if hours is not None else ('ERR' if err else 'n/a') for _, hours, t, err in columns]
+    log.debug('  %-*s  %-*s  %-*s  %-*s  %s', col_w, 'Total', col_v, totals[0], col_v, totals[1], col_v, totals[2],
+              totals[3])
+    log.debug('  %s', sep)
+
+    if not (disagree_ids or total_differs or any_error):
+        log.debug('  All 4 methods agree.')
+    else:
+        parts = []
+        if disagree_ids:
+            parts.append('IDs differ: ' + ', '.join(disagree_ids))
+        if total_differs:
+            parts.append(f'totals differ ({" / ".join(totals)})')
+        if any_error:
+            parts.append('errors in: ' + ', '.join(name for name, _, _, err in columns if err))
+        log.debug('  Methods disagree — %s', '; '.join(parts))
+
+
+@v2_bp.route("/", methods=["GET", "POST"])
+def index():
+    context = {
+        'input_text': "",
+        'target_input': "",
+        'lazy_compare': False,
+        'results': None,
+        'total': 0,
+        'breaks': [],
+        'target_time': None,
+        'target_achieved_at': None,
+        'detected_ids': [],
+        'error': None,
+        'order_warning': None,
+        'order_error': None,
+        'v1_ordered': None,
+        'v1_ordered_total': 0,
+        'v1_ordered_breaks': [],
+        'v1_ordered_error': None,
+        'v1_unordered': None,
+        'v1_unordered_total': 0,
+        'v1_unordered_breaks': [],
+        'v1_unordered_error': None,
+        'v2_unordered': None,
+        'v2_unordered_total': 0,
+        'v2_unordered_breaks': [],
+        'v2_unordered_error': None,
+        'methods_differ': False,
+    }
 
     if request.method == "POST":
-        input_text = request.form.get("input", "")
-        target_input = request.form.get("target", "").strip()
-        calc_text = input_text
-        if target_input:
-            try:
-                float(target_input)
-                calc_text = input_text.rstrip() + f"\n\\={target_input}"
-            except ValueError:
-                pass  # ignore non-numeric target input
-        try:
+        context['input_text'] = request.form.get("input", "")
+        context['target_input'] = request.form.get("target", "").strip()
+        calc_text = _with_target(context['input_text'], context['target_input'])
+        record_sheet(calc_text)
+
+        if tracing.active():
             log.debug('=' * 72)
             log.debug('NEW REQUEST')
             log.debug('Raw input:\n%s', calc_text)
             log.debug('-' * 72)
 
-            raw, raw_breaks, metadata = process_input(calc_text, ordered=True)
-
-            total = raw.pop('$total', 0)
-            results = raw
-            target_time = metadata.get('target_time')
-            target_achieved_at = metadata.get('target_achieved_at')
-            detected_ids = metadata.get('detected_ids', [])
-            breaks = [_format_break_display(b) for b in raw_breaks]
-
-        except (ValueError, RuntimeError) as e:
-            error = str(e)
-            log.debug('ERROR: %s', e)
-
-        # v2 unordered — runs independently so a primary failure doesn't block it
-        try:
-            raw_ord, raw_ord_breaks, unordered_meta = process_input(calc_text, ordered=False)
-            v2_unordered = {k: v for k, v in raw_ord.items() if k != '$total'}
-            v2_unordered_total = raw_ord.get('$total', 0)
-            v2_unordered_breaks = [_format_break_display(b) for b in raw_ord_breaks]
-            if not detected_ids:
-                detected_ids = unordered_meta.get('detected_ids', [])
-            if results is not None and (v2_unordered != results or v2_unordered_total != total):
-                order_warning = dict(v2_unordered)
-                order_warning['Total'] = v2_unordered_total
-        except RuntimeError as e:
-            v2_unordered_error = str(e)
-        except ValueError as e:
-            order_error = str(e)
-            v2_unordered_error = str(e)
-
-        # Run v1 (HourCalculator) calculations on the same input
-        v1_input = calc_text.replace('\\n', '\n')
-        try:
-            h, b, _ = HourCalculator(v1_input).calculate(ordered=True)
-            v1_ordered_total = h.pop('$total', 0)
-            v1_ordered = h
-            v1_ordered_breaks = [_format_break_display(brk) for brk in b]
-        except Exception as e:
-            v1_ordered_error = str(e)
-        try:
-            h, b, _ = HourCalculator(v1_input).calculate(ordered=False)
-            v1_unordered_total = h.pop('$total', 0)
-            v1_unordered = h
-            v1_unordered_breaks = [_format_break_display(brk) for brk in b]
-        except Exception as e:
-            v1_unordered_error = str(e)
-
-        # 4-method comparison summary log
-        all_ids_set = set()
-        for _m in [results, v2_unordered, v1_unordered, v1_ordered]:
-            if _m is not None:
-                all_ids_set.update(_m.keys())
-        all_ids = list(all_ids_set)
-
-        if all_ids or any([error, v2_unordered_error, v1_ordered_error, v1_unordered_error]):
-            log.debug('-' * 72)
-            log.debug('SUMMARY')
-            col_w = max([len(k) for k in all_ids] + [len('Total')], default=4) + 2
-            col_v = 12
-            sep = '-' * (col_w + col_v * 3 + 18)
-            log.debug('  %-*s  %-*s  %-*s  %-*s  %s', col_w, 'ID', col_v, 'V2 Ord', col_v, 'V2 Unord', col_v,
-                      'V1 Unord', 'V1 Ord')
-            log.debug('  %s', sep)
-            for id_ in all_ids:
-                v2u = f'{results[id_]:.1f}' if results and id_ in results else ('ERR' if error else 'n/a')
-                v2o = f'{v2_unordered[id_]:.1f}' if v2_unordered and id_ in v2_unordered else (
-                    'ERR' if v2_unordered_error else 'n/a')
-                v1u = f'{v1_unordered[id_]:.1f}' if v1_unordered and id_ in v1_unordered else (
-                    'ERR' if v1_unordered_error else 'n/a')
-                v1o = f'{v1_ordered[id_]:.1f}' if v1_ordered and id_ in v1_ordered else (
-                    'ERR' if v1_ordered_error else 'n/a')
-                numeric = [float(v) for v in [v2u, v2o, v1u, v1o] if v not in ('ERR', 'n/a')]
-                row_differs = len(set(numeric)) > 1
-                log.debug('  %-*s  %-*s  %-*s  %-*s  %s%s', col_w, id_, col_v, v2u, col_v, v2o, col_v, v1u, v1o,
-                          '  ← differs' if row_differs else '')
-            log.debug('  %s', sep)
-            v2u_t = f'{total:.1f}' if results is not None else ('ERR' if error else 'n/a')
-            v2o_t = f'{v2_unordered_total:.1f}' if v2_unordered is not None else (
-                'ERR' if v2_unordered_error else 'n/a')
-            v1u_t = f'{v1_unordered_total:.1f}' if v1_unordered is not None else (
-                'ERR' if v1_unordered_error else 'n/a')
-            v1o_t = f'{v1_ordered_total:.1f}' if v1_ordered is not None else ('ERR' if v1_ordered_error else 'n/a')
-            log.debug('  %-*s  %-*s  %-*s  %-*s  %s', col_w, 'Total', col_v, v2u_t, col_v, v2o_t, col_v, v1u_t, v1o_t)
-            log.debug('  %s', sep)
-
-            # Compute methods_differ for auto-expand
-            id_differs = False
-            for id_ in all_ids:
-                vals = [m[id_] for m in [results, v2_unordered, v1_unordered, v1_ordered] if m is not None and id_ in m]
-                if len(set(vals)) > 1:
-                    id_differs = True
-            total_vals = [
-                t for m, t in [(results,
-                                total), (v2_unordered,
-                                         v2_unordered_total), (v1_unordered,
-                                                               v1_unordered_total), (v1_ordered, v1_ordered_total)]
-                if m is not None
-            ]
-            total_differs = len(set(total_vals)) > 1
-            any_error = bool(error or v2_unordered_error or v1_ordered_error or v1_unordered_error)
-            methods_differ = id_differs or total_differs or any_error
-
-            if not methods_differ:
-                log.debug('  All 4 methods agree.')
-            else:
-                parts = []
-                disagree_ids = [
-                    id_ for id_ in all_ids if len(
-                        set(m[id_] for m in [results, v2_unordered, v1_unordered, v1_ordered]
-                            if m is not None and id_ in m)) > 1
-                ]
-                if disagree_ids:
-                    parts.append('IDs differ: ' + ', '.join(disagree_ids))
-                if total_differs:
-                    parts.append(f'totals differ ({v2u_t} / {v2o_t} / {v1u_t} / {v1o_t})')
-                if any_error:
-                    err_methods = [
-                        name for name, err in [('V2 Ord', error), (
-                            'V2 Unord', v2_unordered_error), ('V1 Unord',
-                                                              v1_unordered_error), ('V1 Ord', v1_ordered_error)] if err
-                    ]
-                    parts.append('errors in: ' + ', '.join(err_methods))
-                log.debug('  Methods disagree — %s', '; '.join(parts))
-        log.debug('=' * 72)
+        if EAGER_COMPARE:
+            outcomes = _run_methods(calc_text, ALL_METHODS)
+            context.update(_primary(outcomes['v2', True]))
+            context.update(_comparisons(context, outcomes))
+        else:
+            context.update(_primary(_run_methods(calc_text, [('v2', True)])['v2', True]))
+            context['lazy_compare'] = True
+            if tracing.active():
+                log.debug('=' * 72)
+
+    return render_template('v2/index.html', **context)
+
+
+@v2_bp.route("/compare", methods=["POST"])
+def compare():
+    """The comparison panel for a submitted sheet, requested by the page after it loads.
+    Returns JSON with the rendered order warnings, the panel HTML and whether the methods disagree."""
+    if "input" not in request.form:
+        return _api_error("Expected the page's form with an 'input' field.")
+    calc_text = _with_target(request.form["input"], request.form.get("target", "").strip())
+    outcomes = _run_methods(calc_text, ALL_METHODS)  # v2 ordered is normally a cache hit from the page request
+    context = _primary(outcomes['v2', True])
+    context.update(_comparisons(context, outcomes))
+    any_error = bool(context['error'] or context['v2_unordered_error'] or context['v1_ordered_error']
+                     or context['v1_unordered_error'])
+    payload = {
+        'notes': render_template('v2/_order_notes.html', **context),
+        'details': render_template('v2/_compare.html', **context),
+        'methods_differ': context['methods_differ'],
+        'any_error': any_error,
+    }
+    return Response(json.dumps(payload, separators=(',', ':')), mimetype='application/json')
+
+
+API_ENGINES = ('v2', 'v1')
+API_MODES = ('ordered', 'unordered')
+
+
+def _v1_outcomes(texts, ordered):
+    outcomes = []
+    for text in texts:
+        started = time.perf_counter()
+        outcome = _calculate_v1(text, ordered)  # quiet, and a v1 sys.exit comes back as a RuntimeError
+        error = outcome if isinstance(outcome, BaseException) else None
+        if error is None:
+            results, breaks, metadata = outcome
+            outcome = results, [break_from_triple(b) for b in breaks], metadata
+        outcomes.append(outcome)
+        metrics.record_calculation('v1', ordered, time.perf_counter() - started, error)
+    return outcomes
+
+
+def _v2_outcomes(texts, ordered):
+    """process_many over a batch; each sheet's latency is recorded as the batch mean."""
+    started = time.perf_counter()
+    outcomes = process_many(texts, ordered=ordered, numeric_breaks=True)
+    seconds = (time.perf_counter() - started) / max(len(texts), 1)
+    for outcome in outcomes:
+        metrics.record_calculation('v2', ordered, seconds, outcome if isinstance(outcome, BaseException) else None)
+    return outcomes
+
+
+def _api_result(outcome):
+    if isinstance(outcome, BaseException):
+        return {'error': str(outcome)}
+    hours, breaks, metadata = outcome
+    hours = dict(hours)
+    total = hours.pop('$total', 0)
+    return {
+        'hours': hours,
+        'total': total,
+        'breaks': [[start, end, end - start] for start, end, _ in breaks],
+        'target_time': metadata.get('target_time'),
+        'target_achieved_at': metadata.get('target_achieved_at'),
+        'detected_ids': metadata.get('detected_ids', []),
+    }
+
+
+def _v2_days(text, ordered):
+    """process_days for one date-sectioned sheet; each day's latency is recorded as the sheet's mean."""
+    started = time.perf_counter()
+    try:
+        days, totals = process_days(text, ordered=ordered, numeric_breaks=True)
+    except ValueError as e:  # a time entry before the first date header
+        metrics.record_calculation('v2', ordered, time.perf_counter() - started, e)
+        return {'error': str(e)}
+    seconds = (time.perf_counter() - started) / len(days)
+    replies = []
+    for day in days:
+        error = ValueError(day['error']) if 'error' in day else None
+        metrics.record_calculation('v2', ordered, seconds, error)
+        outcome = error or (day['results'], day['breaks'], day['metadata'])
+        replies.append({'date': day['date'], **_api_result(outcome)})
+    totals = dict(totals)
+    total = totals.pop('$total')
+    return {'days': replies, 'hours': totals, 'total': total}
+
+
+def _drawn_from(values, allowed):
+    """values is a list of strings, each one of allowed (a nested list or object is rejected, not hashed)."""
+    return isinstance(values, list) and all(isinstance(value, str) and value in allowed for value in values)
+
+
+def _api_error(message):
+    return Response(json.dumps({'error': message}, separators=(',', ':')), status=400, mimetype='application/json')
+
+
+@v2_bp.route("/api/calculate", methods=["POST"])
+def api_calculate():
+    """Calculate without rendering HTML.
+
+    Body: {"input": "...", "target": "7.5", "engines": ["v2"], "modes": ["ordered"], "days": false}, or a
+    JSON array of such documents. engines defaults to ["v2"], modes to ["ordered", "unordered"]. Each
+    document comes back as {engine: {mode: {"hours", "total", "breaks", "target_time",
+    "target_achieved_at", "detected_ids"} or {"error"}}}; breaks are [start, end, duration] in minutes
+    from midnight. With "days": true (v2 only) the input is split on date header lines and each mode is
+    {"days": [{"date", ...one result or "error"}, ...], "hours", "total"} with the period's totals.
+    An array of documents is calculated as one batch and answered with an array in the same order."""
+    body = request.get_json(silent=True)
+    documents = body if isinstance(body, list) else [body]
+    if not documents or not all(isinstance(doc, dict) for doc in documents):
+        return _api_error('Expected a JSON object or an array of objects.')
+
+    texts = []
+    requested = []
+    for doc in documents:
+        engines = doc.get('engines', ['v2'])
+        modes = doc.get('modes', list(API_MODES))
+        if not isinstance(doc.get('input', ''), str):
+            return _api_error("'input' must be a string.")
+        if not _drawn_from(engines, API_ENGINES):
+            return _api_error(f"'engines' must be a list drawn from {list(API_ENGINES)}.")
+        if not _drawn_from(modes, API_MODES):
+            return _api_error(f"'modes' must be a list drawn from {list(API_MODES)}.")
+        if not isinstance(doc.get('days', False), bool):
+            return _api_error("'days' must be true or false.")
+        if doc.get('days') and 'v1' in engines:
+            return _api_error("'days' is only supported by the v2 engine.")
+        texts.append(_with_target(doc.get('input', ''), doc.get('target'), doc.get('days', False)))
+        requested.append([(engine, mode) for engine in API_ENGINES if engine in engines
+                          for mode in API_MODES if mode in modes])
+
+    for text in texts:
+        record_sheet(text)
+
+    # day-sectioned documents one at a time; the rest in one batch per engine and mode
+    replies = [{} for _ in documents]
+    by_day = {i for i, doc in enumerate(documents) if doc.get('days')}
+    for i in sorted(by_day):
+        for mode in API_MODES:
+            if ('v2', mode) in requested[i]:
+                replies[i].setdefault('v2', {})[mode] = _v2_days(texts[i], mode == 'ordered')
+    for engine in API_ENGINES:
+        for mode in API_MODES:
+            wanted = [i for i, pairs in enumerate(requested) if (engine, mode) in pairs and i not in by_day]
+            if not wanted:
+                continue
+            batch = [texts[i] for i in wanted]
+            ordered = mode == 'ordered'
+            outcomes = _v2_outcomes(batch, ordered) if engine == 'v2' else _v1_outcomes(batch, ordered)
+            for i, outcome in zip(wanted, outcomes):
+                replies[i].setdefault(engine, {})[mode] = _api_result(outcome)
 
-    return render_template(
-        'v2/index.html',
-        input_text=input_text,
-        target_input=target_input,
-        results=results,
-        total=total,
-        breaks=breaks,
-        target_time=target_time,
-        target_achieved_at=target_achieved_at,
-        detected_ids=detected_ids,
-        error=error,
-        order_warning=order_warning,
-        order_error=order_error,
-        v1_ordered=v1_ordered,
-        v1_ordered_total=v1_ordered_total,
-        v1_ordered_breaks=v1_ordered_breaks,
-        v1_ordered_error=v1_ordered_error,
-        v1_unordered=v1_unordered,
-        v1_unordered_total=v1_unordered_total,
-        v1_unordered_breaks=v1_unordered_breaks,
-        v2_unordered=v2_unordered,
-        v2_unordered_total=v2_unordered_total,
-        v2_unordered_breaks=v2_unordered_breaks,
-        v2_unordered_error=v2_unordered_error,
-        methods_differ=methods_differ,
-        v1_unordered_error=v1_unordered_error,
-    )
+    payload = replies if isinstance(body, list) else replies[0]
+    return Response(json.dumps(payload, separators=(',', ':')), mimetype='application/json')
 
 
 if __name__ == "__main__":
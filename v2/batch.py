@@ -0,0 +1,134 @@
+import os as _os
+import sys as _sys
+import time
+from collections import deque
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+
+# Make the project root and v2 dir importable in the parent and in every worker process.
+_ROOT = _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__)))
+if _ROOT not in _sys.path:
+    _sys.path.insert(0, _ROOT)
+_V2_DIR = _os.path.dirname(_os.path.abspath(__file__))
+if _V2_DIR not in _sys.path:
+    _sys.path.insert(0, _V2_DIR)
+from calculator import process_many
+from hour_calculator import HourCalculator
+
+ENGINES = ('v1', 'v2')
+
+
+def _calculate_v1(text, ordered):
+    # quiet: HourCalculator's progress prints stay off the worker's stdout. Redirecting stdout
+    # instead would swap the process-wide sys.stdout under every other thread.
+    try:
+        return HourCalculator(text.replace('\\n', '\n'), quiet=True).calculate(ordered=ordered)
+    except SystemExit as e:
+        return RuntimeError(str(e.code))
+    except Exception as e:
+        return e
+
+
+def _run_chunk(engine, ordered, texts):
+    """Worker entry point: calculate one chunk of documents.
+    Returns (pid, seconds, outcomes); each outcome is a result tuple or the exception for that document."""
+    started = time.perf_counter()
+    if engine == 'v2':
+        outcomes = process_many(texts, ordered=ordered)
+    else:
+        outcomes = [_calculate_v1(text, ordered) for text in texts]
+    return _os.getpid(), time.perf_counter() - started, outcomes
+
+
+def _chunks(texts, chunk_size):
+    chunk = []
+    for text in texts:
+        chunk.append(text)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_batch(texts, engine='v2', ordered=True, workers=None, chunk_size=200, stats=None):
+    """Calculate documents across a process pool, yielding one outcome per text in input order.
+
+    Each outcome is the (results, breaks, metadata) tuple for that document, or the exception it
+    raised; one bad document never affects the rest of its chunk. A document that kills its worker
+    fails only its own chunk: the pool is replaced and the other chunks in flight are sent again.
+    texts is consumed lazily with at most two chunks per worker in flight. If stats (a dict) is given
+    it is filled with overall and per-worker throughput once the batch is done."""
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Expected one of: {', '.join(ENGINES)}.")
+    workers = workers or _os.cpu_count() or 1
+    per_worker = {}
+    documents = 0
+    started = time.perf_counter()
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(chunk):
+        nonlocal pool
+        try:
+            return pool.submit(_run_chunk, engine, ordered, chunk)
+        except BrokenExecutor:
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = ProcessPoolExecutor(max_workers=workers)
+            return pool.submit(_run_chunk, engine, ordered, chunk)
+
+    try:
+        pending = deque()
+        chunks = _chunks(texts, chunk_size)
+        exhausted = False
+        while pending or not exhausted:
+            while not exhausted and len(pending) < 2 * workers:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                else:
+                    pending.append((chunk, submit(chunk)))
+            if not pending:
+                break
+
+            chunk, future = pending.popleft()
+            try:
+                pid, seconds, outcomes = future.result()
+            except BrokenExecutor:
+                # A worker died and took every chunk in flight with it. Run this chunk again on its
+                # own to tell whether it is the one that kills workers, then resend the others.
+                pool.shutdown(wait=False, cancel_futures=True)
+                pool = ProcessPoolExecutor(max_workers=workers)
+                try:
+                    pid, seconds, outcomes = submit(chunk).result()
+                except Exception as e:
+                    pid, outcomes = None, [e] * len(chunk)
+                pending = deque((waiting, submit(waiting)) for waiting, _ in pending)
+            except Exception as e:  # the chunk could not be sent or its results not returned
+                pid, outcomes = None, [e] * len(chunk)
+            if pid is not None:
+                worker = per_worker.setdefault(pid, {'documents': 0, 'seconds': 0.0})
+                worker['documents'] += len(chunk)
+                worker['seconds'] += seconds
+            documents += len(chunk)
+            yield from outcomes
+    finally:
+        pool.shutdown(cancel_futures=True)
+
+    if stats is not None:
+        elapsed = time.perf_counter() - started
+        for worker in per_worker.values():
+            worker['per_second'] = worker['documents'] / worker['seconds'] if worker['seconds'] else 0.0
+        stats.update({
+            'documents': documents,
+            'seconds': elapsed,
+            'per_second': documents / elapsed if elapsed else 0.0,
+            'workers': per_worker,
+        })
+
+
+def run_batch(texts, engine='v2', ordered=True, workers=None, chunk_size=200):
+    """Calculate all documents across a process pool. Returns (outcomes, stats); see iter_batch."""
+    stats = {}
+    outcomes = list(iter_batch(texts, engine=engine, ordered=ordered, workers=workers, chunk_size=chunk_size,
+                               stats=stats))
+    return outcomes, stats
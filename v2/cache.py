@@ -0,0 +1,199 @@
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from calculator import _strip_inline_comments, log
+
+# Outcomes worth remembering: a sheet that failed to parse fails the same way next time.
+_CACHED_ERRORS = (ValueError, RuntimeError)
+
+_V2_DIR = os.path.dirname(os.path.abspath(__file__))
+_ENGINE_SOURCES = [
+    os.path.join(_V2_DIR, name)
+    for name in ('calculator.py', 'merge.py', 'rounding.py', 'tokenizer.py', 'formatting.py', 'methods.py', 'batch.py')
+] + [os.path.join(os.path.dirname(_V2_DIR), 'hour_calculator.py')]
+
+
+def _engine_version():
+    """Hash of the engine sources, so persisted results are invalidated by any deploy that changes them."""
+    digest = hashlib.sha256()
+    for path in _ENGINE_SOURCES:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+ENGINE_VERSION = _engine_version()
+
+
+def normalize_input(text):
+    """Reduce a timesheet to the lines that affect the result: stripped, comments and blank lines
+    removed, target lines moved to the end (the last one still wins)."""
+    lines = [l.strip() for l in text.replace('\\n', '\n').splitlines()]
+    entries = []
+    targets = []
+    for line in _strip_inline_comments(lines):
+        if not line:
+            continue
+        (targets if line[:2] == '\\=' else entries).append(line)
+    return '\n'.join(entries + targets)
+
+
+def cache_key(text, engine, ordered):
+    """Content address for one calculation: sha256 of the normalized input, engine and mode."""
+    normalized = normalize_input(text)
+    return hashlib.sha256(f"{ENGINE_VERSION}\0{engine}\0{int(bool(ordered))}\0{normalized}".encode()).hexdigest()
+
+
+def _dump_outcome(outcome):
+    if isinstance(outcome, BaseException):
+        return json.dumps({'error': type(outcome).__name__, 'message': str(outcome)})
+    return json.dumps({'result': outcome})
+
+
+def _load_outcome(payload):
+    data = json.loads(payload)
+    if 'error' in data:
+        error_type = RuntimeError if data['error'] == 'RuntimeError' else ValueError
+        return error_type(data['message'])
+    return tuple(data['result'])
+
+
+class SQLiteCache:
+    """Persistent cache tier in a local SQLite file, shared by every worker process on the host.
+
+    The database runs in WAL mode so readers never block the writer. Rows are pruned least recently
+    used first once there are more than maxsize. Any SQLite error is logged and treated as a miss;
+    the disk tier is an optimization and never fails a calculation."""
+
+    def __init__(self, path, maxsize=20000):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, outcome TEXT NOT NULL, '
+                         'accessed REAL NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return the stored outcome for key, or None."""
+        try:
+            conn = self._connect()
+            row = conn.execute('SELECT outcome FROM results WHERE key = ?', (key, )).fetchone()
+            if row is not None:
+                conn.execute('UPDATE results SET accessed = ? WHERE key = ?', (time.time(), key))
+        except sqlite3.Error as e:
+            log.debug('result cache read failed: %s', e)
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return _load_outcome(row[0])
+
+    def put(self, key, outcome):
+        try:
+            conn = self._connect()
+            conn.execute('INSERT OR REPLACE INTO results (key, outcome, accessed) VALUES (?, ?, ?)',
+                         (key, _dump_outcome(outcome), time.time()))
+            excess = conn.execute('SELECT COUNT(*) FROM results').fetchone()[0] - self.maxsize
+            if excess > 0:
+                conn.execute('DELETE FROM results WHERE key IN '
+                             '(SELECT key FROM results ORDER BY accessed LIMIT ?)', (excess, ))
+        except sqlite3.Error as e:
+            log.debug('result cache write failed: %s', e)
+
+    def __len__(self):
+        return self._connect().execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self), 'maxsize': self.maxsize}
+
+
+class ResultCache:
+    """Bounded, thread-safe LRU of calculation outcomes with a time-to-live.
+
+    Values are (results, breaks, metadata) tuples or the ValueError/RuntimeError the calculation
+    raised. Every hit returns a deep copy, so callers may pop '$total' or edit breaks freely.
+    An optional backing tier (SQLiteCache) is consulted on a miss and filled on every compute."""
+
+    def __init__(self, maxsize=512, ttl=3600, clock=time.monotonic, backing=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backing = backing
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, outcome)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._clock():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _store(self, key, outcome):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, outcome)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        """Return a copy of the cached outcome for key (a result tuple or an exception), or None on a miss."""
+        outcome = self._lookup(key)
+        if outcome is None and self.backing is not None:
+            outcome = self.backing.get(key)
+            if outcome is not None:
+                self._store(key, outcome)
+        if outcome is None:
+            return None
+        if isinstance(outcome, BaseException):
+            return copy.copy(outcome)
+        return copy.deepcopy(outcome)
+
+    def put(self, key, outcome):
+        """Remember a result tuple or a ValueError/RuntimeError; any other exception is ignored."""
+        if isinstance(outcome, BaseException):
+            if not isinstance(outcome, _CACHED_ERRORS):
+                return
+        else:
+            outcome = copy.deepcopy(outcome)  # the caller keeps (and may edit) the original
+        self._store(key, outcome)
+        if self.backing is not None:
+            self.backing.put(key, outcome)
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
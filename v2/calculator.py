@@ -1,18 +1,28 @@
-import logging
-import math
 import re
+from array import array
+from collections import namedtuple
 
-log = logging.getLogger('STC')
-log.setLevel(logging.DEBUG)
-_handler = logging.StreamHandler()
-_handler.setLevel(logging.DEBUG)
-_handler.setFormatter(logging.Formatter('%(asctime)s.%(msecs)03d %(message)s', datefmt='%H:%M:%S'))
-log.addHandler(_handler)
-log.propagate = False
+from formatting import break_from_triple, clock_12h, hhmm
+from merge import DoubleChargeError, sweep
+from rounding import round_to_tenths
+from profiling import current as _profile, hooks as _profile_hooks, profiled
+from tokenizer import TokenTable, scan_line
+from tracing import active as _tracing, log
+
+try:
+    import numpy as np
+except ImportError:  # optional: process_many falls back to the scalar sweep per document
+    np = None
+
+_HOUR = 3600
+_NOON = 12 * _HOUR
+_DAY = 24 * _HOUR
+_TENTH = _HOUR // 10
+_MAX_TYPED_HOURS = 48  # typed times past 24 (e.g. 25:30) continue into the next day
 
 
 def _parse_time(t_str):
-    """Parse a time string to decimal hours.
+    """Parse a time string to integer seconds of the day.
     Supports H, H.H, H:MM with optional a/am/p/pm suffix."""
     t_str = t_str.strip()
     am = False
@@ -37,44 +47,33 @@ def _parse_time(t_str):
         raw_minutes = float(parts[1])
         if raw_minutes < 0 or raw_minutes > 59:
             raise ValueError(f"Invalid minutes '{int(raw_minutes)}' in time '{t_str.strip()}'. Minutes must be 0–59.")
-        minutes = round(raw_minutes / 60, 3)
     else:
         hours = float(t_str)
-        minutes = 0
+        raw_minutes = 0
+    if hours > _MAX_TYPED_HOURS:
+        raise ValueError(f"Invalid hour in time '{t_str.strip()}'. Hours must be 0–{_MAX_TYPED_HOURS}.")
 
     if am and int(hours) == 12:
         hours = 0
     elif pm and int(hours) != 12:
         hours += 12
 
-    return hours + minutes
-
-
-def _frac_to_hhmm(frac):
-    """Decimal hours → 'H:MM' (24h). e.g. 13.5 → '13:30'"""
-    h = math.floor(frac)
-    m = round((frac % 1) * 60)
-    if m == 60:
-        h += 1
-        m = 0
-    return f"{h}:{m:02d}"
-
-
-def _frac_to_12h(frac):
-    """Decimal hours → 'H:MMam/pm'. e.g. 13.567 → '1:34pm'"""
-    h = math.floor(frac)
-    m = round((frac % 1) * 60)
-    if m == 60:
-        h += 1
-        m = 0
-    if h > 12:
-        return f"{h % 12}:{m:02d}pm"
-    elif h == 12:
-        return f"12:{m:02d}pm"
-    elif h == 0:
-        return f"12:{m:02d}am"
-    else:
-        return f"{h}:{m:02d}am"
+    return round(hours * _HOUR + raw_minutes * 60)
+
+
+# Parsed start/end tokens, shared by every calculation in the process.
+_time_tokens = TokenTable(_parse_time)
+
+
+def _secs_to_hhmm(secs):
+    """Seconds → 'H:MM' (24h) to the nearest minute. e.g. 48600 → '13:30'
+    Times on the next day keep counting hours, e.g. 91800 → '25:30'."""
+    return hhmm(round(secs / 60))
+
+
+def _secs_to_12h(secs):
+    """Seconds → 'H:MMam/pm' to the nearest minute. e.g. 48840 → '1:34pm', 91800 → '1:30am (+1 day)'"""
+    return clock_12h(round(secs / 60))
 
 
 def _strip_inline_comments(lines):
@@ -111,270 +110,494 @@ def _parse_encoding(lines):
 
 
 def _format_ranges(ranges_list):
-    """Parse ['start-end', ...] into [[start_dec, end_dec], ...]."""
+    """Parse ['start-end', ...] into a flat [start, end, start, end, ...] list of seconds."""
     result = []
+    parse = _time_tokens.lookup
     for rng in ranges_list:
         parts = rng.split('-')
         if len(parts) != 2 or not parts[0].strip() or not parts[1].strip():
             raise ValueError(f"Invalid time range '{rng.strip()}'. Expected format: start-end (e.g. 8-5, 8:30-12).")
-        start = _parse_time(parts[0])
-        end = _parse_time(parts[1])
-        result.append([start, end])
+        result.append(parse(parts[0]))
+        result.append(parse(parts[1]))
     return result
 
 
-def _split_line(line):
-    """Split a line into (id, ranges_str) by finding the first digit-dash pattern.
-    Returns (None, None) if no time range is found."""
-    match = re.search(r'\s+(?=\d[\d.:]*(am?|pm?)?-)', line)
-    if not match:
-        return None, None
-    return line[:match.start()], line[match.end():]
-
-
-def _explicit_start_ids(lines):
-    """Return the set of IDs whose first start time has an explicit AM/PM suffix.
-    These IDs are already unambiguous and should not have +12 inferred."""
-    explicit = set()
-    for line in lines:
-        if not line:
-            continue
-        str_id, ranges_str = _split_line(line)
-        if str_id is None:
-            continue
-        first_time = ranges_str.split(',')[0].strip().split('-')[0].strip()
-        if re.search(r'\d(am|pm|a|p)$', first_time, re.IGNORECASE) or re.match(r'^0\d', first_time):
-            explicit.add(str_id)
-    return explicit
-
-
 def _convert_ordered_starts(hours_dict, explicit_ids=None):
-    """If any line's start < first line's start, mark afternoon and add 12 to its first interval.
-    IDs in explicit_ids already have unambiguous AM/PM — skip the +12 offset for those."""
+    """If any line's start < first line's start, mark afternoon and add 12h to its first interval.
+    IDs in explicit_ids already have unambiguous AM/PM — skip the +12 offset for those, and for
+    starts already at or after 12:00."""
     explicit_ids = explicit_ids or set()
-    log.debug('  [ordered] converting ordered starts  (explicit AM/PM IDs skipped: %s)',
-              sorted(explicit_ids) if explicit_ids else 'none')
+    trace = _tracing()
+    if trace:
+        log.debug('  [ordered] converting ordered starts  (explicit AM/PM IDs skipped: %s)',
+                  sorted(explicit_ids) if explicit_ids else 'none')
     afternoon = False
     last_start = None
     for code, data in hours_dict.items():
         if last_start is None:
-            last_start = data[0][0]
-        if last_start > data[0][0]:
+            last_start = data[0]
+        if last_start > data[0]:
             afternoon = True
-        if afternoon and code not in explicit_ids:
-            log.debug('  [ordered]   %s: start %.3f → %.3f (+12 inferred PM)', code, data[0][0], data[0][0] + 12)
-            data[0] = [data[0][0] + 12, data[0][1]]
-
-
-def _convert_mil_times(hours_dict):
-    """Convert each ID's intervals to monotonic 24h times in place."""
+        if afternoon and code not in explicit_ids and data[0] < _NOON:
+            if trace:
+                log.debug('  [ordered]   %s: start %s → %s (+12 inferred PM)', code, _secs_to_hhmm(data[0]),
+                          _secs_to_hhmm(data[0] + _NOON))
+            data[0] += _NOON
+
+
+def _explicit_time(token):
+    """True when a time token pins its clock time: an AM/PM suffix, a leading zero, or an hour of 0 or
+    past 12 (e.g. 1a, 02:29, 0:30, 23). Only these can move an interval past midnight."""
+    token = token.strip()
+    if token[-1:] in ('a', 'p', 'm'):
+        return True
+    hour = token.split(':')[0].split('.')[0]
+    return hour[:1] == '0' or (hour.isdecimal() and int(hour) > 12)
+
+
+def _explicit_range(texts, i):
+    """Whether the range holding time i (of an ID's flat list) has a start or end that pins its clock time."""
+    return texts is not None and any(_explicit_time(t) for t in texts[i // 2].split('-'))
+
+
+def _next_day_shift(code, start, texts, anchor, latest):
+    """Seconds to move an already converted ID starting at start by so it follows the IDs before it.
+
+    anchor is the latest first start of those IDs and latest their latest end (both None for the first
+    ID). Lines are grouped by ID, so an ID may well start before earlier IDs end; one starting more than
+    12h before the anchor continues on the next day instead (e.g. a 10p-12a, b 12a-2a), if its first
+    range pins its clock time. Without that the day is ambiguous once the sheet has run past midnight
+    and ValueError is raised; before midnight the ID stays where it is."""
+    if anchor is None or start >= anchor - _NOON:
+        return 0
+    if _explicit_range(texts, 0):
+        return -((start - anchor + _NOON) // _DAY) * _DAY
+    if latest > _DAY:
+        raise ValueError(f"Line for '{code}' starts at {_secs_to_hhmm(start)}, long before the line above it "
+                         f"({_secs_to_hhmm(anchor)}) on a sheet that runs past midnight, so it may be on the next "
+                         f"day. Add am/pm or use 24 hour times to say which.")
+    return 0
+
+
+def _convert_mil_times(hours_dict, range_texts=None):
+    """Convert each ID's flat [start, end, ...] intervals to monotonic times in place.
+
+    Times are absolute seconds from midnight of the sheet's first day, so a shift can run past 24:00:
+    when an interval still ends before it starts, or starts before the previous interval ends, it is
+    moved forward in 12h steps (e.g. 10p-2a → 22:00–26:00), and an ID starting long before the IDs
+    above it moves to the next day (see _next_day_shift). range_texts ({id: ['start-end', ...]}, as
+    _build_hours collects them) says which ranges pin their clock time: only those may cross midnight,
+    or ones continuing an ID already past it. Any other crossing is ambiguous and raises ValueError."""
+    anchor = latest = None
     for code, data in hours_dict.items():
-        mil_data = []
+        texts = range_texts.get(code) if range_texts is not None else None
         afternoon = False
-        for time in data:
-            if mil_data and time[0] < mil_data[-1][1]:
+        for i in range(0, len(data), 2):
+            start, end = data[i], data[i + 1]
+            if i and start < data[i - 1]:
                 afternoon = True
-            elif time[1] < time[0]:
+            elif end < start:
                 afternoon = True
 
-            if not afternoon:
-                new_time = time
-            else:
-                if time[1] < time[0] and time[1] <= 12:
-                    new_time = [time[0], time[1] + 12]
+            if afternoon:
+                if end < start and end <= _NOON:
+                    end += _NOON
                 else:
-                    new_time = [
-                        time[0] + 12 if time[0] < 12 else time[0],
-                        time[1] + 12 if time[1] <= 12 else time[1],
-                    ]
-
-            if new_time[0] > 24 or new_time[1] > 24:
-                raise ValueError(f"Interval for '{code}' exceeds 24 hours after conversion. "
-                                 f"Hours can only be calculated within a single day.")
-            if new_time[1] < new_time[0]:
-                raise ValueError(f"Interval for '{code}' spans past midnight after conversion "
-                                 f"({_frac_to_hhmm(new_time[0])}–{_frac_to_hhmm(new_time[1])} next day). "
-                                 f"Hours can only be calculated within a single day.")
-            if mil_data and new_time[0] < mil_data[-1][1]:
-                raise ValueError(f"Interval for '{code}' overlaps a previous interval after conversion "
-                                 f"({_frac_to_hhmm(new_time[0])}–{_frac_to_hhmm(new_time[1])} starts before "
-                                 f"{_frac_to_hhmm(mil_data[-1][0])}–{_frac_to_hhmm(mil_data[-1][1])} ends). "
-                                 f"Time entries may cross midnight — hours can only be calculated within a single day.")
-            mil_data.append(new_time)
-        hours_dict[code] = mil_data
-
-
-def _next_charge(hours_dict):
-    """Return the ID whose next interval starts earliest (ties: last one wins)."""
-    nxt = None
-    nxt_start = None
-    for code, data in hours_dict.items():
-        start = data[0][0]
-        if not nxt:
-            nxt = code
-            nxt_start = start
-        elif start <= nxt_start:
-            nxt = code
-            nxt_start = start
-    return nxt
-
-
-def _format_break_display(b):
-    """Format a break triple ['H:MM','H:MM','dur'] for HTML display."""
-    start_str, end_str, dur_str = b
-    sh, sm = map(int, start_str.split(':'))
-    eh, em = map(int, end_str.split(':'))
-    dur = float(dur_str)
-    dur_min = round(dur * 60)
-
-    def to_12h(h, m):
-        period = 'AM' if h < 12 else 'PM'
-        h12 = h % 12 or 12
-        return f"{h12}:{m:02d} {period}"
-
-    return f"{to_12h(sh, sm)} \u2013 {to_12h(eh, em)}  ({dur_min} min / {dur:.2f} hrs)"
-
-
-def process_input(text, ordered=False):
-    """Parse time entries and return (results_dict, breaks_list, metadata_dict).
-
-    results_dict : {'id': hours, ..., '$total': total}
-    breaks_list  : [['H:MM', 'H:MM', 'dur_str'], ...]   (24h start/end, decimal dur)
-    metadata_dict: {'target_time': 'H:MMam/pm' or None}
-    """
+                    if start < _NOON:
+                        start += _NOON
+                    if end <= _NOON:
+                        end += _NOON
+
+            # past midnight: continue on the extended timeline
+            if i and start < data[i - 1]:
+                if data[i - 1] < _DAY and not _explicit_range(texts, i):
+                    raise ValueError(f"Interval for '{code}' overlaps a previous interval after conversion "
+                                     f"({_secs_to_hhmm(start)}–{_secs_to_hhmm(end)} starts before "
+                                     f"{_secs_to_hhmm(data[i - 2])}–{_secs_to_hhmm(data[i - 1])} ends). "
+                                     f"Add am/pm or use 24 hour times if it continues past midnight.")
+                shift = -((start - data[i - 1]) // _NOON) * _NOON
+                start += shift
+                end += shift
+            if end < start:
+                if not _explicit_range(texts, i):
+                    raise ValueError(f"Interval for '{code}' spans past midnight after conversion "
+                                     f"({_secs_to_hhmm(start)}–{_secs_to_hhmm(end)} next day). "
+                                     f"Add am/pm or use 24 hour times to continue past midnight.")
+                end += -((end - start) // _NOON) * _NOON
+
+            if end - start > _DAY:
+                raise ValueError(f"Interval for '{code}' exceeds 24 hours after conversion "
+                                 f"({_secs_to_hhmm(start)}–{_secs_to_hhmm(end)}).")
+            data[i], data[i + 1] = start, end
+
+        shift = _next_day_shift(code, data[0], texts, anchor, latest)
+        if shift:
+            for i in range(len(data)):
+                data[i] += shift
+        anchor = data[0] if anchor is None else max(anchor, data[0])
+        latest = data[-1] if latest is None else max(latest, data[-1])
+
+
+# Immutable result of parse_input, shared by every calculation mode:
+#   entries      : ((id, (start, end, start, end, ...)), ...)   one per time line, in input order, in seconds
+#   target_hours : target from the last \= line, 0 if none
+#   detected_ids : (id, ...)   IDs containing spaces, in first-seen order
+#   explicit_ids : frozenset of IDs whose first start on a line has an explicit AM/PM suffix or leading zero
+#   range_texts  : (('start-end', ...), ...)   each entry's ranges as typed, for _convert_mil_times
+ParsedInput = namedtuple('ParsedInput', ['entries', 'target_hours', 'detected_ids', 'explicit_ids', 'range_texts'])
+
+
+def parse_input(text):
+    """Tokenize and parse time entries once into a ParsedInput.
+    Raises ValueError for lines or ranges that cannot be parsed, independent of calculation mode."""
+    prof = _profile()
     text = text.replace('\\n', '\n')
     lines = [l.strip() for l in text.strip().splitlines() if l.strip()]
 
     lines = _strip_inline_comments(lines)
+    if prof:
+        prof.lap('strip_comments')
     lines, target_hours = _parse_encoding(lines)
+    if prof:
+        prof.lap('parse_encoding')
 
-    # Build hours dict: id → [[start_dec, end_dec], ...]
-    hours = {}
-    charges = {}
+    entries = []
     detected_ids = []
+    explicit_ids = set()
+    range_texts = []
     for line in lines:
         if not line:
             continue
         line = line.rstrip(',')
-        str_id, ranges_str = _split_line(line)
+        str_id, ranges_list, explicit = scan_line(line)
+        if prof:
+            prof.lap('scan_line')
         if str_id is None:
             raise ValueError(f"Invalid line (missing time ranges): '{line}'")
         if ' ' in str_id and str_id not in detected_ids:
             detected_ids.append(str_id)
-        ranges_list = [r.strip() for r in ranges_str.split(',')]
+        if explicit:
+            explicit_ids.add(str_id)
+        if prof:
+            prof.mark()
         ranges = _format_ranges(ranges_list)
+        entries.append((str_id, tuple(ranges)))
+        range_texts.append(tuple(ranges_list))
+        if prof:
+            prof.lap('format_ranges')
+
+    return ParsedInput(tuple(entries), target_hours, tuple(detected_ids), frozenset(explicit_ids),
+                       tuple(range_texts))
+
+
+def process_input(text, ordered=False, profile=False, numeric_breaks=False):
+    """Parse time entries and return (results_dict, breaks_list, metadata_dict).
+
+    results_dict : {'id': hours, ..., '$total': total}
+    breaks_list  : [['H:MM', 'H:MM', 'dur_str'], ...]   (24h start/end, decimal dur)
+                   with numeric_breaks=True: [(start_minute, end_minute, hours), ...] for formatting at the edge
+    metadata_dict: {'target_time': 'H:MMam/pm' or None}
+
+    With profile=True metadata_dict also gets 'profile': per-stage timings (see profiling.StageProfile);
+    profile='allocations' adds allocation counts. Registered profiling hooks receive every report.
+    """
+    hooks = _profile_hooks()
+    if not profile and not hooks:
+        return evaluate(parse_input(text), ordered=ordered, numeric_breaks=numeric_breaks)
+
+    error = None
+    with profiled(allocations=profile == 'allocations') as prof:
+        try:
+            results, breaks, metadata = evaluate(parse_input(text), ordered=ordered, numeric_breaks=numeric_breaks)
+        except (ValueError, RuntimeError) as e:
+            error = e
+    report = prof.report()
+    for hook in hooks:
+        hook(dict(report, mode='ordered' if ordered else 'unordered', error=str(error) if error else None))
+    if error is not None:
+        raise error
+    if profile:
+        metadata['profile'] = report
+    return results, breaks, metadata
+
+
+def evaluate(parsed, ordered=False, numeric_breaks=False):
+    """Calculate a ParsedInput in ordered or unordered mode without re-parsing.
+    Returns the same (results_dict, breaks_list, metadata_dict) as process_input."""
+    mode = 'ordered' if ordered else 'unordered'
+    hours = _build_hours(parsed, ordered)
+
+    # Walk all intervals in chronological order, charge durations, record breaks
+    prof = _profile()
+    if prof:
+        prof.mark()
+    try:
+        charge_secs, spans = sweep(hours)
+    except DoubleChargeError as e:
+        raise _double_charge_error(e.start, e.last_time) from None
+    if prof:
+        prof.lap('merge')
+
+    return _finish(parsed, mode, hours, charge_secs, spans, numeric_breaks)
+
+
+def _build_hours(parsed, ordered):
+    """Build the converted hours dict: id → array('l', [start, end, start, end, ...]) in seconds of the day."""
+    hours = {}
+    texts = {}
+    for (str_id, ranges), range_texts in zip(parsed.entries, parsed.range_texts):
         if str_id in hours:
-            hours[str_id] += ranges  # combine duplicate IDs
+            hours[str_id].extend(ranges)  # combine duplicate IDs
+            texts[str_id].extend(range_texts)
         else:
-            hours[str_id] = ranges
-            charges[str_id] = 0
+            hours[str_id] = array('l', ranges)
+            texts[str_id] = list(range_texts)
 
-    mode = 'ordered' if ordered else 'unordered'
-    log.debug('  [%s] starting calculation', mode)
+    if _tracing():
+        log.debug('  [%s] starting calculation', 'ordered' if ordered else 'unordered')
 
+    prof = _profile()
+    if prof:
+        prof.lap('build_hours')
     if ordered:
-        _convert_ordered_starts(hours, explicit_ids=_explicit_start_ids(lines))
-    _convert_mil_times(hours)
+        _convert_ordered_starts(hours, explicit_ids=parsed.explicit_ids)
+        if prof:
+            prof.lap('ordered_starts')
+    _convert_mil_times(hours, texts)
+    if prof:
+        prof.lap('mil_times')
+    return hours
 
-    # Snapshot the latest end time across all IDs (used for target time calc)
-    last_time_snapshot = -1
-    for code, data in hours.items():
-        end_time = data[-1][1]
-        if end_time > last_time_snapshot:
-            last_time_snapshot = end_time
 
-    # Walk all intervals in chronological order, charge durations, record breaks
-    hours_copy = {code: [list(t) for t in data] for code, data in hours.items()}
-    breaks = []
-    last_time = None
-
-    while hours_copy:
-        nxt_chg = _next_charge(hours_copy)
-        time = hours_copy[nxt_chg][0]
-        duration = round(abs(time[1] - time[0]), 3)
-
-        if last_time and time[0] < last_time:
-            raise RuntimeError(f'Double charging or invalid range: {_frac_to_hhmm(time[0])}-{_frac_to_hhmm(last_time)}. '
-                               f'Ensure lines starting with a PM time are written in 24 hour format.')
-
-        if last_time and last_time != time[0]:
-            breaks.append([
-                _frac_to_hhmm(round(last_time, 3)),
-                _frac_to_hhmm(round(time[0], 3)),
-                str(round(abs(time[0] - last_time), 2)),
-            ])
-
-        if len(hours_copy[nxt_chg]) > 1:
-            hours_copy[nxt_chg] = hours_copy[nxt_chg][1:]
-        else:
-            del hours_copy[nxt_chg]
+def _double_charge_error(start, last_time):
+    return RuntimeError(f'Double charging or invalid range: {_secs_to_hhmm(start)}-{_secs_to_hhmm(last_time)}. '
+                        f'Ensure lines starting with a PM time are written in 24 hour format.')
 
-        last_time = time[1]
-        charges[nxt_chg] += duration
 
-    log.debug('  [%s] breaks: %s', mode, breaks if breaks else 'none')
+def _finish(parsed, mode, hours, charge_secs, spans, numeric_breaks=False):
+    """Format swept charges and break spans into (results_dict, breaks_list, metadata_dict)."""
+    prof = _profile()
+    if prof:
+        prof.mark()
+    breaks = [(round(brk_start / 60), round(brk_end / 60), (brk_end - brk_start) / _HOUR) for brk_start, brk_end in spans]
+    if not numeric_breaks:
+        breaks = [[hhmm(start), hhmm(end), str(round(dur, 2))] for start, end, dur in breaks]
 
-    # Compute exact vs rounded totals for rounding adjustment
-    total_exact = 0
-    total_round = 0
-    diffs = []
-    for chg, duration in charges.items():
-        total_exact += duration
-        total_round += round(duration, 1)
-        diff = round(duration - round(duration, 1), 4)
-        diffs.append([chg, diff])
+    trace = _tracing()
+    if trace:
+        log.debug('  [%s] breaks: %s', mode, breaks if breaks else 'none')
+
+    # Snapshot the latest end time across all IDs (used for target time calc)
+    last_time_snapshot = max(data[-1] for data in hours.values()) if hours else -1
+    total_secs = sum(charge_secs.values())
 
     # Target time: how much longer until target_hours is met
     target_time = None
     target_achieved_at = None
-    if target_hours:
-        unfulfilled = target_hours - total_exact - 0.05 + 0.01
+    if parsed.target_hours:
+        # target is met once the total rounds up to it (-3 min); +36s since round() is half to even
+        unfulfilled = round(parsed.target_hours * _HOUR) - total_secs - 180 + 36
         if unfulfilled > 0:
-            target_time = _frac_to_12h(last_time_snapshot + unfulfilled)
+            target_time = _secs_to_12h(last_time_snapshot + unfulfilled)
         else:
-            target_achieved_at = _frac_to_12h(last_time_snapshot + unfulfilled)
-
-    # Distribute rounding error so per-ID values stay consistent with global total
-    diffs = sorted(diffs, key=lambda d: charges[d[0]], reverse=True)
-    total_diff = round(round(total_exact, 1) - total_round, 4)
-
-    while abs(total_diff) >= 0.1:
-        diffs = sorted(diffs, key=lambda d: abs(d[1]), reverse=True)
-        adjusted = False
-        for diff in diffs:
-            if total_diff > 0:
-                if diff[1] > 0:
-                    charges[diff[0]] = round(charges[diff[0]] + 0.05, 2)
-                    diff[1] = 0
-                    total_diff -= 0.1
-                    adjusted = True
-                    break
-                else:
-                    continue
-            else:
-                if diff[1] < 0:
-                    charges[diff[0]] = round(charges[diff[0]] - 0.05, 2)
-                    diff[1] = 0
-                    total_diff += 0.1
-                    adjusted = True
-                    break
-                else:
-                    continue
-        if not adjusted:
-            break
+            target_achieved_at = _secs_to_12h(last_time_snapshot + unfulfilled)
+
+    if prof:
+        prof.lap('format')
 
-    results = {}
-    total = 0
-    for chg, duration in charges.items():
-        results[chg] = round(duration, 1)
-        total += round(duration, 1)
-    results['$total'] = round(total, 1)
+    # Output boundary: round seconds to tenths, distributing rounding error so per-ID values add up to the total
+    tenths, total_tenths = round_to_tenths(charge_secs, _TENTH)
+    results = {chg: t / 10 for chg, t in tenths.items()}
+    results['$total'] = total_tenths / 10
+    if prof:
+        prof.lap('rounding')
 
-    log.debug('  [%s] exact, rounded, final total:   %.2f, %.2f, %.2f', mode, total_exact, total_round, total)
-    log.debug('  [%s] per-ID results: %s', mode, {k: v for k, v in results.items() if k != '$total'})
+    if trace:
+        log.debug('  [%s] exact, final total:   %.2f, %.1f', mode, total_secs / _HOUR, total_tenths / 10)
+        log.debug('  [%s] per-ID results: %s', mode, {k: v for k, v in results.items() if k != '$total'})
 
     return results, breaks, {
         'target_time': target_time,
         'target_achieved_at': target_achieved_at,
-        'detected_ids': detected_ids
+        'detected_ids': list(parsed.detected_ids)
     }
+
+
+# Date header lines: optional weekday, then 2024-05-06, 5/6, 5/6/24 or 5/6/2024, optional trailing colon
+_DATE_HEADER = re.compile(r'(?:[A-Za-z]{3,9},?\s)?\s*(\d{4}-\d{1,2}-\d{1,2}|\d{1,2}/\d{1,2}(?:/\d{2,4})?)\s*:?')
+
+
+def _date_key(date):
+    """(year, month, day) for a header date; year is None when the header has none, and two-digit years are 20xx."""
+    if '-' in date:
+        year, month, day = (int(part) for part in date.split('-'))
+        return year, month, day
+    month, day, *year = (int(part) for part in date.split('/'))
+    year = year[0] + 2000 if year and year[0] < 100 else (year[0] if year else None)
+    return year, month, day
+
+
+def split_days(text):
+    """Split text into [(date, section_text), ...] on date header lines.
+
+    Lines before the first header may only hold comments and \\= targets; they are applied to every
+    day (a day's own target line wins). Headers for the same date are combined under the first one's
+    label (e.g. 'Mon 5/6', '05/06' and '5/6'; '5/6/24' and '2024-05-06', but not '5/6' and '2024-05-06',
+    since a date without a year may be another year's). Text without any header is a single section
+    with date None."""
+    text = text.replace('\\n', '\n')
+    preamble = []
+    sections = {}  # (year, month, day) → (label, lines)
+    current = None
+    for line in text.splitlines():
+        stripped = line.strip()
+        header = _DATE_HEADER.fullmatch(stripped)
+        if header:
+            current = sections.setdefault(_date_key(header.group(1)), (stripped.rstrip(':').strip(), []))[1]
+        elif current is None:
+            preamble.append(line)
+        else:
+            current.append(line)
+
+    if not sections:
+        return [(None, text)]
+    for line in _strip_inline_comments([l.strip() for l in preamble]):
+        if line and line[:2] != '\\=':
+            raise ValueError(f"Time entry before the first date header: '{line}'")
+    return [(label, '\n'.join(preamble + lines)) for label, lines in sections.values()]
+
+
+def process_days(text, ordered=False, workers=None, numeric_breaks=False):
+    """Calculate a date-sectioned sheet one day at a time and roll the days up.
+
+    Returns (days, totals):
+        days   : [{'date': date, 'results': {...}, 'breaks': [...], 'metadata': {...}}
+                  or {'date': date, 'error': 'message'}, ...]   in input order
+        totals : {'id': hours, ..., '$total': total} over the days that calculated, summed from each
+                 day's rounded values so the period matches the daily sheets
+    AM/PM inference runs inside each day; breaks are as process_input gives them for numeric_breaks.
+    With workers > 1 the days are calculated on a process pool."""
+    sections = split_days(text)
+    texts = [section for _, section in sections]
+    if workers and workers > 1 and len(texts) > 1:
+        from batch import run_batch
+        outcomes, _ = run_batch(texts, engine='v2', ordered=ordered, workers=workers, chunk_size=1)
+        if numeric_breaks:
+            outcomes = [outcome if isinstance(outcome, Exception) else
+                        (outcome[0], [break_from_triple(b) for b in outcome[1]], outcome[2]) for outcome in outcomes]
+    else:
+        outcomes = process_many(texts, ordered=ordered, numeric_breaks=numeric_breaks)
+
+    days = []
+    id_tenths = {}
+    total_tenths = 0
+    for (date, _), outcome in zip(sections, outcomes):
+        if isinstance(outcome, Exception):
+            days.append({'date': date, 'error': str(outcome)})
+            continue
+        results, breaks, metadata = outcome
+        days.append({'date': date, 'results': results, 'breaks': breaks, 'metadata': metadata})
+        for code, hours in results.items():
+            if code != '$total':
+                id_tenths[code] = id_tenths.get(code, 0) + round(hours * 10)
+        total_tenths += round(results['$total'] * 10)
+
+    totals = {code: tenths / 10 for code, tenths in id_tenths.items()}
+    totals['$total'] = total_tenths / 10
+    return days, totals
+
+
+def process_many(texts, ordered=False, numeric_breaks=False):
+    """Calculate many documents in one call.
+
+    Returns a list with one entry per text, in order: the (results_dict, breaks_list, metadata_dict)
+    process_input would return for it, or the ValueError/RuntimeError it would raise.
+    With NumPy installed the intervals of every document are swept together on flat arrays;
+    otherwise each document is swept on its own."""
+    mode = 'ordered' if ordered else 'unordered'
+    outcomes = []
+    docs = []  # (index into outcomes, parsed, hours)
+    for text in texts:
+        try:
+            parsed = parse_input(text)
+            docs.append((len(outcomes), parsed, _build_hours(parsed, ordered)))
+            outcomes.append(None)
+        except ValueError as e:
+            outcomes.append(e)
+
+    if np is not None:
+        swept = _sweep_many([hours for _, _, hours in docs])
+    else:
+        swept = []
+        for _, _, hours in docs:
+            try:
+                swept.append(sweep(hours))
+            except DoubleChargeError as e:
+                swept.append(_double_charge_error(e.start, e.last_time))
+
+    for (i, parsed, hours), result in zip(docs, swept):
+        if isinstance(result, Exception):
+            outcomes[i] = result
+        else:
+            outcomes[i] = _finish(parsed, mode, hours, *result, numeric_breaks)
+    return outcomes
+
+
+def _sweep_many(hours_list):
+    """Vectorized sweep over many converted hours dicts.
+
+    Every interval of every document is packed into flat arrays (doc, ID, start, end) and sorted once
+    by (doc, start, later ID first, position in ID), which is the order the heap merge walks each
+    document in since each ID's starts never decrease after conversion. Durations, per-ID sums, breaks
+    and double charges then come from whole-array operations.
+    Returns [(charges, breaks) or RuntimeError, ...] like sweep() per document."""
+    codes = []
+    doc_of_id = []
+    order_of_id = []
+    counts = []
+    flat = array('l')
+    for d, hours in enumerate(hours_list):
+        for order, (code, data) in enumerate(hours.items()):
+            codes.append(code)
+            doc_of_id.append(d)
+            order_of_id.append(order)
+            counts.append(len(data) // 2)
+            flat.extend(data)
+
+    counts = np.array(counts, dtype=np.int64)
+    pairs = np.frombuffer(flat, dtype=np.dtype(flat.typecode)).astype(np.int64).reshape(-1, 2)
+    starts, ends = pairs[:, 0], pairs[:, 1]
+    ids = np.repeat(np.arange(len(codes)), counts)
+    docs = np.repeat(np.array(doc_of_id, dtype=np.int64), counts)
+    neg_order = -np.repeat(np.array(order_of_id, dtype=np.int64), counts)
+    positions = np.arange(len(starts)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    # per-ID charged seconds (float64 sums of whole seconds stay exact far beyond any timesheet)
+    sums = np.bincount(ids, weights=np.abs(ends - starts), minlength=len(codes)).astype(np.int64)
+
+    # walk order, then compare each interval with the one walked just before it in the same document
+    walk = np.lexsort((positions, neg_order, starts, docs))
+    w_starts, w_ends, w_docs = starts[walk], ends[walk], docs[walk]
+    prev_end = w_ends[:-1]
+    nxt_start = w_starts[1:]
+    checked = (w_docs[1:] == w_docs[:-1]) & (prev_end != 0)
+    overlap = checked & (nxt_start < prev_end)
+    gap = checked & (nxt_start != prev_end)
+
+    errors = {}
+    for k in np.flatnonzero(overlap).tolist():
+        d = int(w_docs[k + 1])
+        if d not in errors:
+            errors[d] = _double_charge_error(int(nxt_start[k]), int(prev_end[k]))
+
+    breaks = [[] for _ in hours_list]
+    gap_idx = np.flatnonzero(gap)
+    for d, brk_start, brk_end in zip(w_docs[gap_idx + 1].tolist(), prev_end[gap_idx].tolist(),
+                                     nxt_start[gap_idx].tolist()):
+        breaks[d].append((brk_start, brk_end))
+
+    charges = [{} for _ in hours_list]
+    for d, code, secs in zip(doc_of_id, codes, sums.tolist()):
+        charges[d][code] = secs
+
+    return [errors[d] if d in errors else (charges[d], breaks[d]) for d in range(len(hours_list))]
@@ -0,0 +1,76 @@
+DAY = 24 * 60  # minutes
+
+
+def _table(render):
+    """Precompute render(hour, minute) for every minute of the day."""
+    return tuple(render(*divmod(minute, 60)) for minute in range(DAY))
+
+
+def _twelve(hour):
+    return hour % 12 or 12
+
+
+# Every spelling a time is shown in, indexed by minute of the day.
+HHMM = _table(lambda h, m: f'{h}:{m:02d}')  # 13:30
+CLOCK_12H = _table(lambda h, m: f"{_twelve(h)}:{m:02d}{'am' if h < 12 else 'pm'}")  # 1:30pm, 12:15am
+DISPLAY_12H = _table(lambda h, m: f"{_twelve(h)}:{m:02d} {'AM' if h < 12 else 'PM'}")  # 1:30 PM
+# v1 spellings: hours before 12 are written as is (0:30am) and only hours after 12 wrap
+V1_CLOCK_12H = _table(lambda h, m: f"{h % 12 if h > 12 else h}:{m:02d}{'am' if h < 12 else 'pm'}")  # 0:30am
+V1_SHORT_12H = _table(lambda h, m: f"{h - 12 if h > 12 else h}:{m:02d}{'a' if h < 12 else 'p'}")  # 0:30a, 1:30p
+MINUTES = {text: minute for minute, text in enumerate(HHMM)}
+
+
+def day_suffix(day):
+    if not day:
+        return ''
+    return f" (+{day} day{'s' if day > 1 else ''})"
+
+
+def hhmm(minute):
+    """Minute → 'H:MM' (24h). Times on the next day keep counting hours, e.g. 1530 → '25:30'."""
+    if 0 <= minute < DAY:
+        return HHMM[minute]
+    h, m = divmod(minute, 60)
+    return f'{h}:{m:02d}'
+
+
+def clock_12h(minute):
+    """Minute → 'H:MMam/pm', e.g. 814 → '1:34pm', 1530 → '1:30am (+1 day)'."""
+    day, minute = divmod(minute, DAY)
+    return CLOCK_12H[minute] + day_suffix(day)
+
+
+def display_12h(minute):
+    """Minute → 'H:MM AM/PM' as the page shows break times."""
+    day, minute = divmod(minute, DAY)
+    return DISPLAY_12H[minute] + day_suffix(day)
+
+
+def minutes(text):
+    """'H:MM' → minute, the inverse of hhmm()."""
+    minute = MINUTES.get(text)
+    if minute is None:
+        h, m = text.split(':')
+        minute = int(h) * 60 + int(m)
+    return minute
+
+
+def break_from_triple(b):
+    """A ['H:MM', 'H:MM', 'hours'] break triple (v1, or process_input's default) → (start, end, hours)."""
+    start, end, hours = b
+    return minutes(start), minutes(end), float(hours)
+
+
+def break_display(start, end, hours):
+    """A numeric break (start and end minute, exact hours) as one line of the page's break list."""
+    return f"{display_12h(start)} \u2013 {display_12h(end)}  ({round(hours * 60)} min / {hours:.2f} hrs)"
+
+
+def v1_short_12h(text):
+    """'H:MM' → the v1 page's spelling: 9:30a, 12:15p, 1:30p."""
+    minute = MINUTES.get(text)
+    if minute is not None:
+        return V1_SHORT_12H[minute]
+    hour, _, rest = text.partition(':')
+    hour = int(hour)
+    return f"{hour - 12 if hour > 12 else hour}:{rest}{'a' if hour < 12 else 'p'}"
@@ -0,0 +1,292 @@
+import argparse
+import json
+import os as _os
+import random
+import re
+import sys as _sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Make the project root and v2 dir importable in the parent and in every worker process.
+_ROOT = _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__)))
+if _ROOT not in _sys.path:
+    _sys.path.insert(0, _ROOT)
+_V2_DIR = _os.path.dirname(_os.path.abspath(__file__))
+if _V2_DIR not in _sys.path:
+    _sys.path.insert(0, _V2_DIR)
+from batch import _calculate_v1
+from calculator import process_input, process_many
+from session import CalculationSession
+
+FIXTURES = _os.path.join(_V2_DIR, 'tests', 'fuzz_fixtures.json')
+
+
+def _each(calculate):
+    def run(texts, ordered):
+        outcomes = []
+        for text in texts:
+            try:
+                outcomes.append(calculate(text, ordered))
+            except (ValueError, RuntimeError) as e:
+                outcomes.append(e)
+        return outcomes
+
+    return run
+
+
+def _session(text, ordered):
+    return CalculationSession(text, ordered=ordered).results()
+
+
+# name → (calculate(texts, ordered) → [result tuple or exception, ...], family). Engines of one family
+# must agree on everything; across families only hours (to the tenth) and failure are compared.
+# A new fast engine is added here and fuzzed against its reference with --pair v2:<name>.
+ENGINES = {
+    'v2': (_each(process_input), 'v2'),
+    'batch': (process_many, 'v2'),
+    'session': (_each(_session), 'v2'),
+    'v1': (lambda texts, ordered: [_calculate_v1(text, ordered) for text in texts], 'v1'),
+}
+DEFAULT_PAIRS = (('v2', 'batch'), ('v2', 'session'))
+
+# -- generation ------------------------------------------------------------------------------------
+
+_IDS = ('a', 'b', 'oh', 'capsa', 'x1', 'Big Client')
+
+
+def _time_token(rng, minute_of_day, face):
+    """Write a clock time the way people do: on a 24 hour face, or a 12 hour face with an a/p
+    suffix (occasionally the wrong one) or none."""
+    hour, minute = divmod(minute_of_day % 1440, 60)
+    if face == 12:
+        hour = (hour - 1) % 12 + 1
+    style = rng.random()
+    if style < 0.4 or (style < 0.55 and minute % 6):
+        token = str(hour) if not minute else f'{hour}:{minute:02d}'
+    elif style < 0.55:
+        token = f'{hour + minute / 60:g}'
+    elif style < 0.65:
+        token = f'{hour:02d}:{minute:02d}'
+    else:
+        token = f'{hour}:{minute:02d}'
+    if face == 12 and rng.random() < 0.2:
+        afternoon = (minute_of_day % 1440 >= 720) != (rng.random() < 0.1)
+        token += rng.choice(('p', 'pm') if afternoon else ('a', 'am'))
+    return token
+
+
+def _valid_line(rng, code, clock):
+    """One ID's line of increasing ranges, starting at clock (minutes), on one clock face."""
+    face = rng.choice((12, 12, 24))
+    ranges = []
+    for _ in range(rng.randint(1, 4)):
+        start = clock + rng.choice((0, 0, 0, 15, 30, 60))
+        end = start + rng.choice((6, 15, 30, 60, 90, 120, 180))
+        ranges.append(f'{_time_token(rng, start, face)}-{_time_token(rng, end, face)}')
+        clock = end
+    return f"{code} {', '.join(ranges)}", clock
+
+
+def _mutate(rng, line):
+    """Near-valid damage: the kinds of typos the page sees."""
+    kind = rng.randrange(7)
+    if kind == 0:
+        return line.replace('-', ' ', 1)
+    if kind == 1:
+        return line + ','
+    if kind == 2:
+        return line.replace(',', ',,', 1)
+    if kind == 3:
+        return re.sub(r'\d', lambda m: str(rng.randrange(10)), line, count=1)
+    if kind == 4:
+        return line + '  # ' + rng.choice(('lunch', '9-10', 'x'))
+    if kind == 5:
+        return line.replace(' ', ':  ', 1)
+    return line.upper()
+
+
+def generate_case(rng):
+    """A random timesheet, valid about half the time: IDs repeat, times mix formats, ranges
+    may overlap or run past noon or midnight, and a fraction of lines carry typos."""
+    lines = []
+    clock = rng.randrange(6 * 60, 11 * 60)
+    for _ in range(rng.randint(1, 7)):
+        code = rng.choice(_IDS)
+        line, clock = _valid_line(rng, code, clock)
+        if rng.random() < 0.05:
+            clock -= rng.choice((30, 60, 120))  # overlap the next line
+        if rng.random() < 0.08:
+            line = _mutate(rng, line)
+        lines.append(line)
+        if rng.random() < 0.05:
+            lines.append(rng.choice(('', '# note', '// todo')))
+    if rng.random() < 0.3:
+        lines.append(f'\\={rng.choice(("8", "7.5", "9.0", "=8", "x"))}')
+    return '\n'.join(lines)
+
+
+# -- comparison ------------------------------------------------------------------------------------
+
+
+def _summary(outcome, full):
+    if isinstance(outcome, BaseException):
+        return ['error', type(outcome).__name__]
+    results, breaks, metadata = outcome
+    hours = {code: round(value, 1) for code, value in results.items()}
+    if not full:
+        return ['ok', hours]
+    return ['ok', hours, [list(b) for b in breaks], metadata.get('target_time'), metadata.get('target_achieved_at'),
+            list(metadata.get('detected_ids', []))]
+
+
+def disagreement(text, reference, candidate, ordered):
+    """(reference summary, candidate summary) if the two engines disagree on text, else None."""
+    (ref, ref_family), (cand, cand_family) = ENGINES[reference], ENGINES[candidate]
+    full = ref_family == cand_family
+    expected = _summary(ref([text], ordered)[0], full)
+    actual = _summary(cand([text], ordered)[0], full)
+    return None if expected == actual else (expected, actual)
+
+
+def _check_chunk(seeds, pairs):
+    """Worker entry point: generate one case per seed, run it through every pair in both modes and
+    return [(seed, pair, ordered), ...] for each disagreement. Each engine sees the chunk as one batch."""
+    texts = [generate_case(random.Random(seed)) for seed in seeds]
+    found = []
+    for ordered in (True, False):
+        cache = {}
+        for reference, candidate in pairs:
+            full = ENGINES[reference][1] == ENGINES[candidate][1]
+            for name in (reference, candidate):
+                if name not in cache:
+                    cache[name] = ENGINES[name][0](texts, ordered)
+            for seed, ref, cand in zip(seeds, cache[reference], cache[candidate]):
+                if _summary(ref, full) != _summary(cand, full):
+                    found.append((seed, f'{reference}:{candidate}', ordered))
+    return found
+
+
+# -- shrinking -------------------------------------------------------------------------------------
+
+
+def _variants(text):
+    """Smaller versions of text, biggest cuts first."""
+    lines = text.split('\n')
+    for i in range(len(lines)):
+        yield '\n'.join(lines[:i] + lines[i + 1:])
+    for i, line in enumerate(lines):
+        code, _, rest = line.partition(' ')
+        ranges = rest.split(',')
+        for j in range(len(ranges)):
+            if len(ranges) > 1:
+                yield '\n'.join(lines[:i] + [f"{code} {','.join(ranges[:j] + ranges[j + 1:]).strip()}"] + lines[i + 1:])
+        simpler = [
+            re.sub(r'(\d):\d\d', r'\1', line, count=1),
+            re.sub(r'(\d)\.\d', r'\1', line, count=1),
+            re.sub(r'(\d)(?:am|pm|a|p)\b', r'\1', line, count=1),
+            re.sub(r'\s*(#|//).*', '', line),
+            re.sub(r'\b0(\d)', r'\1', line, count=1),
+        ]
+        if code not in ('a', '') and rest:
+            simpler.append(f'a {rest}')
+        for variant in simpler:
+            if variant != line:
+                yield '\n'.join(lines[:i] + [variant] + lines[i + 1:])
+
+
+def shrink(text, reference, candidate, ordered, budget=2000):
+    """Greedily apply the first reduction that keeps the engines disagreeing, until none does."""
+    tries = 0
+    progress = True
+    while progress and tries < budget:
+        progress = False
+        for smaller in _variants(text):
+            tries += 1
+            if disagreement(smaller, reference, candidate, ordered):
+                text = smaller
+                progress = True
+                break
+    return text
+
+
+# -- fixtures --------------------------------------------------------------------------------------
+
+
+def load_fixtures(path=FIXTURES):
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+def save_fixture(text, pair, ordered, path=FIXTURES):
+    """Add a shrunk mismatch to the regression fixtures (v2/tests/test_fuzz.py replays them).
+    Returns False if it was already there."""
+    fixtures = load_fixtures(path)
+    fixture = {'pair': pair, 'ordered': ordered, 'input': text}
+    if fixture in fixtures:
+        return False
+    fixtures.append(fixture)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(fixtures, f, indent=2)
+        f.write('\n')
+    return True
+
+
+# -- runner ----------------------------------------------------------------------------------------
+
+
+def fuzz(cases, pairs=DEFAULT_PAIRS, seed=0, workers=None, chunk_size=500):
+    """Check cases generated cases (seeds seed .. seed + cases - 1) on a process pool.
+    Yields each disagreement as (seed, 'reference:candidate', ordered) as chunks complete."""
+    workers = workers or _os.cpu_count() or 1
+    chunks = (range(start, min(start + chunk_size, seed + cases)) for start in range(seed, seed + cases, chunk_size))
+    if workers == 1:
+        for chunk in chunks:
+            yield from _check_chunk(chunk, pairs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for found in pool.map(_check_chunk, chunks, [pairs] * -(-cases // chunk_size)):
+            yield from found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python v2/fuzz.py',
+                                     description='Differentially fuzz the calculation engines against each other.')
+    parser.add_argument('--cases', type=int, default=100000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--pair', action='append', metavar='REFERENCE:CANDIDATE',
+                        help=f"engines to compare, from {', '.join(ENGINES)} (default: v2:batch and v2:session)")
+    parser.add_argument('--save', action='store_true', help='add shrunk mismatches to the regression fixtures')
+    parser.add_argument('--max-failures', type=int, default=20, help='stop after this many distinct mismatches')
+    args = parser.parse_args(argv)
+
+    pairs = tuple(tuple(pair.split(':')) for pair in args.pair) if args.pair else DEFAULT_PAIRS
+    for pair in pairs:
+        if len(pair) != 2 or not set(pair) <= set(ENGINES):
+            parser.error(f"--pair takes REFERENCE:CANDIDATE from {', '.join(ENGINES)}")
+
+    started = time.perf_counter()
+    shrunk = set()
+    for seed, pair, ordered in fuzz(args.cases, pairs, args.seed, args.workers):
+        reference, candidate = pair.split(':')
+        text = shrink(generate_case(random.Random(seed)), reference, candidate, ordered)
+        if (pair, ordered, text) in shrunk:
+            continue
+        shrunk.add((pair, ordered, text))
+        expected, actual = disagreement(text, reference, candidate, ordered)
+        print(f"seed {seed} {pair} {'ordered' if ordered else 'unordered'}:\n  {text!r}\n"
+              f"  {reference}: {expected}\n  {candidate}: {actual}")
+        if args.save:
+            save_fixture(text, pair, ordered)
+        if len(shrunk) >= args.max_failures:
+            break
+    elapsed = time.perf_counter() - started
+    print(f'{args.cases} cases, {len(shrunk)} distinct mismatches in {elapsed:.1f}s', file=_sys.stderr)
+    return 1 if shrunk else 0
+
+
+if __name__ == '__main__':
+    _sys.exit(main())
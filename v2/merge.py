@@ -0,0 +1,61 @@
+import heapq
+
+
+class DoubleChargeError(RuntimeError):
+    """Raised when an interval starts before the previous interval in the timeline ends.
+
+    start     : start of the offending interval
+    last_time : end of the interval walked just before it
+    Callers format their own message from these so v1 and v2 keep their wording."""
+
+    def __init__(self, start, last_time):
+        super().__init__(start, last_time)
+        self.start = start
+        self.last_time = last_time
+
+
+def merge_intervals(hours_dict):
+    """Yield (code, start, end) for every interval in chronological order of start.
+
+    hours_dict maps each ID to a flat [start, end, start, end, ...] sequence. Each ID's intervals
+    are walked in order through a cursor; only the head interval of each ID sits in the heap, so
+    the merge is O(N log K). Ties on start go to the ID that comes last in hours_dict (last one
+    wins), matching the old _next_charge scan."""
+    heap = []
+    for order, (code, data) in enumerate(hours_dict.items()):
+        if data:
+            heap.append((data[0], -order, code, 0))
+    heapq.heapify(heap)
+
+    while heap:
+        start, neg_order, code, cursor = heap[0]
+        data = hours_dict[code]
+        yield code, start, data[cursor + 1]
+        cursor += 2
+        if cursor < len(data):
+            heapq.heapreplace(heap, (data[cursor], neg_order, code, cursor))
+        else:
+            heapq.heappop(heap)
+
+
+def sweep(hours_dict):
+    """Charge every interval in chronological order and record the breaks between them.
+
+    Returns (charges, breaks):
+        charges : {code: summed duration}   (same key order as hours_dict)
+        breaks  : [(break_start, break_end), ...]
+    Raises DoubleChargeError if an interval starts before the previous one ends."""
+    charges = {code: 0 for code in hours_dict}
+    breaks = []
+    last_time = None
+
+    for code, start, end in merge_intervals(hours_dict):
+        if last_time and start < last_time:
+            raise DoubleChargeError(start, last_time)
+        if last_time and last_time != start:
+            breaks.append((last_time, start))
+        last_time = end
+        # rounding only matters for float hours (v1); integer timelines pass through unchanged
+        charges[code] += round(abs(end - start), 3)
+
+    return charges, breaks
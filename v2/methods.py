@@ -0,0 +1,162 @@
+import os as _os
+import sys as _sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, BrokenExecutor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+# Make the project root and v2 dir importable in the parent and in every worker process.
+_ROOT = _os.path.dirname(_os.path.dirname(_os.path.abspath(__file__)))
+if _ROOT not in _sys.path:
+    _sys.path.insert(0, _ROOT)
+_V2_DIR = _os.path.dirname(_os.path.abspath(__file__))
+if _V2_DIR not in _sys.path:
+    _sys.path.insert(0, _V2_DIR)
+import tracing
+from batch import _calculate_v1
+from cache import cache_key
+from calculator import evaluate, parse_input, process_input
+from formatting import break_from_triple
+from profiling import hooks as profile_hooks
+
+# (engine, ordered) in the order the comparison summary lists them
+ALL_METHODS = (('v2', True), ('v2', False), ('v1', True), ('v1', False))
+POOL_KINDS = ('thread', 'process')
+
+# One method's outcome:
+#   engine, ordered : which method ran
+#   result          : (results_dict, breaks_list, metadata_dict), or None if it failed; breaks are
+#                     (start_minute, end_minute, hours) tuples from either engine, formatted by the page
+#   error           : the exception it raised (TimeoutError if it ran past the deadline), or None
+#   seconds         : wall time spent waiting for it; 0.0 for a cache hit
+MethodOutcome = namedtuple('MethodOutcome', ['engine', 'ordered', 'result', 'error', 'seconds'])
+
+
+def _v1(text, ordered):
+    outcome = _calculate_v1(text, ordered)
+    if isinstance(outcome, BaseException):
+        return outcome
+    results, breaks, metadata = outcome
+    return results, [break_from_triple(b) for b in breaks], metadata
+
+
+def _v2(calculate, source, ordered):
+    try:
+        return calculate(source, ordered=ordered, numeric_breaks=True)
+    except (ValueError, RuntimeError) as e:
+        return e
+
+
+def _calculate(engine, text, orders, trace=False):
+    """Worker entry point: run engine on text once per mode in orders (True for ordered), returning
+    each mode's result or the exception it raised, in order. v2 parses the sheet once for all modes.
+    trace carries the submitting request's opt-in, which pool workers would not otherwise see."""
+    with tracing.traced(trace):
+        if engine == 'v1':
+            return [_v1(text, ordered) for ordered in orders]
+        if profile_hooks():  # hooks expect one report per process_input call
+            return [_v2(process_input, text, ordered) for ordered in orders]
+        try:
+            parsed = parse_input(text)
+        except ValueError as e:
+            return [e] * len(orders)
+        return [_v2(evaluate, parsed, ordered) for ordered in orders]
+
+
+class MethodExecutor:
+    """Runs calculation methods concurrently on a thread or process pool with a deadline.
+
+    Every requested method is submitted at once; whatever has not finished timeout seconds later
+    comes back as a TimeoutError outcome so one slow method cannot hold up the response. Python
+    cannot stop a running task, so a timed-out method keeps its worker busy until it returns.
+    Threads share the interpreter and suit the small sheets the page sees; processes give
+    CPU-bound methods real parallelism at the cost of pickling each sheet and result."""
+
+    def __init__(self, kind='thread', workers=4, timeout=5.0):
+        if kind not in POOL_KINDS:
+            raise ValueError(f"Unknown pool kind '{kind}'. Expected one of: {', '.join(POOL_KINDS)}.")
+        self.kind = kind
+        self.workers = workers
+        self.timeout = timeout
+        self._pool = None
+
+    def _executor(self):
+        if self._pool is None:
+            pool_class = ThreadPoolExecutor if self.kind == 'thread' else ProcessPoolExecutor
+            self._pool = pool_class(max_workers=self.workers)
+        return self._pool
+
+    def _submit(self, *args):
+        """Submit to the pool, replacing it once if a dead worker has broken it."""
+        try:
+            return self._executor().submit(*args)
+        except BrokenExecutor:
+            self.shutdown()
+            return self._executor().submit(*args)
+
+    def run(self, text, methods=ALL_METHODS, cache=None):
+        """Run methods on one sheet. Returns {(engine, ordered): MethodOutcome} in the order of methods.
+
+        With a ResultCache, cached methods are answered without touching the pool and fresh
+        outcomes are stored; timeouts and dead workers are never cached. A pool broken by a dead worker
+        is replaced, so the next run starts on fresh workers."""
+        outcomes = {}
+        uncached = {}  # engine → [ordered, ...]
+        trace = tracing.active()
+        started = time.perf_counter()
+        for engine, ordered in methods:
+            cached = cache.get(cache_key(text, engine, ordered)) if cache is not None else None
+            if cached is not None:
+                outcomes[engine, ordered] = self._outcome(engine, ordered, cached, 0.0)
+            else:
+                uncached.setdefault(engine, []).append(ordered)
+
+        # v2 modes share one task so the sheet is parsed once; v1 modes run side by side
+        pending = {}
+        for engine, orders in uncached.items():
+            for group in [tuple(orders)] if engine == 'v2' else [(ordered,) for ordered in orders]:
+                pending[self._submit(_calculate, engine, text, group, trace)] = (engine, group)
+
+        remaining = set(pending)
+        broken = False
+        deadline = started + self.timeout
+        while remaining:
+            done, remaining = wait(remaining, timeout=max(deadline - time.perf_counter(), 0),
+                                   return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                engine, group = pending[future]
+                try:
+                    results = future.result()
+                    store = cache is not None
+                except Exception as e:  # the worker itself died; only _calculate's own outcomes are cached
+                    results = [e] * len(group)
+                    store = False
+                    broken = broken or isinstance(e, BrokenExecutor)
+                seconds = time.perf_counter() - started
+                for ordered, outcome in zip(group, results):
+                    if store:
+                        cache.put(cache_key(text, engine, ordered), outcome)
+                    outcomes[engine, ordered] = self._outcome(engine, ordered, outcome, seconds)
+
+        for future in remaining:
+            future.cancel()
+            engine, group = pending[future]
+            for ordered in group:
+                error = TimeoutError(f"{engine} {'ordered' if ordered else 'unordered'} did not finish within "
+                                     f"{self.timeout:g}s.")
+                outcomes[engine, ordered] = MethodOutcome(engine, ordered, None, error, self.timeout)
+        if broken:
+            self.shutdown()
+        return {method: outcomes[method] for method in methods}
+
+    @staticmethod
+    def _outcome(engine, ordered, outcome, seconds):
+        if isinstance(outcome, BaseException):
+            return MethodOutcome(engine, ordered, None, outcome, seconds)
+        return MethodOutcome(engine, ordered, outcome, None, seconds)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
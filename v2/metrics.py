@@ -0,0 +1,226 @@
+import bisect
+import math
+import threading
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Calculation latency buckets in seconds: a typical sheet takes tens of microseconds, a pathological
+# one or a queued pool task can take seconds.
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """The series for one combination of label values, created on first use."""
+        values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f'{self.name} takes labels {self.labelnames}, got {values}')
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _series(self):
+        # children are only ever added, so a snapshot of the dict is enough
+        return sorted(self._children.items())
+
+    def exposition(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for values, child in self._series():
+            lines.extend(self._sample_lines(values, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Counter(_Metric):
+    """Monotonic count per label combination."""
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self.labels().inc(amount)
+
+    def _sample_lines(self, values, child):
+        return [f'{self.name}{_labels(self.labelnames, values)} {_format_value(child.value)}']
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', '_lock')
+
+    def __init__(self, upper_bounds):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # the last slot is +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.upper_bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class Histogram(_Metric):
+    """Fixed-bucket distribution per label combination. Observing is a bisect plus one short lock
+    held by that series alone, so threads recording different engines or modes never contend."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value):
+        self.labels().observe(value)
+
+    def _sample_lines(self, values, child):
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf, ), counts):
+            cumulative += count
+            le = _labels(self.labelnames, values, [('le', _format_value(bound))])
+            lines.append(f'{self.name}_bucket{le} {cumulative}')
+        labels = _labels(self.labelnames, values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """A counter or gauge read from elsewhere at scrape time, e.g. cache statistics.
+    read() returns {label values tuple: number}."""
+
+    def __init__(self, name, documentation, read, labelnames=(), kind='gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._read = read
+
+    def _series(self):
+        return sorted(self._read().items())
+
+    def _sample_lines(self, values, value):
+        return [f'{self.name}{_labels(self.labelnames, values)} {_format_value(value)}']
+
+
+class Registry:
+    """The metrics of one process, rendered together in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered.')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name, documentation, read, labelnames=(), kind='gauge'):
+        return self.register(CallbackMetric(name, documentation, read, labelnames, kind))
+
+    def exposition(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.exposition())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+calculation_seconds = registry.histogram('stc_calculation_seconds', 'Time to calculate one sheet.',
+                                         ['engine', 'mode'])
+calculation_errors = registry.counter('stc_calculation_errors_total', 'Calculations that failed, by exception type.',
+                                      ['engine', 'mode', 'error'])
+input_lines = registry.histogram('stc_input_lines', 'Time entry lines per submitted sheet.', buckets=SIZE_BUCKETS)
+input_intervals = registry.histogram('stc_input_intervals', 'Time ranges per submitted sheet.', buckets=SIZE_BUCKETS)
+requests = registry.counter('stc_http_requests_total', 'HTTP requests served, by endpoint and status code.',
+                            ['endpoint', 'status'])
+request_seconds = registry.histogram('stc_http_request_seconds', 'Time to serve one HTTP request.', ['endpoint'])
+
+
+def error_category(error):
+    """Label value for a failed calculation: ValueError (bad input), RuntimeError (double charging),
+    TimeoutError (missed the deadline) or Exception (anything else)."""
+    for category in (TimeoutError, RuntimeError, ValueError):
+        if isinstance(error, category):
+            return category.__name__
+    return 'Exception'
+
+
+def record_calculation(engine, ordered, seconds=None, error=None):
+    """Record one calculation. seconds=None (a cache hit) records the error, if any, but no latency."""
+    mode = 'ordered' if ordered else 'unordered'
+    if seconds is not None:
+        calculation_seconds.labels(engine, mode).observe(seconds)
+    if error is not None:
+        calculation_errors.labels(engine, mode, error_category(error)).inc()
+
+
+def record_input(lines, intervals):
+    input_lines.observe(lines)
+    input_intervals.observe(intervals)
+
+
+def record_request(endpoint, status, seconds):
+    endpoint = endpoint or 'unmatched'
+    requests.labels(endpoint, status).inc()
+    request_seconds.labels(endpoint).observe(seconds)
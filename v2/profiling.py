@@ -0,0 +1,89 @@
+import contextlib
+import sys
+import time
+import tracemalloc
+from contextvars import ContextVar
+
+# The profile being filled by the current calculation, or None. Stage boundaries in the engine check
+# this once, so an unprofiled calculation pays one ContextVar lookup per stage.
+_current = ContextVar('stc_profile', default=None)
+_hooks = []
+
+
+def current():
+    return _current.get()
+
+
+class StageProfile:
+    """Accumulates wall time (and optionally allocations) per named stage of a calculation.
+
+    The engine calls mark() where a stage starts and lap(name) where it ends; a stage that runs once
+    per line accumulates over all its calls. With allocations=True each stage also records the net
+    change in live memory blocks and the peak traced bytes, at a noticeable cost (tracemalloc)."""
+
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self.stages = {}
+        self._started = time.perf_counter_ns()
+        self._mark = self._started
+        self._blocks = 0
+
+    def mark(self):
+        if self.allocations:
+            self._blocks = sys.getallocatedblocks()
+            tracemalloc.reset_peak()
+        self._mark = time.perf_counter_ns()
+
+    def lap(self, name):
+        now = time.perf_counter_ns()
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = {'calls': 0, 'ns': 0}
+            if self.allocations:
+                stage.update(blocks=0, peak_bytes=0)
+        stage['calls'] += 1
+        stage['ns'] += now - self._mark
+        if self.allocations:
+            stage['blocks'] += sys.getallocatedblocks() - self._blocks
+            stage['peak_bytes'] = max(stage['peak_bytes'], tracemalloc.get_traced_memory()[1])
+        self.mark()
+
+    def report(self):
+        """{'seconds': total, 'stages': {name: {'seconds', 'calls'[, 'blocks', 'peak_bytes']}}} in stage order."""
+        stages = {}
+        for name, stage in self.stages.items():
+            stages[name] = dict(stage, seconds=stage['ns'] / 1e9)
+            del stages[name]['ns']
+        return {'seconds': (time.perf_counter_ns() - self._started) / 1e9, 'stages': stages}
+
+
+@contextlib.contextmanager
+def profiled(allocations=False):
+    """Profile every engine stage run inside the block. Yields the StageProfile."""
+    profile = StageProfile(allocations=allocations)
+    started_tracing = allocations and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _current.set(profile)
+    try:
+        profile.mark()
+        yield profile
+    finally:
+        _current.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def add_hook(callback):
+    """Call callback(report) after every process_input, e.g. to forward stage timings to a metrics
+    system. While any hook is registered every calculation is profiled. The report also carries
+    'mode' ('ordered'/'unordered') and 'error' (the message, or None)."""
+    _hooks.append(callback)
+
+
+def remove_hook(callback):
+    _hooks.remove(callback)
+
+
+def hooks():
+    return tuple(_hooks)
@@ -0,0 +1,46 @@
+import json
+import threading
+import time
+
+from calculator import _strip_inline_comments
+from tokenizer import scan_line
+
+
+def sanitize(text):
+    """Strip a timesheet down to its shape: charge IDs become id1, id2, ... in order of appearance
+    (multi-word IDs keep a space), comments are dropped and a line without time ranges becomes 'x'.
+    Times and targets are kept, so the sheet calculates (or fails) the same way."""
+    codes = {}
+    lines = []
+    for line in _strip_inline_comments([l.strip() for l in text.replace('\\n', '\n').splitlines()]):
+        if not line:
+            continue
+        if line[:2] == '\\=':
+            lines.append(line)
+            continue
+        code, ranges, _ = scan_line(line.rstrip(','))
+        if code is None:
+            lines.append('x')
+            continue
+        if code not in codes:
+            codes[code] = f"id {len(codes) + 1}" if ' ' in code else f"id{len(codes) + 1}"
+        lines.append(f"{codes[code]} {', '.join(ranges)}")
+    return '\n'.join(lines)
+
+
+class CorpusRecorder:
+    """Appends sanitized POST bodies to a JSON Lines corpus for benchmarks.replay.
+
+    Each line is {"route": "/v2/", "form": {...}, "time": epoch seconds}; free-text form fields are
+    passed through sanitize(). The file is only ever appended to."""
+
+    def __init__(self, path, fields=('input', 'time_input')):
+        self.path = path
+        self.fields = fields
+        self._lock = threading.Lock()
+
+    def record(self, route, form):
+        form = {key: sanitize(value) if key in self.fields else value for key, value in form.items()}
+        line = json.dumps({'route': route, 'form': form, 'time': round(time.time(), 3)}, separators=(',', ':'))
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
@@ -0,0 +1,41 @@
+def _nearest_tenth(amount, unit):
+    """Round an integer amount to a whole number of tenths.
+    Goes through round() on the hour value so exact halves land where the engines always put them."""
+    return round(round(amount / (10 * unit), 1) * 10)
+
+
+def round_to_tenths(amounts, unit, total_tenths=None, rounded=None):
+    """Round per-ID amounts to tenths of an hour so they add up to the rounded total.
+
+    amounts      : {id: exact amount as an int}   (e.g. seconds, or thousandths of an hour)
+    unit         : how many amount units make a tenth of an hour (360 for seconds, 100 for thousandths)
+    total_tenths : the rounded total to add up to; defaults to the nearest tenth of the summed amounts
+    rounded      : {id: tenths} each ID's own rounding to start from; defaults to the nearest tenth of its amount
+    Returns ({id: tenths}, total_tenths).
+
+    Largest-remainder method: every ID is rounded to its nearest tenth, then the difference to the
+    rounded total is made up one tenth at a time by the IDs closest to rounding the other way
+    (ties go to the ID with more time, then input order). One sort, so it always terminates."""
+    if total_tenths is None:
+        total_tenths = _nearest_tenth(sum(amounts.values()), unit)
+
+    tenths = {}
+    remainders = []
+    for order, (code, amount) in enumerate(amounts.items()):
+        tenths[code] = _nearest_tenth(amount, unit) if rounded is None else rounded[code]
+        remainders.append((amount - tenths[code] * unit, -amount, order, code))
+
+    need = total_tenths - sum(tenths.values())
+    if need > 0:
+        # rounded down the most → round up
+        candidates = sorted((-rem, neg_amount, order, code) for rem, neg_amount, order, code in remainders if rem > 0)
+        step = 1
+    else:
+        # rounded up the most → round down
+        candidates = sorted(r for r in remainders if r[0] < 0)
+        step = -1
+
+    for _, _, _, code in candidates[:abs(need)]:
+        tenths[code] += step
+
+    return tenths, total_tenths
@@ -0,0 +1,309 @@
+import bisect
+from array import array
+from collections import namedtuple
+
+from calculator import (_NOON, ParsedInput, _convert_mil_times, _double_charge_error, _finish, _format_ranges,
+                        _next_day_shift, _strip_inline_comments)
+from tokenizer import scan_line
+
+# One sheet line as the session keeps it:
+#   text     : the raw line
+#   code     : charge ID, or None for blank, comment and target lines
+#   ranges   : (start, end, start, end, ...) in seconds, as parse_input stores them
+#   texts    : ('start-end', ...)   the ranges as typed
+#   explicit : first start has an explicit AM/PM suffix or leading zero
+#   target   : hours from a \= line, None if the line is not a parseable target
+_Line = namedtuple('_Line', ['text', 'code', 'ranges', 'texts', 'explicit', 'target'])
+
+
+def _parse_line(text):
+    """Parse one sheet line the same way parse_input does. Raises ValueError for an invalid line."""
+    if '\n' in text or '\\n' in text:
+        raise ValueError('Session edits take one line at a time.')
+    line = _strip_inline_comments([text.strip()])[0]
+    if not line:
+        return _Line(text, None, (), (), False, None)
+    if line[:2] == '\\=':
+        try:
+            target = float(line[3:] if line[:3] == '\\==' else line[2:])
+        except ValueError:
+            target = None
+        return _Line(text, None, (), (), False, target)
+
+    line = line.rstrip(',')
+    code, ranges_list, explicit = scan_line(line)
+    if code is None:
+        raise ValueError(f"Invalid line (missing time ranges): '{line}'")
+    return _Line(text, code, tuple(_format_ranges(ranges_list)), tuple(ranges_list), explicit, None)
+
+
+def _position(records, record):
+    for i, r in enumerate(records):
+        if r is record:
+            return i
+    raise ValueError('line not found')
+
+
+class CalculationSession:
+    """A timesheet that is recalculated incrementally as lines are appended, replaced or deleted.
+
+    Each edit re-parses only the edited line and re-converts only the IDs it touches (plus any ID
+    whose inferred PM start flips in ordered mode). Those IDs' intervals are moved in a sorted
+    timeline, and only the gaps and overlaps next to them are re-checked. results() then formats
+    the kept state exactly as process_input would format the whole sheet.
+
+    Line indexes count every line of the sheet, including blank, comment and target lines.
+    An invalid line raises ValueError and leaves the session unchanged. Calculation errors (double
+    charging, intervals over 24 hours) are raised by results(), as process_input would raise them.
+    Edits that reorder the first appearance of IDs fall back to a full rebuild."""
+
+    def __init__(self, text='', ordered=True):
+        self.ordered = ordered
+        self._lines = [_parse_line(line) for line in text.replace('\\n', '\n').splitlines()]
+        self._rebuild()
+
+    def __len__(self):
+        return len(self._lines)
+
+    @property
+    def text(self):
+        return '\n'.join(line.text for line in self._lines)
+
+    # -- edits --------------------------------------------------------------------------------------
+
+    def append(self, text):
+        record = _parse_line(text)
+        self._lines.append(record)
+        if record.code is not None:
+            self._add_record(record, len(self._lines) - 1)
+
+    def replace(self, index, text):
+        record = _parse_line(text)
+        old = self._lines[index]
+        self._lines[index] = record
+        if old.code is not None and old.code == record.code:
+            records = self._id_lines[old.code]
+            records[_position(records, old)] = record
+            self._touch(old.code)
+            return
+        if old.code is not None and not self._remove_record(old):
+            return
+        if record.code is not None:
+            self._add_record(record, index)
+
+    def delete(self, index):
+        old = self._lines.pop(index)
+        if old.code is not None:
+            self._remove_record(old)
+
+    # -- results ------------------------------------------------------------------------------------
+
+    def results(self):
+        """Return (results_dict, breaks_list, metadata_dict) for the current sheet, like process_input."""
+        for code in self._id_lines:
+            error = self._errors.get(code) or self._day_errors.get(code)
+            if error is not None:
+                raise error
+        if self._overlaps:
+            left = min(self._overlaps)
+            raise _double_charge_error(self._overlaps[left][0], left[3])
+
+        target = 0
+        for line in reversed(self._lines):
+            if line.target is not None:
+                target = line.target
+                break
+        parsed = ParsedInput((), target, tuple(code for code in self._id_lines if ' ' in code),
+                             frozenset(code for code, explicit in self._explicit.items() if explicit), ())
+        hours = {code: self._data[code] for code in self._id_lines}
+        charges = {code: self._charges[code] for code in self._id_lines}
+        spans = [self._gaps[left] for left in sorted(self._gaps)]
+        return _finish(parsed, 'ordered' if self.ordered else 'unordered', hours, charges, spans)
+
+    # -- bookkeeping --------------------------------------------------------------------------------
+
+    def _add_record(self, record, index):
+        code = record.code
+        records = self._id_lines.get(code)
+        if records is None:
+            # a new ID sorts last unless an existing ID first appears after this line
+            for later in self._lines[index + 1:]:
+                if later.code is not None and self._id_lines[later.code][0] is later:
+                    return self._rebuild()
+            self._id_lines[code] = [record]
+            self._rank[code] = self._next_rank
+            self._next_rank += 1
+        else:
+            for j in range(index - 1, -1, -1):
+                if self._lines[j].code == code:
+                    records.insert(_position(records, self._lines[j]) + 1, record)
+                    break
+            else:
+                return self._rebuild()  # moves this ID's first appearance earlier
+        self._touch(code)
+
+    def _remove_record(self, record):
+        """Drop a line from its ID. Returns False if that forced a full rebuild."""
+        code = record.code
+        records = self._id_lines[code]
+        pos = _position(records, record)
+        del records[pos]
+        if not records:
+            del self._id_lines[code]
+        elif pos == 0:
+            self._rebuild()  # this ID now first appears further down
+            return False
+        self._touch(code)
+        return True
+
+    def _touch(self, code):
+        if code in self._id_lines:
+            self._explicit[code] = any(line.explicit for line in self._id_lines[code])
+        else:
+            self._explicit.pop(code, None)
+        self._refresh({code})
+
+    def _refresh(self, dirty):
+        for code in dirty | self._update_offsets():
+            self._update_id(code)
+        for code in self._update_days():
+            self._update_id(code)
+
+    def _update_offsets(self):
+        """Recompute the inferred PM offset of each ID's first start. Returns the IDs whose offset changed."""
+        changed = set()
+        if not self.ordered:
+            return changed
+        # as _convert_ordered_starts: once an ID starts before the first ID, later IDs are PM
+        afternoon = False
+        first = None
+        for code, records in self._id_lines.items():
+            start = records[0].ranges[0]
+            if first is None:
+                first = start
+            if first > start:
+                afternoon = True
+            offset = _NOON if afternoon and not self._explicit[code] and start < _NOON else 0
+            if self._offsets.get(code) != offset:
+                self._offsets[code] = offset
+                changed.add(code)
+        return changed
+
+    def _update_days(self):
+        """Recompute which IDs continue on a later day, as _convert_mil_times does across the sheet.
+        Returns the IDs whose move changed."""
+        changed = set()
+        anchor = latest = None
+        for code, records in self._id_lines.items():
+            self._day_errors.pop(code, None)
+            old = self._shifts.get(code, 0)
+            data = self._data.get(code)
+            if data is None:
+                continue
+            first, last = data[0] - old, data[-1] - old
+            try:
+                shift = _next_day_shift(code, first, records[0].texts, anchor, latest)
+            except ValueError as e:
+                self._day_errors[code] = e
+                shift = 0
+            if shift != old:
+                self._shifts[code] = shift
+                changed.add(code)
+            anchor = first + shift if anchor is None else max(anchor, first + shift)
+            latest = last + shift if latest is None else max(latest, last + shift)
+        return changed
+
+    def _update_id(self, code, link=True):
+        """Re-convert one ID's intervals and move them in the timeline."""
+        for item in self._items.pop(code, ()):
+            if link:
+                self._remove_item(item)
+        self._data.pop(code, None)
+        self._charges.pop(code, None)
+        self._errors.pop(code, None)
+        if code not in self._id_lines:
+            self._offsets.pop(code, None)
+            self._shifts.pop(code, None)
+            self._day_errors.pop(code, None)
+            self._rank.pop(code, None)
+            return
+
+        data = array('l', [t for line in self._id_lines[code] for t in line.ranges])
+        data[0] += self._offsets.get(code, 0)
+        try:
+            _convert_mil_times({code: data}, {code: [text for line in self._id_lines[code] for text in line.texts]})
+        except ValueError as e:
+            self._errors[code] = e
+            return
+        shift = self._shifts.get(code, 0)
+        if shift:
+            for i in range(len(data)):
+                data[i] += shift
+        self._data[code] = data
+        self._charges[code] = sum(data[i + 1] - data[i] for i in range(0, len(data), 2))
+        # ties on start go to the later ID, then the ID's own order, as in merge_intervals
+        items = [(data[i], -self._rank[code], i, data[i + 1], code) for i in range(0, len(data), 2)]
+        self._items[code] = items
+        if link:
+            for item in items:
+                self._insert_item(item)
+
+    def _rebuild(self):
+        self._id_lines = {}
+        for line in self._lines:
+            if line.code is not None:
+                self._id_lines.setdefault(line.code, []).append(line)
+        self._rank = {code: rank for rank, code in enumerate(self._id_lines)}
+        self._next_rank = len(self._rank)
+        self._explicit = {code: any(line.explicit for line in records) for code, records in self._id_lines.items()}
+        self._offsets = {}
+        self._shifts = {}  # ID → seconds it is moved to continue on a later day
+        self._day_errors = {}
+        self._data = {}
+        self._charges = {}
+        self._errors = {}
+        self._items = {}
+        self._timeline = []
+        self._gaps = {}  # left timeline item → (break_start, break_end)
+        self._overlaps = {}  # left timeline item → right item that starts before it ends
+
+        self._update_offsets()
+        for code in self._id_lines:
+            self._update_id(code, link=False)
+        for code in self._update_days():
+            self._update_id(code, link=False)
+        self._timeline = sorted(item for items in self._items.values() for item in items)
+        for p in range(len(self._timeline) - 1):
+            self._link(p)
+
+    # -- timeline -----------------------------------------------------------------------------------
+
+    def _insert_item(self, item):
+        p = bisect.bisect_left(self._timeline, item)
+        self._unlink(p - 1)
+        self._timeline.insert(p, item)
+        self._link(p - 1)
+        self._link(p)
+
+    def _remove_item(self, item):
+        p = bisect.bisect_left(self._timeline, item)
+        self._unlink(p - 1)
+        self._unlink(p)
+        del self._timeline[p]
+        self._link(p - 1)
+
+    def _unlink(self, p):
+        if 0 <= p < len(self._timeline):
+            left = self._timeline[p]
+            self._gaps.pop(left, None)
+            self._overlaps.pop(left, None)
+
+    def _link(self, p):
+        """Classify the pair at p, p + 1 the way sweep does: overlap, break or back to back."""
+        if 0 <= p < len(self._timeline) - 1:
+            left, right = self._timeline[p], self._timeline[p + 1]
+            last_time, start = left[3], right[0]
+            if last_time and start < last_time:
+                self._overlaps[left] = right
+            elif last_time and last_time != start:
+                self._gaps[left] = (last_time, start)
@@ -0,0 +1,51 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+from batch import _calculate_v1
+from calculator import process_input
+from formatting import break_from_triple
+from methods import MethodOutcome
+
+
+def _normalize(outcome):
+    """An outcome as the reference gives it: the result, or (exception type, message) for a failure.
+    Takes a result, an exception, or a MethodOutcome."""
+    if isinstance(outcome, MethodOutcome):
+        outcome = outcome.result if outcome.error is None else outcome.error
+    return (type(outcome), str(outcome)) if isinstance(outcome, BaseException) else outcome
+
+
+def _reference(text, ordered, engine='v2', numeric_breaks=False):
+    """What one direct call of the engine gives for text, normalized; the batch, pool and executor
+    paths must match it."""
+    if engine == 'v1':
+        outcome = _calculate_v1(text, ordered)
+        if numeric_breaks and not isinstance(outcome, BaseException):
+            results, breaks, metadata = outcome
+            outcome = results, [break_from_triple(b) for b in breaks], metadata
+        return _normalize(outcome)
+    try:
+        return process_input(text, ordered=ordered, numeric_breaks=numeric_breaks)
+    except (ValueError, RuntimeError) as e:
+        return _normalize(e)
+
+
+@pytest.fixture
+def reference():
+    return _reference
+
+
+@pytest.fixture
+def normalize():
+    return _normalize
+
+
+@pytest.fixture
+def client():
+    """Test client for the whole site (main.app, with the v2 blueprint under /v2)."""
+    from main import app
+    return app.test_client()
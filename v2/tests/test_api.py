@@ -0,0 +1,98 @@
+import pytest
+
+
+def _post(client, body):
+    response = client.post('/v2/api/calculate', json=body)
+    return response.status_code, response.get_json()
+
+
+def test_single_document(client):
+    status, reply = _post(client, {'input': 'a 8-10\nb 11-12', 'target': '4', 'modes': ['ordered']})
+    assert status == 200
+    assert reply == {'v2': {'ordered': {
+        'hours': {'a': 2.0, 'b': 1.0},
+        'total': 3.0,
+        'breaks': [[600, 660, 60]],
+        'target_time': '12:58pm',
+        'target_achieved_at': None,
+        'detected_ids': [],
+    }}}
+
+
+def test_breaks_are_minutes_from_both_engines(client):
+    status, reply = _post(client, {'input': 'a 8-10, 11:30-12\nb 1-2', 'engines': ['v2', 'v1']})
+    assert status == 200
+    for engine in ('v2', 'v1'):
+        assert reply[engine]['ordered']['breaks'] == [[600, 690, 90], [720, 780, 60]]
+        assert reply[engine]['unordered']['breaks'] == [[120, 480, 360], [600, 690, 90]]
+
+
+def test_batch_of_documents(client):
+    status, reply = _post(client, [{'input': 'a 8-10'}, {'input': 'bad'}, {'input': 'b 9-9:30', 'engines': ['v1']}])
+    assert status == 200
+    assert [list(doc) for doc in reply] == [['v2'], ['v2'], ['v1']]
+    assert reply[0]['v2']['ordered']['total'] == 2.0
+    assert 'error' in reply[1]['v2']['ordered'] and 'error' in reply[1]['v2']['unordered']
+    assert reply[2]['v1']['unordered']['hours'] == {'b': 0.5}
+
+
+def test_days(client):
+    sheet = 'Mon 5/6\na 8-12\nb 1-5\n5/7\na 7-9\n05/06\nc 5-6\n5/8\nx 7-8\ny 7:30-9'
+    status, reply = _post(client, {'input': sheet, 'target': '3', 'modes': ['ordered'], 'days': True})
+    assert status == 200
+    days = reply['v2']['ordered']['days']
+    assert [day['date'] for day in days] == ['Mon 5/6', '5/7', '5/8']
+    assert days[0]['hours'] == {'a': 4.0, 'b': 4.0, 'c': 1.0}
+    assert days[0]['breaks'] == [[720, 780, 60]]
+    assert days[1]['target_time'] == '9:58am'
+    assert set(days[2]) == {'date', 'error'}
+    assert reply['v2']['ordered']['hours'] == {'a': 6.0, 'b': 4.0, 'c': 1.0}
+    assert reply['v2']['ordered']['total'] == 11.0
+
+
+def test_days_entry_before_header(client):
+    status, reply = _post(client, {'input': 'a 8-9\n5/6\nb 9-10', 'modes': ['ordered'], 'days': True})
+    assert status == 200
+    assert set(reply['v2']['ordered']) == {'error'}
+
+
+def test_body_not_json(client):
+    response = client.post('/v2/api/calculate', data='a 8-10', content_type='application/json')
+    assert response.status_code == 400
+    assert set(response.get_json()) == {'error'}
+
+
+@pytest.mark.parametrize('body', [
+    [],
+    ['a 8-10'],
+    {'input': ['a 8-10']},
+    {'input': 'a 8-10', 'engines': 'v2'},
+    {'input': 'a 8-10', 'engines': ['v3']},
+    {'input': 'a 8-10', 'engines': [['v2']]},
+    {'input': 'a 8-10', 'engines': [{'v2': 1}]},
+    {'input': 'a 8-10', 'modes': ['sideways']},
+    {'input': 'a 8-10', 'modes': [['ordered']]},
+    [{'input': 'a 8-10'}, {'input': 'a 8-10', 'modes': [1]}],
+    {'input': '5/6\na 8-10', 'days': 'yes'},
+    {'input': '5/6\na 8-10', 'days': True, 'engines': ['v1']},
+])
+def test_bad_requests(client, body):
+    status, reply = _post(client, body)
+    assert status == 400
+    assert set(reply) == {'error'}
+
+
+def test_v1_is_quiet_and_exits_become_errors(client, capsys, monkeypatch):
+    status, reply = _post(client, {'input': 'a 8-9\nb 10-11', 'engines': ['v1']})
+    assert status == 200 and reply['v1']['ordered']['total'] == 2.0
+    assert capsys.readouterr().out == ''
+
+    import hour_calculator
+
+    def round_error(self, ordered=True, cli=False):
+        raise SystemExit('Round error occurred. Please contact maintainer with the input.')
+
+    monkeypatch.setattr(hour_calculator.HourCalculator, 'calculate', round_error)
+    status, reply = _post(client, {'input': 'a 8-9', 'engines': ['v1'], 'modes': ['ordered']})
+    assert status == 200
+    assert reply == {'v1': {'ordered': {'error': 'Round error occurred. Please contact maintainer with the input.'}}}
@@ -4,7 +4,7 @@ import sys
 import pytest
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from calculator import process_input
+from calculator import evaluate, parse_input, process_input
 
 
 class AppCalculator:
@@ -229,7 +229,7 @@ def test_break_disagree(ordered, hour_calculator):
 def test_disagree(ordered, hour_calculator):
     hours = 'a 8-10\n c 1-2\n b 10-1, 2-6'
     if ordered:
-        # ordered=True pushes b's interval past midnight — should raise ValueError
+        # ordered=True pushes b's interval past midnight, and no am/pm says it continues there — should raise ValueError
         try:
             hour_calculator(hours).calculate(ordered=ordered)
             assert False, "Expected ValueError for past-midnight interval"
@@ -245,6 +245,43 @@ def test_disagree(ordered, hour_calculator):
         }, [['2:00', '8:00', '6.0'], ['13:00', '14:00', '1.0']], meta())
 
 
+cross_midnight_calcs = [
+    ('a 10p-2a', ({'a': 4.0, '$total': 4.0}, [], meta())),
+    ('a 22-23:30, 0:30-3', ({'a': 4.0, '$total': 4.0}, [['23:30', '24:30', '1.0']], meta())),
+    ('a 20-25:30', ({'a': 5.5, '$total': 5.5}, [], meta())),
+    ('a 9p-11p\n b 11p-3a\n \\=6', ({'a': 2.0, 'b': 4.0, '$total': 6.0}, [], meta(target_achieved_at='2:58am (+1 day)'))),
+    ('a 10p-11p\n b 11p-1a\n c 1a-3a', ({'a': 1.0, 'b': 2.0, 'c': 2.0, '$total': 5.0}, [], meta())),
+    ('a 10p-12a\n b 12a-2a', ({'a': 2.0, 'b': 2.0, '$total': 4.0}, [], meta())),
+    ('a 10p-11:30p\n b 1a-3a', ({'a': 1.5, 'b': 2.0, '$total': 3.5}, [['23:30', '25:00', '1.5']], meta())),
+    ('a 10p-2a\n b 02:30-3', ({'a': 4.0, 'b': 0.5, '$total': 4.5}, [['26:00', '26:30', '0.5']], meta())),
+    ('a 23:29-02:29, 2:29-2:59', ({'a': 3.5, '$total': 3.5}, [], meta())),
+]
+
+
+@pytest.mark.parametrize('hours, expected', cross_midnight_calcs)
+def test_cross_midnight(hour_calculator, hours, expected):
+    assert hour_calculator(hours).calculate(ordered=True) == expected
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_cross_midnight_either_mode(hour_calculator, ordered):
+    """Lines are grouped by ID, so only a line starting over 12h before the one above it moves to the next day."""
+    assert hour_calculator('a 10p-12a\n b 12a-2a').calculate(ordered=ordered)[0] == {'a': 2.0, 'b': 2.0, '$total': 4.0}
+    assert hour_calculator('a 1p-5p\n b 8a-12p').calculate(ordered=ordered)[1] == [['12:00', '13:00', '1.0']]
+
+
+@pytest.mark.parametrize('hours, ordered', [('a 10p-11p, 1-2', True), ('a 10p-11p, 1-2', False), ('a 10p-2a\n b 1-3', False)])
+def test_ambiguous_day(hour_calculator, hours, ordered):
+    with pytest.raises(ValueError, match='am/pm'):
+        hour_calculator(hours).calculate(ordered=ordered)
+
+
+@pytest.mark.parametrize('hours', ['a 1-26', 'a 20-99', 'a ' + '9' * 400 + '-2'])
+def test_interval_too_long(hour_calculator, hours):
+    with pytest.raises(ValueError):
+        hour_calculator(hours).calculate(ordered=True)
+
+
 def test_valid_overlapping_ids(hour_calculator):
     hours = 'id1 6-8\n id2 8-10\n id1 10-11'
     output = hour_calculator(hours).calculate()
@@ -268,8 +305,33 @@ def test_leading_zero_ordered(hour_calculator):
     assert output == ({'id1': 5.4, 'id2': 3.5, '$total': 8.9}, [], meta())
 
 
+afternoon_start_calcs = [
+    ('a 8-12\nb 1-5\nc 18:00-19:00', ({'a': 4.0, 'b': 4.0, 'c': 1.0, '$total': 9.0},
+                                      [['12:00', '13:00', '1.0'], ['17:00', '18:00', '1.0']], meta())),
+    ('a 9-10\nb 8-9\nc 14-15', ({'a': 1.0, 'b': 1.0, 'c': 1.0, '$total': 3.0},
+                              [['10:00', '14:00', '4.0'], ['15:00', '20:00', '5.0']], meta())),
+]
+
+
+@pytest.mark.parametrize('hours, expected', afternoon_start_calcs)
+def test_afternoon_start_not_shifted(hour_calculator, hours, expected):
+    """A start already at or after 12:00 is never moved another 12h by ordered-mode PM inference."""
+    assert hour_calculator(hours).calculate(ordered=True) == expected
+
+
 def test_multiword_id(hour_calculator):
     """IDs containing spaces (e.g. 'test: capsa:') are parsed correctly and reported in detected_ids."""
     hours = 'test: capsa: 2-3'
     output = hour_calculator(hours).calculate(ordered=True)
     assert output == ({'test: capsa:': 1.0, '$total': 1.0}, [], meta(detected_ids=['test: capsa:']))
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_parse_once_evaluate_modes(ordered):
+    """Evaluating a single ParsedInput in either mode matches a full process_input call and leaves it unchanged."""
+    hours = 'a 8-10\n b 10-1, 2-6\n c 7-8\n test: capsa: 06:30-7\n \\=12'
+    parsed = parse_input(hours)
+    snapshot = hash(parsed)
+    assert evaluate(parsed, ordered=ordered) == process_input(hours, ordered=ordered)
+    assert evaluate(parsed, ordered=not ordered) == process_input(hours, ordered=not ordered)
+    assert hash(parsed) == snapshot
@@ -0,0 +1,59 @@
+import multiprocessing
+import os
+import sys
+from concurrent.futures import BrokenExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import batch
+from batch import iter_batch, run_batch
+
+documents = [
+    'oh 1-2',
+    'a 7-8\n b 7-8',
+    'c 8-11, 4-5\n oh 12-4\n other 18-9',
+    'not a time line',
+    'id1 6-8\n id2 8-10\n id3 10-11:33\n \\=5.6',
+] * 7
+_run_chunk = batch._run_chunk
+
+
+def _die_on_poison(engine, ordered, texts):
+    """Stands in for batch._run_chunk in a forked worker: a 'poison' document takes the whole process down."""
+    if 'poison' in texts:
+        os._exit(1)
+    return _run_chunk(engine, ordered, texts)
+
+
+@pytest.mark.parametrize('ordered', [True, False])
+def test_run_batch_v2_in_order(ordered, reference, normalize):
+    outcomes, stats = run_batch(documents, ordered=ordered, workers=2, chunk_size=3)
+    assert [normalize(o) for o in outcomes] == [reference(t, ordered) for t in documents]
+    assert stats['documents'] == len(documents)
+    assert sum(w['documents'] for w in stats['workers'].values()) == len(documents)
+    assert all(w['per_second'] > 0 for w in stats['workers'].values())
+
+
+def test_iter_batch_v1_keeps_going_after_errors():
+    outcomes = list(iter_batch(iter(documents), engine='v1', workers=2, chunk_size=4))
+    assert len(outcomes) == len(documents)
+    assert outcomes[0] == ({'oh': 1.0, '$total': 1.0}, [], {'target_time': None})
+    assert isinstance(outcomes[1], RuntimeError)
+    assert outcomes[2][0] == {'c': 4.0, 'oh': 4.0, 'other': 3.0, '$total': 11.0}
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        run_batch(documents, engine='v3')
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers must inherit the patched _run_chunk')
+def test_dead_worker_fails_only_its_chunk(monkeypatch, reference, normalize):
+    monkeypatch.setattr(batch, '_run_chunk', _die_on_poison)
+    texts = documents[:5] + ['oh 1-2', 'a 7-8\n b 8-9', 'poison', 'c 9-10', 'd 10-11'] + documents[:15]
+    outcomes, stats = run_batch(texts, workers=2, chunk_size=5)
+    assert all(isinstance(o, BrokenExecutor) for o in outcomes[5:10])
+    expected = [reference(t, True) for t in texts]
+    assert [normalize(o) for o in outcomes[:5] + outcomes[10:]] == expected[:5] + expected[10:]
+    assert stats['documents'] == len(texts)
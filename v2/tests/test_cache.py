@@ -0,0 +1,100 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import cache as cache_module
+from cache import ResultCache, SQLiteCache, cache_key, normalize_input
+from calculator import process_input
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_normalize_ignores_whitespace_comments_and_target_position():
+    a = 'a 8-10  # meeting\n\n  b 10-12\n\\=4'
+    b = '\\=4\\na 8-10\nb 10-12 // notes'
+    assert normalize_input(a) == normalize_input(b) == 'a 8-10\nb 10-12\n\\=4'
+    assert cache_key(a, 'v2', True) == cache_key(b, 'v2', True)
+    assert cache_key(a, 'v2', True) != cache_key(a, 'v2', False)
+    assert cache_key(a, 'v2', True) != cache_key(a, 'v1', True)
+
+
+def test_hit_returns_independent_copy():
+    cache = ResultCache()
+    assert cache.get('k') is None
+    result = process_input('a 8-10\nb 10-12', True)
+    cache.put('k', result)
+    result[1].append(['x', 'y', 'z'])
+    first = cache.get('k')
+    first[0].pop('$total')
+    second = cache.get('k')
+    assert second[0]['$total'] == 4.0
+    assert second[1] == []
+    assert cache.stats() == {'hits': 2, 'misses': 1, 'size': 1, 'maxsize': 512}
+
+
+def test_only_calculation_errors_are_cached():
+    cache = ResultCache()
+    cache.put('bad', ValueError('bad sheet'))
+    cache.put('crash', TypeError('bug'))
+    error = cache.get('bad')
+    assert isinstance(error, ValueError) and str(error) == 'bad sheet'
+    assert cache.get('crash') is None
+
+
+def test_size_and_ttl_eviction():
+    clock = FakeClock()
+    cache = ResultCache(maxsize=2, ttl=10, clock=clock)
+    for key in 'abc':
+        cache.put(key, ({key: 1.0}, [], {}))
+    assert len(cache) == 2
+    assert cache.get('a') is None  # the least recently used
+    assert cache.get('c') is not None
+
+    clock.now = 11
+    assert cache.get('c') is None
+    assert cache.hits == 1
+
+
+def test_sqlite_tier_shared_between_workers(tmp_path):
+    path = str(tmp_path / 'results.db')
+    worker_a = ResultCache(backing=SQLiteCache(path))
+    worker_b = ResultCache(backing=SQLiteCache(path))
+    key = cache_key('a 8-10\nb 10-1', 'v2', True)
+    expected = process_input('a 8-10\nb 10-1', True)
+
+    worker_a.put(key, expected)
+    assert worker_b.get(key) == expected
+
+    with pytest.raises(ValueError) as error:
+        process_input('a 8', True)
+    worker_b.put('err', error.value)
+    assert isinstance(worker_a.get('err'), ValueError)
+
+
+def test_sqlite_tier_prunes_least_recently_used(tmp_path):
+    disk = SQLiteCache(str(tmp_path / 'results.db'), maxsize=3)
+    for key in 'abcd':
+        disk.put(key, ({key: 1.0}, [], {}))
+    assert len(disk) == 3
+    assert disk.get('a') is None
+    assert disk.get('d') == ({'d': 1.0}, [], {})
+
+
+def test_engine_version_in_key(monkeypatch):
+    key = cache_key('a 8-10', 'v2', True)
+    monkeypatch.setattr(cache_module, 'ENGINE_VERSION', 'next-deploy')
+    assert cache_key('a 8-10', 'v2', True) != key
+
+
+def test_engine_version_covers_result_shaping_sources():
+    names = {os.path.basename(path) for path in cache_module._ENGINE_SOURCES}
+    assert {'calculator.py', 'formatting.py', 'methods.py', 'hour_calculator.py'} <= names
@@ -0,0 +1,63 @@
+import pytest
+
+import v2.app as v2_app
+
+
+def _compare(client, text, target=''):
+    response = client.post('/v2/compare', data={'input': text, 'target': target})
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_methods_agree(client):
+    reply = _compare(client, 'a 8-10\nb 10-12')
+    assert set(reply) == {'notes', 'details', 'methods_differ', 'any_error'}
+    assert reply['methods_differ'] is False and reply['any_error'] is False
+    assert 'All calculation methods agree.' in reply['details']
+    assert 'Disagreement' not in reply['notes']
+
+
+def test_failed_ordered_run(client):
+    reply = _compare(client, 'b 9-8\na 7-8')  # ordered fails, unordered calculates
+    assert reply['any_error'] is True
+    assert reply['methods_differ'] is True
+    assert 'Double charging or invalid range' in reply['details']
+    assert '11.0 hrs' in reply['details']  # b from the methods that succeeded
+
+
+def test_failed_unordered_run(client):
+    reply = _compare(client, 'a 7-12\nb 1-8')  # ordered calculates, unordered double charges
+    assert reply['any_error'] is True
+    assert 'Double charging or invalid range: 7:00-8:00' in reply['details']
+
+
+def test_every_method_fails(client):
+    reply = _compare(client, 'bad')
+    assert reply['any_error'] is True
+    assert 'All calculation methods failed.' in reply['details']
+
+
+def test_bad_request(client):
+    response = client.post('/v2/compare', data={'target': '8'})
+    assert response.status_code == 400
+    assert set(response.get_json()) == {'error'}
+    assert client.get('/v2/compare').status_code == 405
+
+
+def test_lazy_page_defers_the_comparison(client, monkeypatch):
+    monkeypatch.setattr(v2_app, 'EAGER_COMPARE', False)
+    page = client.post('/v2/', data={'input': 'a 8-10\nb 10-12', 'target': ''}).get_data(as_text=True)
+    assert '/v2/compare' in page
+    assert 'All calculation methods agree.' not in page
+
+
+@pytest.mark.parametrize('text', ['a 8-10\nb 10-12', 'a 8-10\n c 1-2\n b 10-1, 2-6', 'b 9-8\na 7-8', 'a 7-12\nb 1-8',
+                                  'bad'])
+def test_lazy_and_eager_render_the_same_comparison(client, monkeypatch, text):
+    form = {'input': text, 'target': '6'}
+    reply = _compare(client, text, '6')
+    monkeypatch.setattr(v2_app, 'EAGER_COMPARE', True)
+    page = client.post('/v2/', data=form).get_data(as_text=True)
+    assert reply['details'].strip() in page
+    assert reply['notes'].strip() in page
+    assert ('id="more-details" style="display:block;"' in page) == reply['methods_differ']
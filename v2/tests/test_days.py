@@ -0,0 +1,62 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from calculator import process_days, process_input, split_days
+
+week = '''\\=8
+Mon 5/6:
+a 8-12
+b 1-5  # after lunch
+2024-05-07
+a 9-11, 12-3
+5/6
+c 5-6
+Wed 5/8
+x 7-8
+y 7:30-9
+'''
+
+
+def test_split_days():
+    assert split_days(week) == [
+        ('Mon 5/6', '\\=8\na 8-12\nb 1-5  # after lunch\nc 5-6'),
+        ('2024-05-07', '\\=8\na 9-11, 12-3'),
+        ('Wed 5/8', '\\=8\nx 7-8\ny 7:30-9'),
+    ]
+
+
+def test_split_days_combines_spellings_of_a_date():
+    assert split_days('5/6\na 8-9\n05/06\nb 9-10\n5/6/24\nc 1-2\n2024-05-06\nd 2-3') == [
+        ('5/6', 'a 8-9\nb 9-10'),
+        ('5/6/24', 'c 1-2\nd 2-3'),
+    ]
+
+
+def test_split_days_without_headers():
+    assert split_days('a 8-12\nb 1-5') == [(None, 'a 8-12\nb 1-5')]
+
+
+def test_split_days_entries_before_header():
+    with pytest.raises(ValueError):
+        split_days('a 8-12\n5/6\nb 1-5')
+
+
+@pytest.mark.parametrize('workers', [None, 2])
+def test_process_days(workers):
+    days, totals = process_days(week, ordered=True, workers=workers)
+    assert [day['date'] for day in days] == ['Mon 5/6', '2024-05-07', 'Wed 5/8']
+    assert days[0]['results'] == process_input('\\=8\na 8-12\nb 1-5\nc 5-6', ordered=True)[0]
+    assert days[1]['metadata']['target_time'] == '5:58pm'
+    assert days[2]['error'].startswith('Double charging or invalid range')
+    assert totals == {'a': 9.0, 'b': 4.0, 'c': 1.0, '$total': 14.0}
+
+
+def test_am_pm_inferred_per_day():
+    """Ordered inference restarts each day: Tuesday's 7-9 is morning even though Monday ended at 5pm."""
+    days, totals = process_days('5/6\na 8-12\nb 1-5\n5/7\na 7-9', ordered=True)
+    assert days[1]['results'] == {'a': 2.0, '$total': 2.0}
+    assert days[1]['breaks'] == []
+    assert totals == {'a': 6.0, 'b': 4.0, '$total': 10.0}
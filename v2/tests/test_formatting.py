@@ -0,0 +1,53 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import formatting
+from calculator import process_input
+
+
+def _legacy_12h(minute):
+    day, minute = divmod(minute, 24 * 60)
+    h, m = divmod(minute, 60)
+    suffix = f" (+{day} day{'s' if day > 1 else ''})" if day else ''
+    return f"{h % 12 or 12}:{m:02d}{'am' if h < 12 else 'pm'}{suffix}"
+
+
+def test_tables_cover_every_minute():
+    for minute in range(formatting.DAY):
+        h, m = divmod(minute, 60)
+        assert formatting.hhmm(minute) == f'{h}:{m:02d}'
+        assert formatting.minutes(f'{h}:{m:02d}') == minute
+        assert formatting.clock_12h(minute) == _legacy_12h(minute)
+
+
+def test_times_past_midnight():
+    assert formatting.hhmm(1530) == '25:30'
+    assert formatting.minutes('25:30') == 1530
+    assert formatting.clock_12h(1530) == '1:30am (+1 day)'
+    assert formatting.display_12h(2 * 1440 + 720) == '12:00 PM (+2 days)'
+
+
+def test_break_display():
+    assert formatting.break_display(750, 810, 1.0) == '12:30 PM – 1:30 PM  (60 min / 1.00 hrs)'
+    assert formatting.break_from_triple(['12:30', '13:30', '1.0']) == (750, 810, 1.0)
+
+
+def test_numeric_breaks():
+    sheet = 'a 8-10\nb 11-12:20, 23-1:30'
+    _, breaks, _ = process_input(sheet)
+    assert breaks == [['10:00', '11:00', '1.0'], ['12:20', '23:00', '10.67']]
+    _, numeric, _ = process_input(sheet, numeric_breaks=True)
+    assert numeric == [(600, 660, 1.0), (740, 1380, 640 / 60)]
+
+
+def test_site_shares_one_copy_of_the_tables():
+    import main
+    assert 'v2.formatting' not in sys.modules
+    assert main.v1_short_12h is formatting.v1_short_12h
+
+
+def test_v1_page_break_spelling():
+    from main import format_breaks
+    assert format_breaks([['0:30', '12:15', '0.5'], ['13:05', '25:00', '1']]) == [['0:30a', '12:15p', '0.5'],
+                                                                                ['1:05p', '13:00p', '1']]
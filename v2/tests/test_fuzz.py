@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import fuzz
+from calculator import process_input
+
+
+def test_fixtures_still_agree():
+    for fixture in fuzz.load_fixtures():
+        reference, candidate = fixture['pair'].split(':')
+        assert fuzz.disagreement(fixture['input'], reference, candidate, fixture['ordered']) is None, fixture
+
+
+def test_generated_cases_are_mostly_valid():
+    outcomes = []
+    for seed in range(300):
+        try:
+            process_input(fuzz.generate_case(random.Random(seed)), ordered=True)
+            outcomes.append('ok')
+        except (ValueError, RuntimeError) as e:
+            outcomes.append(type(e).__name__)
+    assert {'ok', 'ValueError', 'RuntimeError'} <= set(outcomes)
+    assert outcomes.count('ok') > 100
+
+
+def test_fast_engines_agree_with_process_input():
+    assert list(fuzz.fuzz(400, seed=123, workers=1, chunk_size=100)) == []
+
+
+def test_mismatches_shrink_and_save(monkeypatch, tmp_path):
+    batch, family = fuzz.ENGINES['batch']
+
+    def off_by_a_tenth_after_noon(texts, ordered):
+        outcomes = batch(texts, ordered)
+        for text, outcome in zip(texts, outcomes):
+            if not isinstance(outcome, Exception) and 'p' in text.replace('capsa', ''):
+                outcome[0]['$total'] += 0.1
+        return outcomes
+
+    monkeypatch.setitem(fuzz.ENGINES, 'broken', (off_by_a_tenth_after_noon, family))
+    found = list(fuzz.fuzz(200, pairs=[('v2', 'broken')], workers=1))
+    assert found
+    seed, pair, ordered = found[0]
+    text = fuzz.shrink(fuzz.generate_case(random.Random(seed)), 'v2', 'broken', ordered)
+    assert '\n' not in text and text.count('-') == 1 and 'p' in text
+    assert fuzz.disagreement(text, 'v2', 'broken', ordered)
+
+    path = str(tmp_path / 'fixtures.json')
+    assert fuzz.save_fixture(text, pair, ordered, path)
+    assert not fuzz.save_fixture(text, pair, ordered, path)
+    assert fuzz.load_fixtures(path) == [{'pair': 'v2:broken', 'ordered': ordered, 'input': text}]
@@ -0,0 +1,61 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from merge import DoubleChargeError, merge_intervals, sweep
+
+
+def _scan_merge(hours_dict):
+    """Reference walk using the old linear _next_charge scan."""
+    hours_copy = {code: [data[i:i + 2] for i in range(0, len(data), 2)] for code, data in hours_dict.items()}
+    order = []
+    while hours_copy:
+        nxt = None
+        nxt_start = None
+        for code, data in hours_copy.items():
+            if nxt is None or data[0][0] <= nxt_start:
+                nxt = code
+                nxt_start = data[0][0]
+        order.append((nxt, ) + tuple(hours_copy[nxt][0]))
+        if len(hours_copy[nxt]) > 1:
+            hours_copy[nxt] = hours_copy[nxt][1:]
+        else:
+            del hours_copy[nxt]
+    return order
+
+
+def test_ties_last_one_wins():
+    hours = {'a': [8, 9], 'b': [8, 10], 'c': [8, 8.5]}
+    assert [code for code, _, _ in merge_intervals(hours)] == ['c', 'b', 'a']
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_matches_linear_scan(seed):
+    rng = random.Random(seed)
+    hours = {}
+    for i in range(rng.randint(1, 30)):
+        start = rng.randint(0, 20)
+        data = []
+        for _ in range(rng.randint(1, 5)):
+            end = start + rng.randint(0, 3)
+            data += [start, end]
+            start = end + rng.randint(0, 2)
+        hours[f'id{i}'] = data
+    assert list(merge_intervals(hours)) == _scan_merge(hours)
+
+
+def test_sweep_breaks_and_charges():
+    hours = {'c': [8, 12, 16, 17], 'oh': [12, 16], 'other': [18, 21]}
+    charges, breaks = sweep(hours)
+    assert charges == {'c': 5, 'oh': 4, 'other': 3}
+    assert breaks == [(17, 18)]
+    assert hours == {'c': [8, 12, 16, 17], 'oh': [12, 16], 'other': [18, 21]}
+
+
+def test_sweep_double_charge():
+    with pytest.raises(DoubleChargeError) as e:
+        sweep({'a': [7, 8], 'b': [7, 8]})
+    assert (e.value.start, e.value.last_time) == (7, 8)
@@ -0,0 +1,115 @@
+import os
+import sys
+import multiprocessing
+import threading
+from concurrent.futures import BrokenExecutor
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import methods
+from cache import ResultCache
+from methods import ALL_METHODS, MethodExecutor
+
+sheet = 'a 8-10\n b 10-1, 2-6\n c 7-8'
+_calculate = methods._calculate
+
+
+def _die_on_v1(engine, text, orders, trace=False):
+    """Stands in for methods._calculate in a forked worker: v1 takes the whole process down."""
+    if engine == 'v1':
+        os._exit(1)
+    return _calculate(engine, text, orders, trace)
+
+
+@pytest.mark.parametrize('kind', ['thread', 'process'])
+def test_all_methods_match_direct_calls(kind, reference, normalize):
+    executor = MethodExecutor(kind=kind, workers=2)
+    try:
+        outcomes = executor.run(sheet)
+    finally:
+        executor.shutdown()
+    assert list(outcomes) == list(ALL_METHODS)
+    for (engine, ordered), outcome in outcomes.items():
+        assert normalize(outcome) == reference(sheet, ordered, engine, numeric_breaks=True)
+
+
+def test_cache_hits_skip_the_pool(normalize):
+    cache = ResultCache()
+    executor = MethodExecutor()
+    first = executor.run(sheet, cache=cache)
+    second = executor.run(sheet, cache=cache)
+    executor.shutdown()
+    assert [normalize(o) for o in first.values()] == [normalize(o) for o in second.values()]
+    assert all(o.seconds == 0.0 for o in second.values())
+    assert cache.hits == 4
+
+
+def test_slow_method_times_out(monkeypatch, reference):
+    release = threading.Event()
+    calculate = methods._calculate
+
+    def slow_v1(engine, text, orders, trace=False):
+        if engine == 'v1':
+            release.wait(5)
+        return calculate(engine, text, orders, trace)
+
+    monkeypatch.setattr(methods, '_calculate', slow_v1)
+    cache = ResultCache()
+    executor = MethodExecutor(timeout=0.2)
+    try:
+        outcomes = executor.run(sheet, cache=cache)
+    finally:
+        release.set()
+        executor.shutdown()
+    assert outcomes['v2', True].result == reference(sheet, True, numeric_breaks=True)
+    assert isinstance(outcomes['v1', True].error, TimeoutError)
+    assert isinstance(outcomes['v1', False].error, TimeoutError)
+    assert len(cache) == 2  # timeouts are not cached
+
+
+def test_unknown_pool_kind():
+    with pytest.raises(ValueError):
+        MethodExecutor(kind='fiber')
+
+
+def test_v1_on_threads_leaves_stdout_alone(capsys):
+    stdout = sys.stdout
+    executor = MethodExecutor(workers=4)
+    try:
+        for _ in range(10):
+            executor.run(sheet)
+    finally:
+        executor.shutdown()
+    assert sys.stdout is stdout
+    assert capsys.readouterr().out == ''
+
+
+def test_v2_modes_share_one_parse(monkeypatch, reference):
+    parses = []
+    parse_input = methods.parse_input
+    monkeypatch.setattr(methods, 'parse_input', lambda text: parses.append(text) or parse_input(text))
+    executor = MethodExecutor()
+    try:
+        outcomes = executor.run(sheet)
+    finally:
+        executor.shutdown()
+    assert parses == [sheet]
+    assert outcomes['v2', False].result == reference(sheet, False, numeric_breaks=True)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers must inherit the patched _calculate')
+def test_dead_worker_is_not_cached_and_the_pool_recovers(monkeypatch, reference):
+    cache = ResultCache()
+    executor = MethodExecutor(kind='process', workers=2)
+    try:
+        monkeypatch.setattr(methods, '_calculate', _die_on_v1)
+        crashed = executor.run(sheet, cache=cache)
+        monkeypatch.undo()
+        assert isinstance(crashed['v1', True].error, BrokenExecutor)
+        assert len(cache) == 2  # only the v2 outcomes _calculate returned
+        outcomes = executor.run(sheet, cache=cache)
+    finally:
+        executor.shutdown()
+    assert all(o.error is None for o in outcomes.values())
+    assert outcomes['v1', True].result == reference(sheet, True, 'v1', numeric_breaks=True)
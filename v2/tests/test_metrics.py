@@ -0,0 +1,106 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import metrics
+from metrics import Registry
+
+
+def test_counter_exposition():
+    registry = Registry()
+    errors = registry.counter('errors_total', 'Errors.', ['engine', 'error'])
+    errors.labels('v2', 'ValueError').inc()
+    errors.labels('v2', 'ValueError').inc(2)
+    errors.labels('v1', 'say "hi"\n').inc()
+    assert registry.exposition() == ('# HELP errors_total Errors.\n'
+                                     '# TYPE errors_total counter\n'
+                                     'errors_total{engine="v1",error="say \\"hi\\"\\n"} 1\n'
+                                     'errors_total{engine="v2",error="ValueError"} 3\n')
+    with pytest.raises(ValueError):
+        errors.labels('v2')
+    with pytest.raises(ValueError):
+        registry.counter('errors_total', 'Again.')
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency.', ['mode'], buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.labels('ordered').observe(value)
+    lines = registry.exposition().splitlines()[2:]
+    assert lines == [
+        'latency_seconds_bucket{mode="ordered",le="0.1"} 2',
+        'latency_seconds_bucket{mode="ordered",le="1"} 3',
+        'latency_seconds_bucket{mode="ordered",le="+Inf"} 4',
+        'latency_seconds_sum{mode="ordered"} 3.65',
+        'latency_seconds_count{mode="ordered"} 4',
+    ]
+
+
+def test_concurrent_observations():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency.', ['engine'])
+
+    def observe():
+        for _ in range(2000):
+            latency.labels('v2').observe(0.001)
+
+    threads = [threading.Thread(target=observe) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 'latency_seconds_count{engine="v2"} 16000' in registry.exposition()
+
+
+def test_callback_metric():
+    registry = Registry()
+    stats = {('memory', 'hit'): 4, ('memory', 'miss'): 1}
+    registry.callback('lookups_total', 'Lookups.', lambda: stats, ['tier', 'result'], kind='counter')
+    assert registry.exposition().splitlines()[1:] == [
+        '# TYPE lookups_total counter',
+        'lookups_total{tier="memory",result="hit"} 4',
+        'lookups_total{tier="memory",result="miss"} 1',
+    ]
+
+
+def test_record_calculation():
+    before = metrics.registry.exposition()
+    assert 'engine="test"' not in before
+    metrics.record_calculation('test', True, 0.002)
+    metrics.record_calculation('test', True, None, RuntimeError('Double charging'))
+    metrics.record_calculation('test', False, 5.0, TimeoutError())
+    after = metrics.registry.exposition()
+    assert 'stc_calculation_seconds_count{engine="test",mode="ordered"} 1' in after
+    assert 'stc_calculation_errors_total{engine="test",mode="ordered",error="RuntimeError"} 1' in after
+    assert 'stc_calculation_errors_total{engine="test",mode="unordered",error="TimeoutError"} 1' in after
+
+
+def _samples(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type == metrics.CONTENT_TYPE
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_endpoint(client):
+    request_count = 'stc_http_requests_total{endpoint="v2.index",status="200"}'
+    misses = 'stc_cache_lookups_total{tier="memory",result="miss"}'
+    hits = 'stc_cache_lookups_total{tier="memory",result="hit"}'
+    before = _samples(client)
+    form = {'input': 'metrics 8-10', 'target': ''}  # a sheet no other test submits
+    client.post('/v2/', data=form)
+    client.post('/v2/', data=form)
+    after = _samples(client)
+    assert after[request_count] == before.get(request_count, 0) + 2
+    assert after[misses] >= before.get(misses, 0) + 1
+    assert after[hits] >= before.get(hits, 0) + 1
+    assert after['stc_http_requests_total{endpoint="metrics_page",status="200"}'] >= 1
@@ -0,0 +1,52 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import calculator
+from calculator import process_many
+
+
+def _random_sheet(rng):
+    lines = []
+    t = rng.randint(6, 9) * 60
+    for _ in range(rng.randint(1, 6)):
+        ranges = []
+        for _ in range(rng.randint(1, 3)):
+            start = t + rng.choice([0, 0, 10, -30])
+            t = start + rng.randint(1, 180)
+            ranges.append(f'{start // 60 % 12 or 12}:{start % 60:02d}-{t // 60 % 12 or 12}:{t % 60:02d}')
+        lines.append(f'id{rng.randint(1, 4)} ' + ', '.join(ranges))
+    if rng.random() < 0.3:
+        lines.append(f'\\={rng.randint(40, 100) / 10}')
+    return '\n'.join(lines)
+
+
+documents = [
+    'oh 1-2',
+    'a 7-8\n b 7-8',
+    'a 8-10\n c 1-2\n b 10-1, 2-6',
+    'c 8-11, 4-5\n oh 12-4\n other 18-9',
+    'id1 6-8\n id2 8-10\n id3 10-11:33\n \\=5.6',
+    'not a time line',
+    '',
+]
+
+
+@pytest.mark.parametrize('vectorized', [True, False])
+@pytest.mark.parametrize('ordered', [True, False])
+def test_process_many_matches_scalar(monkeypatch, reference, normalize, vectorized, ordered):
+    if not vectorized:
+        monkeypatch.setattr(calculator, 'np', None)
+    elif calculator.np is None:
+        pytest.skip('NumPy not installed')
+    rng = random.Random(7)
+    texts = documents + [_random_sheet(rng) for _ in range(300)]
+    outcomes = process_many(texts, ordered=ordered)
+    assert [normalize(o) for o in outcomes] == [reference(t, ordered) for t in texts]
+
+
+def test_process_many_empty():
+    assert process_many([]) == []
@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import profiling
+from calculator import process_input
+
+STAGES = ['strip_comments', 'parse_encoding', 'scan_line', 'format_ranges', 'build_hours', 'ordered_starts',
+          'mil_times', 'merge', 'format', 'rounding']
+
+
+@pytest.fixture
+def reports():
+    received = []
+    profiling.add_hook(received.append)
+    yield received
+    profiling.remove_hook(received.append)
+
+
+def test_not_profiled_by_default():
+    results, breaks, metadata = process_input('a 9-10\nb 11-12', ordered=True)
+    assert 'profile' not in metadata
+    assert profiling.current() is None
+
+
+def test_stages():
+    results, breaks, metadata = process_input('a 9-10\nb 11-1\n\\=8', ordered=True, profile=True)
+    assert results == {'a': 1.0, 'b': 2.0, '$total': 3.0}
+    profile = metadata['profile']
+    assert list(profile['stages']) == STAGES
+    assert profile['stages']['scan_line']['calls'] == 2
+    assert all(stage['seconds'] >= 0 for stage in profile['stages'].values())
+    assert sum(stage['seconds'] for stage in profile['stages'].values()) <= profile['seconds']
+    assert 'blocks' not in profile['stages']['merge']
+    assert 'ordered_starts' not in process_input('a 9-10', profile=True)[2]['profile']['stages']
+
+
+def test_allocations():
+    profile = process_input('a 9-10\nb 11-1', ordered=True, profile='allocations')[2]['profile']
+    for stage in profile['stages'].values():
+        assert set(stage) == {'calls', 'seconds', 'blocks', 'peak_bytes'}
+        assert stage['peak_bytes'] >= 0
+
+
+def test_hooks(reports):
+    metadata = process_input('a 9-10', ordered=False)[2]
+    assert 'profile' not in metadata
+    with pytest.raises(RuntimeError):
+        process_input('a 9-11\nb 10-12', ordered=True)
+    assert [report['mode'] for report in reports] == ['unordered', 'ordered']
+    assert reports[0]['error'] is None
+    assert reports[1]['error'].startswith('Double charging')
+    assert 'mil_times' in reports[1]['stages'] and 'rounding' not in reports[1]['stages']
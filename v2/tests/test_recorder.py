@@ -0,0 +1,33 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from calculator import process_input
+from recorder import CorpusRecorder, sanitize
+
+
+def test_sanitize_keeps_the_calculation():
+    text = 'capsa 9-10, 11-12  # with the customer\nBig Client 10-11\n\\=8\ncapsa 1-2\n// done'
+    assert sanitize(text) == 'id1 9-10, 11-12\nid 2 10-11\n\\=8\nid1 1-2'
+    original, sanitized = (process_input(t, ordered=True) for t in (text, sanitize(text)))
+    assert sorted(original[0].values()) == sorted(sanitized[0].values())
+    assert original[1] == sanitized[1]
+
+
+def test_sanitize_keeps_failures():
+    with pytest.raises(ValueError):
+        process_input(sanitize('oh 9-10\nremember to file the TPS report'))
+
+
+def test_recorder_appends(tmp_path):
+    path = tmp_path / 'corpus.jsonl'
+    path.write_text('{"route":"/","form":{"time_input":"a 1-2"},"time":0}\n')
+    recorder = CorpusRecorder(str(path))
+    recorder.record('/v2/', {'input': 'secret 9-10', 'target': '7.5'})
+    lines = path.read_text().splitlines()
+    assert len(lines) == 2
+    record = json.loads(lines[1])
+    assert (record['route'], record['form']) == ('/v2/', {'input': 'id1 9-10', 'target': '7.5'})
@@ -0,0 +1,46 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from rounding import round_to_tenths
+
+rounding_calcs = [
+    # seconds, 360 per tenth
+    ({'id1': 5160, 'id2': 5220, 'id3': 1560}, 360, ({'id1': 14, 'id2': 15, 'id3': 4}, 33)),
+    ({'id1': 8820, 'id2': 8820, 'id3': 1560}, 360, ({'id1': 24, 'id2': 25, 'id3': 4}, 53)),
+    # thousandths of an hour, 100 per tenth
+    ({'a': 1433, 'b': 1433, 'c': 1433}, 100, ({'a': 15, 'b': 14, 'c': 14}, 43)),
+    # three tenths to make up (the old float loop stopped after two)
+    ({c: 1040 for c in 'abcdefgh'}, 100, ({'a': 11, 'b': 11, 'c': 11, 'd': 10, 'e': 10, 'f': 10, 'g': 10, 'h': 10}, 83)),
+]
+
+
+@pytest.mark.parametrize('amounts, unit, expected', rounding_calcs)
+def test_round_to_tenths(amounts, unit, expected):
+    assert round_to_tenths(amounts, unit) == expected
+
+
+def test_given_total():
+    # 25.35 + 2.1 rounds to 27.4 from exact thousandths; a caller rounding a float sum may ask for 27.5
+    assert round_to_tenths({'x1': 2100, 'b': 25350}, 100) == ({'x1': 21, 'b': 253}, 274)
+    assert round_to_tenths({'x1': 2100, 'b': 25350}, 100, 275) == ({'x1': 21, 'b': 254}, 275)
+
+
+def test_given_rounding():
+    # b's float 1.4500000000000002 rounds up; the total is then made up from capsa
+    amounts = {'b': 1450, 'capsa': 12350, 'a': 9500}
+    assert round_to_tenths(amounts, 100, 233) == ({'b': 14, 'capsa': 124, 'a': 95}, 233)
+    assert round_to_tenths(amounts, 100, 233, {'b': 15, 'capsa': 124, 'a': 95}) == ({'b': 15, 'capsa': 123, 'a': 95}, 233)
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_parts_add_up_to_total(seed):
+    rng = random.Random(seed)
+    for _ in range(200):
+        amounts = {f'id{i}': rng.randint(0, 36000) for i in range(rng.randint(1, 40))}
+        tenths, total = round_to_tenths(amounts, 360)
+        assert sum(tenths.values()) == total
+        assert all(abs(tenths[code] * 360 - amount) < 360 for code, amount in amounts.items())
@@ -0,0 +1,103 @@
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from calculator import process_input
+from session import CalculationSession
+
+
+def _outcome(calculate):
+    try:
+        return calculate()
+    except (ValueError, RuntimeError) as e:
+        return type(e), str(e)
+
+
+def _random_line(rng):
+    r = rng.random()
+    if r < 0.05:
+        return ''
+    if r < 0.08:
+        return '# lunch'
+    if r < 0.12:
+        return '\\=' + rng.choice(['4', '7.5', 'x', '0'])
+    parts = []
+    start = rng.randint(1, 12)
+    for _ in range(rng.randint(1, 3)):
+        end = start + rng.randint(0, 3)
+        parts.append(f"{start}-{end if end <= 23 else end - 12}{rng.choice(['', '', '', 'pm', 'am'])}")
+        start = (end + rng.randint(0, 2) - 1) % 12 + 1
+    return rng.choice(['a', 'b', 'c', 'd e', 'f']) + ' ' + ', '.join(parts)
+
+
+def test_append_matches_full_recompute():
+    session = CalculationSession('a 8-10\nb 10-12', ordered=True)
+    session.append('c 1-2')
+    session.append('\\=6')
+    assert session.results() == process_input('a 8-10\nb 10-12\nc 1-2\n\\=6', ordered=True)
+
+
+@pytest.mark.parametrize('text', ['a 8-12\nb 1-5\nc 18:00-19:00', 'a 9-10\nb 8-9\nc 14-15'])
+def test_afternoon_start_not_shifted(text):
+    session = CalculationSession(text, ordered=True)
+    assert session.results() == process_input(text, ordered=True)
+    _, breaks, _ = session.results()
+    assert all(int(end.split(':')[0]) < 24 for _, end, _ in breaks)
+
+
+def test_edit_and_delete():
+    session = CalculationSession('a 8-10\nb 10-12\na 1-3', ordered=True)
+    session.replace(1, 'b 10-11:30')
+    assert session.results() == process_input('a 8-10\nb 10-11:30\na 1-3', ordered=True)
+    session.delete(0)
+    assert session.text == 'b 10-11:30\na 1-3'
+    assert session.results() == process_input(session.text, ordered=True)
+
+
+def test_night_shift_edits_move_later_ids():
+    session = CalculationSession('a 10p-11p\nb 11p-12a\nc 1a-3a', ordered=False)
+    assert session.results() == process_input(session.text)
+    session.replace(1, 'b 11p-1a')
+    assert session.results() == process_input(session.text)
+    session.delete(0)
+    assert session.results() == process_input(session.text)
+    session.replace(0, 'b 11p-1')
+    assert _outcome(session.results) == _outcome(lambda: process_input(session.text))
+
+
+def test_invalid_line_leaves_session_unchanged():
+    session = CalculationSession('a 8-10')
+    with pytest.raises(ValueError):
+        session.append('b lunch')
+    with pytest.raises(ValueError):
+        session.replace(0, 'a 8-')
+    assert session.text == 'a 8-10'
+    assert session.results()[0] == {'a': 2.0, '$total': 2.0}
+
+
+def test_calculation_errors_raised_by_results():
+    session = CalculationSession('a 8-10', ordered=False)
+    session.append('b 9-11')
+    with pytest.raises(RuntimeError, match='Double charging'):
+        session.results()
+    session.replace(1, 'b 10-11')
+    assert session.results()[0] == {'a': 2.0, 'b': 1.0, '$total': 3.0}
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_random_edits_match_full_recompute(seed):
+    rng = random.Random(seed)
+    ordered = rng.random() < 0.6
+    session = CalculationSession('\n'.join(_random_line(rng) for _ in range(rng.randint(0, 6))), ordered=ordered)
+    for _ in range(12):
+        op = rng.random()
+        if op < 0.5 or not len(session):
+            session.append(_random_line(rng))
+        elif op < 0.8:
+            session.replace(rng.randrange(len(session)), _random_line(rng))
+        else:
+            session.delete(rng.randrange(len(session)))
+        assert _outcome(session.results) == _outcome(lambda: process_input(session.text, ordered=ordered))
@@ -0,0 +1,109 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import calculator
+import hour_calculator
+from calculator import parse_input
+from tokenizer import TokenTable, scan_line
+
+
+def _regex_split(line):
+    """Reference: the regex split and explicit-start check the scanner replaced."""
+    match = re.search(r'\s+(?=\d[\d.:]*(am?|pm?)?-)', line)
+    if not match:
+        return None, None, False
+    ranges_str = line[match.end():]
+    first_time = ranges_str.split(',')[0].strip().split('-')[0].strip()
+    explicit = bool(re.search(r'\d(am|pm|a|p)$', first_time, re.IGNORECASE) or re.match(r'^0\d', first_time))
+    return line[:match.start()], [r.strip() for r in ranges_str.split(',')], explicit
+
+
+scan_lines = [
+    ('oh 1-2', ('oh', ['1-2'], False)),
+    ('a 8-8:30, 9-9:30, 11-1', ('a', ['8-8:30', '9-9:30', '11-1'], False)),
+    ('a 12am-2:30, 8-8pm', ('a', ['12am-2:30', '8-8pm'], True)),
+    ('id2 09-11, 14-15:30', ('id2', ['09-11', '14-15:30'], True)),
+    ('test: capsa: 2-3', ('test: capsa:', ['2-3'], False)),
+    ('proj 2024 8:a-9', ('proj 2024', ['8:a-9'], False)),
+    ('a\t 7:15p-8', ('a', ['7:15p-8'], True)),
+    ('a 8am9-10', (None, None, False)),
+    ('no ranges here', (None, None, False)),
+    ('', (None, None, False)),
+]
+
+
+@pytest.mark.parametrize('line, expected', scan_lines)
+def test_scan_line(line, expected):
+    assert scan_line(line) == expected
+    assert _regex_split(line) == expected
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_scan_line_matches_regex(seed):
+    rng = random.Random(seed)
+    alphabet = 'ab pm09:.-,\t'
+    for _ in range(500):
+        line = ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 25)))
+        assert scan_line(line) == _regex_split(line), line
+
+
+def test_pathological_line_is_linear():
+    """A large POST of whitespace and digits with no dash must not pin a worker.
+    The old lookahead regex is quadratic here (minutes at this size); the scanner stays well under a second."""
+    line = 'a' + ' 1' * 250000 + ' ' * 250000 + '1' * 250000
+    started = time.perf_counter()
+    assert scan_line(line) == (None, None, False)
+    with pytest.raises(ValueError):
+        parse_input(line)
+    assert time.perf_counter() - started < 2
+
+
+def test_token_table():
+    calls = []
+    table = TokenTable(lambda token: calls.append(token) or int(token), maxsize=3)
+    assert [table.lookup(t) for t in ['8', '9', '8', '8']] == [8, 9, 8, 8]
+    assert calls == ['8', '9']
+    assert table.stats() == {'hits': 2, 'misses': 2, 'hit_rate': 0.5, 'size': 2, 'maxsize': 3}
+    with pytest.raises(ValueError):
+        table.lookup('x')
+    assert len(table) == 2  # failures are not stored
+    table.lookup('10')
+    table.lookup('11')  # full: starts over
+    assert len(table) == 1
+
+
+def test_token_table_threads():
+    table = TokenTable(lambda token: int(token) * 60, maxsize=50)
+    errors = []
+
+    def work(seed):
+        rng = random.Random(seed)
+        for _ in range(5000):
+            n = rng.randrange(80)
+            if table.lookup(str(n)) != n * 60:
+                errors.append(n)
+
+    threads = [threading.Thread(target=work, args=(seed, )) for seed in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert len(table) <= 50
+
+
+def test_engines_have_their_own_tables():
+    assert calculator._time_tokens is not hour_calculator._time_tokens
+    assert calculator._time_tokens.lookup('1:30pm') == 13 * 3600 + 30 * 60
+    assert hour_calculator._time_tokens.lookup('1:30pm') == '13.5'
+    with pytest.raises(ValueError, match='Minutes must be 0–59'):
+        parse_input('a 9:75-10')
+    with pytest.raises(ValueError, match='Minutes must be 0–59'):
+        parse_input('a 9:75-10')  # raised again, not cached
@@ -0,0 +1,48 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import calculator
+import tracing
+from calculator import process_input
+
+
+@pytest.fixture
+def writer():
+    tracing.start()
+    yield
+    tracing.stop()
+
+
+def test_disabled_by_default(monkeypatch, capfd):
+    calls = []
+    monkeypatch.setattr(calculator, '_secs_to_hhmm', lambda secs: calls.append(secs) or '0:00')
+    assert not tracing.active()
+    process_input('a 8-1\n b 1-2', ordered=True)  # b's inferred PM start is only formatted when tracing
+    assert calls == []
+    assert capfd.readouterr().err == ''
+
+
+def test_only_opted_in_calculations_are_written(capfd, writer):
+    process_input('quiet 8-10', ordered=True)
+    with tracing.traced():
+        assert tracing.active()
+        process_input('loud 8-10\n later 1-2', ordered=True)
+    assert not tracing.active()
+    tracing.stop()  # flushes the queue
+    err = capfd.readouterr().err
+    assert 'later: start 1:00 → 13:00 (+12 inferred PM)' in err
+    assert "{'loud': 2.0, 'later': 1.0}" in err
+    assert 'quiet' not in err
+
+
+def test_always(capfd):
+    tracing.start(always=True)
+    try:
+        process_input('a 8-10', ordered=False)
+    finally:
+        tracing.stop()
+    assert "[unordered] per-ID results: {'a': 2.0}" in capfd.readouterr().err
+    assert not tracing.active()
@@ -0,0 +1,95 @@
+import threading
+
+
+class TokenTable:
+    """Bounded, thread-safe memo of parsed time tokens: raw token string → parse(token).
+
+    Sheets reuse a small vocabulary ("8", "8:30", "5p", "12:15pm"), so once warm most parses are a
+    single dict lookup. Lookups take no lock; a miss parses outside the lock and stores under it.
+    When the table holds maxsize tokens it is emptied, so a flood of one-off tokens costs a re-warm
+    rather than memory. Tokens that fail to parse are never stored and raise every time.
+    misses is exact; hits is best effort while several threads look up at once."""
+
+    def __init__(self, parse, maxsize=4096):
+        self.parse = parse
+        self.maxsize = maxsize
+        self.values = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.values)
+
+    def lookup(self, token):
+        value = self.values.get(token)
+        if value is None:
+            return self._miss(token)
+        self.hits += 1
+        return value
+
+    def _miss(self, token):
+        value = self.parse(token)
+        with self._lock:
+            self.misses += 1
+            if len(self.values) >= self.maxsize:
+                self.values.clear()
+            self.values[token] = value
+        return value
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'size': len(self.values),
+            'maxsize': self.maxsize,
+        }
+
+    def clear(self):
+        with self._lock:
+            self.values.clear()
+            self.hits = self.misses = 0
+
+
+def scan_line(line):
+    """Split a time-entry line into (id, ranges_list, explicit_start) in a single pass.
+
+    The ID ends at the first whitespace run that is followed by a range start token:
+        digit, then digits/'.'/':', then an optional a/am/p/pm suffix, then '-'
+    explicit_start is True when that first start token has an AM/PM suffix right after a digit or
+    a leading zero (e.g. 8a, 12:30pm, 09), meaning no +12 should be inferred for it.
+    Returns (None, None, False) if the line has no time range.
+
+    Every character is visited at most twice (once by the whitespace scan, once by a token probe),
+    so the cost is linear in the line length for any input."""
+    n = len(line)
+    i = 0
+    while i < n:
+        if not line[i].isspace():
+            i += 1
+            continue
+
+        ws_start = i
+        while i < n and line[i].isspace():
+            i += 1
+
+        # probe for a range start token right after the whitespace run
+        j = i
+        if j < n and line[j].isdecimal():
+            j += 1
+            while j < n and (line[j].isdecimal() or line[j] in '.:'):
+                j += 1
+            suffix_at = j
+            if j < n and line[j] in 'ap':
+                j += 1
+                if j < n and line[j] == 'm':
+                    j += 1
+            if j < n and line[j] == '-':
+                explicit = ((j > suffix_at and line[suffix_at - 1].isdecimal())
+                            or (line[i] == '0' and line[i + 1].isdecimal()))
+                return line[:ws_start], [r.strip() for r in line[i:].split(',')], explicit
+        # no token here; the probed characters are not whitespace, so resume the scan from i
+
+    return None, None, False
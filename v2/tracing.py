@@ -0,0 +1,93 @@
+import contextlib
+import logging
+import os
+import queue
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+
+# Engine trace output. Nothing is written unless tracing is started, and then only for calculations
+# that opted in (or for everything with start(always=True)). Call sites guard any argument that costs
+# something to build with active(), so a disabled trace is a flag check.
+log = logging.getLogger('STC')
+log.addHandler(logging.NullHandler())
+log.propagate = False
+
+_requested = ContextVar('stc_trace', default=False)
+_always = False
+_listener = None
+_queue_handler = None
+
+
+def active():
+    """True if the current request or calculation is being traced."""
+    return _always or _requested.get()
+
+
+class _ActiveFilter(logging.Filter):
+    # runs in the emitting thread, so it sees that thread's opt-in
+    def filter(self, record):
+        return active()
+
+
+def start(always=False):
+    """Start the background writer. Records are queued by the calling thread and written to stderr
+    by a QueueListener thread, so a traced request never blocks on the stream.
+    always=True traces every calculation instead of only those that opt in."""
+    global _always, _listener, _queue_handler
+    _always = always
+    if _listener is not None:
+        return
+    records = queue.SimpleQueue()
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter('%(asctime)s.%(msecs)03d %(message)s', datefmt='%H:%M:%S'))
+    _queue_handler = QueueHandler(records)
+    _queue_handler.addFilter(_ActiveFilter())
+    _listener = QueueListener(records, stream)
+    _listener.start()
+    log.addHandler(_queue_handler)
+    log.setLevel(logging.DEBUG)
+
+
+def stop():
+    """Flush queued records and stop the background writer."""
+    global _always, _listener, _queue_handler
+    if _listener is None:
+        return
+    log.removeHandler(_queue_handler)
+    log.setLevel(logging.NOTSET)
+    _listener.stop()
+    _always = False
+    _listener = _queue_handler = None
+
+
+def _forget_writer():
+    # a forked worker inherits the handler but not the listener thread; start() makes a new one
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        log.removeHandler(_queue_handler)
+    _listener = _queue_handler = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_writer)
+
+
+def begin(enabled=True):
+    """Opt the current context in (or out) of tracing. Returns a token for end()."""
+    if enabled and _listener is None:
+        start()
+    return _requested.set(enabled)
+
+
+def end(token):
+    _requested.reset(token)
+
+
+@contextlib.contextmanager
+def traced(enabled=True):
+    """Trace everything calculated inside the block (when enabled)."""
+    token = begin(enabled)
+    try:
+        yield
+    finally:
+        end(token)